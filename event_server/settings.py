@@ -16,7 +16,6 @@ from distutils.util import strtobool
 from pathlib import Path
 import dotenv
 from environ import Env
-import pycountry
 dotenv.load_dotenv()
 env = Env()
 env.read_env()
@@ -60,6 +59,7 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'x-read-primary',
 ]
 
 # LOGIN_REDIRECT_URL = env.str("LOGIN_REDIRECT_URL", default="http://localhost:3000")
@@ -73,6 +73,11 @@ MEDIA_ROOT = BASE_DIR / 'media'
 if "test" in sys.argv:
     MEDIA_ROOT = f"{MEDIA_ROOT}/test"
 
+# Viewset actions over their query budget raise instead of logging a warning
+ENFORCE_ENDPOINT_BUDGETS = env.bool(
+    'ENFORCE_ENDPOINT_BUDGETS', default="test" in sys.argv
+)
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
 
@@ -106,7 +111,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
-    'django_keycloak_auth.middleware.KeycloakMiddleware',
+    'infrastructure.middleware.KeycloakMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -114,6 +119,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'simple_history.middleware.HistoryRequestMiddleware',
+    'infrastructure.middleware.ReplicaStickinessMiddleware',
+    'infrastructure.middleware.ServerTimingMiddleware',
     'infrastructure.middleware.EventDetectionMiddleware',
 ]
 
@@ -147,18 +154,62 @@ DATABASES = {
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
+# Connections to Postgres. Without DATABASE_POOL a connection persists in its
+# thread for DATABASE_CONN_MAX_AGE seconds, which helps websocket consumers and
+# commands; Daphne runs each HTTP request in a new thread though, so only the
+# pool (infrastructure.db_pool) saves HTTP requests from connecting. Behind a
+# transaction-mode pgbouncer set DATABASE_POOLER=pgbouncer instead.
+DATABASE_POOL = env.bool("DATABASE_POOL", default=False)
+DATABASE_POOLER = env.str("DATABASE_POOLER", default="")
 if DEPLOYED or "makemigrations" in sys.argv:  # Not using a virtual env = is deployed
     DATABASES = {  # pragma: nocover
         'default': {
-            'ENGINE': 'django.db.backends.postgresql_psycopg2',
+            'ENGINE': (
+                'infrastructure.db_pool' if DATABASE_POOL
+                else 'django.db.backends.postgresql_psycopg2'
+            ),
             'NAME': env("DJANGO_POSTGRESS_NAME", default="django"),
             'USER': env("DJANGO_POSTGRESS_USER", default="django"),
             'PASSWORD': env("DJANGO_POSTGRESS_PASS", default="password"),
             'HOST': env("POSTGRES_HOST", default="127.0.0.1"),
             'PORT': env("POSTGRES_PORT", default="5432"),
+            # Pooled connections go back to the pool after every request
+            'CONN_MAX_AGE': 0 if DATABASE_POOL else env.int(
+                "DATABASE_CONN_MAX_AGE", default=60
+            ),
+            'CONN_HEALTH_CHECKS': env.bool("DATABASE_CONN_HEALTH_CHECKS", default=True),
+            'POOL': {
+                'max_size': env.int("DATABASE_POOL_MAX_SIZE", default=20),
+                'timeout': env.int("DATABASE_POOL_TIMEOUT", default=10),
+                'max_lifetime': env.int("DATABASE_POOL_MAX_LIFETIME", default=1800),
+            },
+            # Transaction pooling can't keep named cursors across transactions
+            'DISABLE_SERVER_SIDE_CURSORS': DATABASE_POOLER == 'pgbouncer',
         }
     }
 
+# Optional read replica for heavy organizer reads (infrastructure.db_router):
+# a replica host of the Postgres primary, or another database name, e.g. a
+# copy of db.sqlite3 when trying it out locally
+if env.str("DATABASE_REPLICA_HOST", default=None):  # pragma: nocover
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': env.str("DATABASE_REPLICA_HOST"),
+        'PORT': env.str(
+            "DATABASE_REPLICA_PORT", default=DATABASES['default'].get('PORT', '')
+        ),
+        'TEST': {'MIRROR': 'default'},
+    }
+elif env.str("DATABASE_REPLICA_NAME", default=None):  # pragma: nocover
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': env.str("DATABASE_REPLICA_NAME"),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['infrastructure.db_router.ReplicaRouter']
+# Seconds a client reads from the primary after a write
+REPLICA_STICKY_SECONDS = env.int("REPLICA_STICKY_SECONDS", default=10)
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -225,12 +276,37 @@ if strtobool(os.getenv("DEPLOYED", "False")):
             },
         },
     }
+    # Workers add their request metrics up in Redis
+    METRICS_REDIS_URL = env.str("REDIS_URL", default="redis://0.0.0.0:6379")
 else:
     CHANNEL_LAYERS = {
         'default': {
             'BACKEND': "channels.layers.InMemoryChannelLayer"
         }
     }
+    METRICS_REDIS_URL = None
+
+# Seconds between a worker's metric flushes to Redis
+METRICS_FLUSH_INTERVAL = env.int('METRICS_FLUSH_INTERVAL', default=10)
+# When set, /metrics/ requires "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = env.str('METRICS_TOKEN', default=None)
+# Deployed, /metrics/ is refused outright until METRICS_TOKEN is set
+METRICS_TOKEN_REQUIRED = bool(strtobool(os.getenv("DEPLOYED", "False")))
+
+# Local memory, timed for the Server-Timing header
+CACHES = {
+    'default': {
+        'BACKEND': 'infrastructure.utils.metrics.TimedLocMemCache',
+    }
+}
+# Seconds the async polling endpoints (infrastructure.async_views) serve a
+# cached response; saving or deleting a polled model replaces it sooner.
+# 0 turns the cache off.
+POLL_CACHE_SECONDS = env.int('POLL_CACHE_SECONDS', default=5)
+# Longest wait of a change feed long poll, and how long an event stream
+# stays open before the client reconnects
+CHANGE_FEED_WAIT_SECONDS = env.int('CHANGE_FEED_WAIT_SECONDS', default=25)
+CHANGE_FEED_STREAM_SECONDS = env.int('CHANGE_FEED_STREAM_SECONDS', default=300)
 
 
 # Daphne
@@ -296,7 +372,7 @@ SPECTACULAR_SETTINGS = {
             'infrastructure.models.Application.DigitalDesignerProficientSkills',
         'HardwareHackDetailEnum':
             'infrastructure.models.Application.HardwareHackDetail',
-        'CountryEnum': [(x.alpha_2, x.name) for x in pycountry.countries],
+        'CountryEnum': 'infrastructure.choices.COUNTRIES',
     },
 }
 CSP_DEFAULT_SRC = ("'self'", "'unsafe-inline'")
@@ -344,8 +420,10 @@ if "test" not in sys.argv:
         'version': 1,
         'disable_existing_loggers': False,
         'handlers': {
+            # Queued: a listener thread writes, requests never wait on I/O
             'file': {
-                'class': 'logging.handlers.RotatingFileHandler',
+                '()': 'infrastructure.utils.request_logging.queued',
+                'handler_class': 'logging.handlers.RotatingFileHandler',
                 'filename': 'logs/request.log',
                 'maxBytes': 10485760,  # 10 MB
                 'backupCount': 5,
@@ -353,7 +431,8 @@ if "test" not in sys.argv:
                 'formatter': 'verbose'
             },
             'console': {
-                'class': 'logging.StreamHandler',
+                '()': 'infrastructure.utils.request_logging.queued',
+                'handler_class': 'logging.StreamHandler',
                 'formatter': 'verbose',
             },
         },
@@ -25,7 +25,7 @@ from rest_framework import permissions, routers
 from rest_framework_simplejwt.views import (TokenObtainPairView,
                                             TokenRefreshView, TokenVerifyView)
 
-from infrastructure import views
+from infrastructure import async_views, views
 from infrastructure.models import (Application, ApplicationQuestion,
                                    ApplicationQuestionChoice, ApplicationResponse,
                                    Attendee, AttendeePreference,
@@ -71,6 +71,7 @@ router.register(
 )
 router.register(r'skillproficiencies', views.SkillProficiencyViewSet)
 router.register(r'projects', views.ProjectViewSet)
+router.register(r'gavel', views.GavelExportViewSet, basename='gavel')
 router.register(r'groups', views.GroupViewSet)
 router.register(r'hardware', views.HardwareViewSet)
 router.register(r'hardwaredevices', views.HardwareDeviceViewSet)
@@ -116,6 +117,16 @@ urlpatterns = [
     path('auth/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
     path('schema/spectacular/', SpectacularAPIView.as_view(), name='schema'),
     path('me/', views.me, name='me'),
+    path('metrics/', views.metrics, name='metrics'),
+    path('async/mentorhelprequests/', async_views.MentorHelpRequestPollView.as_view(),
+         name='async-mentorhelprequests'),
+    path('async/mentorhelprequests/changes/',
+         async_views.MentorHelpRequestChangeFeedView.as_view(),
+         name='async-mentorhelprequests-changes'),
+    path('async/lighthouses/', async_views.LightHousePollView.as_view(),
+         name='async-lighthouses'),
+    path('async/hardwarerequests/', async_views.HardwareRequestPollView.as_view(),
+         name='async-hardwarerequests'),
     path('events/<str:event_id>/activate', views.activate_event, name='activate_event'),
     # path("lighthouse/", views.lighthouse, name="lighthouse"),
     # path("lighthouse/<str:table_number>/", views.lighthouse_table, name="lighthouse_table"),
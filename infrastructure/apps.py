@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class InfrastructureConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'infrastructure'
+
+    def ready(self):
+        from infrastructure.utils import attendee_detail, metrics, polling
+        attendee_detail.connect_signals()
+        metrics.connect_signals()
+        polling.connect_signals()
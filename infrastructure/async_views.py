@@ -0,0 +1,396 @@
+"""
+Async read endpoints for the routes the frontend polls.
+
+``mentorhelprequests/``, ``lighthouses/`` and ``hardwarerequests/`` are
+polled by every open client. Their list actions are served again under
+``async/`` by async views: the same querysets, filters and serializers, so
+the same JSON, without the hop to a worker thread that Daphne makes for
+every synchronous view.
+
+The rendered response is cached per event and query string for
+POLL_CACHE_SECONDS, under a version the signal handlers in
+``infrastructure.utils.polling`` replace whenever a polled model is saved or deleted. A
+poll between two changes is then answered from local memory without
+leaving the event loop (TimedLocMemCache has in-place async methods). Data
+of related models (team names, table locations) can be stale for at most
+POLL_CACHE_SECONDS.
+
+Database access goes through the async ORM (``afirst``, ``async for``).
+Query string filters are validated in a worker thread, as validating a
+team or hardware id reads it.
+
+``async/mentorhelprequests/changes/`` is a change feed for the mentor
+dashboards, as a long poll or Server-Sent Events: only the requests changed
+after a client's cursor, a ``history_id`` of MentorHelpRequest's history.
+Saving or deleting a request sends a message to the event's group on the
+channel layer once committed; waiting feeds are subscribed to that group and
+read the history only when woken, so an idle dashboard costs the database
+nothing and a change reaches every feed as soon as it is committed, across
+workers with the Redis channel layer. History ids are numbered when rows are
+written, so a transaction committing after a later one could be passed
+over; help request saves are single short transactions.
+"""
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max, Prefetch
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views import View
+from django_filters.utils import translate_validation
+from rest_framework.renderers import JSONRenderer
+
+from infrastructure.constants import MENTOR_HELP_REQUEST_TOPICS
+from infrastructure.filters import HardwareRequestFilter, MentorHelpRequestFilter
+from infrastructure.models import (Attendee, Event, HardwareRequest, LightHouse,
+                                   MentorHelpRequest)
+from infrastructure.serializers import (HardwareRequestListSerializer,
+                                        LightHouseSerializer,
+                                        MentorHelpRequestReadSerializer)
+from infrastructure.utils.polling import (POLLED_MODELS, change_feed_group,
+                                          poll_cache_key, poll_version_key)
+from infrastructure.views import (HardwareRequestsViewSet, LightHouseViewSet,
+                                  MentorHelpRequestViewSet)
+
+
+class AsyncEventView(View):
+    """Async view of the request's event, guarded by ``keycloak_roles``"""
+    keycloak_roles = {}
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # KeycloakMiddleware reads the roles of ``view_func.cls``, as DRF sets it
+        view.cls = cls
+        return view
+
+    async def get_event(self, request):
+        event = getattr(request, 'event', None)
+        if event is None:
+            event = await Event.objects.filter(is_active=True).afirst()
+        return event
+
+
+class AsyncListView(AsyncEventView):
+    """
+    Async list of an event-scoped model. Subclasses give ``name`` (the cache
+    namespace), ``keycloak_roles``, ``get_queryset`` and ``serialize``.
+    """
+    name = None
+    filterset_class = None
+
+    async def get(self, request):
+        event = await self.get_event(request)
+        if event is None:
+            return JsonResponse({'detail': "No active event"}, status=404)
+
+        timeout = settings.POLL_CACHE_SECONDS
+        key = None
+        if timeout:
+            version_key = poll_version_key(self.name, event.id)
+            version = await cache.aget(version_key)
+            if version is None:
+                version = uuid.uuid4().hex
+                await cache.aadd(version_key, version, None)
+            key = poll_cache_key(
+                self.name, event.id, version, request.GET.urlencode()
+            )
+            content = await cache.aget(key)
+            if content is not None:
+                return HttpResponse(content, content_type='application/json')
+
+        queryset = self.get_queryset(event)
+        if self.filterset_class is not None and request.GET:
+            filterset = await sync_to_async(self.filter)(request, queryset)
+            if not filterset.is_valid():
+                errors = translate_validation(filterset.errors).detail
+                return HttpResponse(
+                    JSONRenderer().render(errors), status=400,
+                    content_type='application/json'
+                )
+            queryset = filterset.qs
+        instances = [instance async for instance in queryset]
+        # Everything serialized is loaded by now, so this runs in the loop
+        content = JSONRenderer().render(self.serialize(instances))
+        if key is not None:
+            await cache.aset(key, content, timeout)
+        return HttpResponse(content, content_type='application/json')
+
+    def filter(self, request, queryset):
+        """The bound filterset, validated and with its ``qs`` built"""
+        filterset = self.filterset_class(request.GET, queryset=queryset)
+        if filterset.is_valid():
+            filterset.qs
+        return filterset
+
+    def get_queryset(self, event):
+        raise NotImplementedError
+
+    def serialize(self, instances):
+        raise NotImplementedError
+
+
+class MentorHelpRequestPollView(AsyncListView):
+    name = POLLED_MODELS[MentorHelpRequest]
+    keycloak_roles = {'GET': MentorHelpRequestViewSet.keycloak_roles['GET']}
+    filterset_class = MentorHelpRequestFilter
+
+    def get_queryset(self, event):
+        return MentorHelpRequest.objects.for_event(event).order_by(
+            'created_at'
+        ).select_related('team__table__location', 'reporter')
+
+    def serialize(self, instances):
+        return MentorHelpRequestReadSerializer(instances, many=True).data
+
+
+class LightHousePollView(AsyncListView):
+    name = POLLED_MODELS[LightHouse]
+    keycloak_roles = {'GET': LightHouseViewSet.keycloak_roles['GET']}
+
+    def get_queryset(self, event):
+        return LightHouse.objects.for_event(event).select_related('table')
+
+    def serialize(self, instances):
+        return LightHouseSerializer([
+            {
+                "id": lighthouse.id,
+                "table": lighthouse.table.number,
+                "ip_address": lighthouse.ip_address,
+                "mentor_requested": lighthouse.mentor_requested,
+                "announcement_pending": lighthouse.announcement_pending
+            }
+            for lighthouse in instances
+        ], many=True).data
+
+
+class HardwareRequestPollView(AsyncListView):
+    name = POLLED_MODELS[HardwareRequest]
+    keycloak_roles = {'GET': HardwareRequestsViewSet.keycloak_roles['GET']}
+    filterset_class = HardwareRequestFilter
+
+    def get_queryset(self, event):
+        return HardwareRequest.objects.for_event(event).select_related(
+            'requester', 'team'
+        ).prefetch_related(
+            Prefetch('team__attendees', queryset=Attendee.objects.only('id'))
+        )
+
+    def serialize(self, instances):
+        return HardwareRequestListSerializer(instances, many=True).data
+
+
+# Change feed of mentor help requests
+
+# Seconds between the comments that keep an idle event stream open through
+# proxies
+CHANGE_FEED_KEEPALIVE_SECONDS = 15
+
+TOPICS = {key for key, _ in MENTOR_HELP_REQUEST_TOPICS}
+
+
+@asynccontextmanager
+async def subscription(event_id):
+    """The channel layer and a channel in the event's change feed group"""
+    layer = get_channel_layer()
+    channel = await layer.new_channel()
+    group = change_feed_group(event_id)
+    await layer.group_add(group, channel)
+    try:
+        yield layer, channel
+    finally:
+        await layer.group_discard(group, channel)
+
+
+async def wait_for_change(subscribed, timeout) -> bool:
+    layer, channel = subscribed
+    try:
+        await asyncio.wait_for(layer.receive(channel), timeout)
+    except asyncio.TimeoutError:
+        return False
+    return True
+
+
+def event_history(event):
+    return MentorHelpRequest.history.model.objects.filter(event_id=event.id)
+
+
+async def latest_cursor(event) -> int:
+    latest = await event_history(event).aaggregate(cursor=Max('history_id'))
+    return latest['cursor'] or 0
+
+
+def topics_match(topics, all_of, any_of) -> bool:
+    topics = set(topics or ())
+    return set(all_of) <= topics and (not any_of or bool(topics & set(any_of)))
+
+
+async def topics_at(event, cursor, request_ids):
+    """Topics of the requests as of ``cursor``, for those that existed then"""
+    latest = event_history(event).filter(
+        history_id__lte=cursor, id__in=request_ids
+    ).order_by().values('id').annotate(latest=Max('history_id')).values('latest')
+    return {
+        request_id: topics async for request_id, topics in
+        event_history(event).filter(history_id__in=latest).values_list('id', 'topic')
+    }
+
+
+async def changes_since(event, cursor, all_of=(), any_of=()):
+    """
+    The cursor of the newest history row of ``event`` after ``cursor``, and
+    the requests changed since then with the topics asked for: each as it is
+    now, or ``{"id", "deleted": true}`` when it is gone. A request that had
+    those topics at ``cursor`` but no longer has is ``{"id", "removed": true}``,
+    so filtered lists drop it.
+    """
+    since = cursor
+    history = event_history(event).filter(history_id__gt=since).order_by(
+        'history_id'
+    ).values_list('history_id', 'id', 'topic')
+    # Topics of the last change of each request, in order of that change
+    changed = {}
+    async for cursor, request_id, topics in history:
+        changed.pop(request_id, None)
+        changed[request_id] = topics
+    if not changed:
+        return cursor, []
+
+    current = {
+        instance.id: instance async for instance in
+        MentorHelpRequest.objects.for_event(event).filter(
+            id__in=list(changed)
+        ).select_related('team__table__location', 'reporter')
+    }
+    unmatched = {
+        request_id for request_id, topics in changed.items()
+        if not topics_match(
+            current[request_id].topic if request_id in current else topics,
+            all_of, any_of
+        )
+    }
+    # Of those, the ones a client following the filter has listed
+    listed = set()
+    if unmatched:
+        listed = {
+            request_id for request_id, topics in
+            (await topics_at(event, since, list(unmatched))).items()
+            if topics_match(topics, all_of, any_of)
+        }
+    changes = []
+    for request_id in changed:
+        instance = current.get(request_id)
+        if instance is None:
+            if request_id not in unmatched or request_id in listed:
+                changes.append({'id': str(request_id), 'deleted': True})
+        elif request_id in listed:
+            changes.append({'id': str(request_id), 'removed': True})
+        elif request_id not in unmatched:
+            # Everything serialized is loaded by now, so this runs in the loop
+            changes.append(MentorHelpRequestReadSerializer(instance).data)
+    return cursor, changes
+
+
+class MentorHelpRequestChangeFeedView(AsyncEventView):
+    """
+    Mentor help requests created, changed or deleted after a cursor, the
+    ``history_id`` of the last change a client has seen. Query parameters:
+
+    - ``cursor`` (or the Last-Event-ID header). Without it, a long poll
+      answers the current cursor at once: take it before loading the list.
+    - ``topic`` and ``topic__any``: comma separated topic keys the requests
+      have all of, or any of, as on ``mentorhelprequests/``
+    - ``wait``: seconds a long poll waits for a change, at most and by
+      default CHANGE_FEED_WAIT_SECONDS
+
+    A long poll answers ``{"cursor", "results"}`` once there are changes, or
+    with no results after ``wait``. With ``Accept: text/event-stream`` the
+    changes are sent as Server-Sent Events, one ``changes`` event holding the
+    results of each batch, for CHANGE_FEED_STREAM_SECONDS; EventSource then
+    reconnects from the last event id. A result is the request as
+    ``mentorhelprequests/`` lists it, ``{"id", "deleted": true}``, or
+    ``{"id", "removed": true}`` when it no longer has the topics asked for.
+    """
+    keycloak_roles = {'GET': MentorHelpRequestViewSet.keycloak_roles['GET']}
+
+    async def get(self, request):
+        event = await self.get_event(request)
+        if event is None:
+            return JsonResponse({'detail': "No active event"}, status=404)
+        try:
+            cursor, all_of, any_of, wait = self.parse(request)
+        except ValueError as error:
+            return JsonResponse({'detail': str(error)}, status=400)
+
+        if 'text/event-stream' in request.headers.get('Accept', ''):
+            return StreamingHttpResponse(
+                self.stream(event, cursor, all_of, any_of),
+                content_type='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+            )
+        if cursor is None:
+            return JsonResponse({'cursor': await latest_cursor(event), 'results': []})
+
+        deadline = time.monotonic() + wait
+        # Subscribed before reading, so no change slips in between
+        async with subscription(event.id) as subscribed:
+            cursor, changes = await changes_since(event, cursor, all_of, any_of)
+            while not changes:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not await wait_for_change(subscribed, remaining):
+                    break
+                cursor, changes = await changes_since(event, cursor, all_of, any_of)
+        return HttpResponse(
+            JSONRenderer().render({'cursor': cursor, 'results': changes}),
+            content_type='application/json'
+        )
+
+    async def stream(self, event, cursor, all_of, any_of):
+        deadline = time.monotonic() + settings.CHANGE_FEED_STREAM_SECONDS
+        async with subscription(event.id) as subscribed:
+            if cursor is None:
+                cursor = await latest_cursor(event)
+                # Sets the id EventSource reconnects from
+                yield f"id: {cursor}\n\n"
+            changed = True
+            while True:
+                if changed:
+                    cursor, changes = await changes_since(
+                        event, cursor, all_of, any_of
+                    )
+                    if changes:
+                        data = JSONRenderer().render(changes).decode()
+                        yield f"id: {cursor}\nevent: changes\ndata: {data}\n\n"
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                changed = await wait_for_change(
+                    subscribed, min(remaining, CHANGE_FEED_KEEPALIVE_SECONDS)
+                )
+                if not changed:
+                    yield ": keepalive\n\n"
+
+    def parse(self, request):
+        cursor = request.GET.get('cursor') or request.headers.get('Last-Event-ID')
+        if cursor is not None:
+            if not cursor.isdigit():
+                raise ValueError("cursor must be a non-negative integer")
+            cursor = int(cursor)
+        all_of, any_of = (
+            [key for key in request.GET.get(name, '').split(',') if key]
+            for name in ('topic', 'topic__any')
+        )
+        unknown = set(all_of + any_of) - TOPICS
+        if unknown:
+            raise ValueError(f"Unknown topics: {', '.join(sorted(unknown))}")
+        try:
+            wait = float(request.GET.get('wait', settings.CHANGE_FEED_WAIT_SECONDS))
+        except ValueError:
+            raise ValueError("wait must be a number of seconds")
+        wait = min(max(wait, 0), settings.CHANGE_FEED_WAIT_SECONDS)
+        return cursor, all_of, any_of, wait
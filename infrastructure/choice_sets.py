@@ -0,0 +1,98 @@
+"""
+Set queries over MultiSelectField columns.
+
+MultiSelectField stores its keys comma joined ("S,E"), so ``__contains``
+turns into an unindexable ``LIKE '%S%'`` that also matches keys which merely
+contain the searched one. The ``all_of`` and ``any_of`` lookups registered
+here compare whole keys instead:
+
+    Team.objects.filter(tracks__any_of=['S', 'E'])
+    Hardware.objects.filter(tags__all_of=['VR', 'HA'])
+
+On PostgreSQL both compile to array operators (``@>`` and ``&&``) over
+``string_to_array(column, ',')``, which a ``ChoiceSetIndex`` on the field
+(a GIN index over the same expression) answers without a table scan. Other
+backends, i.e. SQLite in development and tests, match each key against the
+delimited column.
+"""
+from django.db import models
+from django.db.models import Func, Lookup
+from multiselectfield import MultiSelectField
+
+
+class ChoiceKeys(Func):
+    """The keys stored in a MultiSelectField column, as a text[] on PostgreSQL."""
+    function = 'string_to_array'
+    template = "%(function)s(%(expressions)s, ',')"
+    output_field = models.TextField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # Only reached when indexing on other backends: index the column itself
+        return compiler.compile(self.source_expressions[0])
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, **extra_context)
+
+
+class ChoiceSetLookup(Lookup):
+    prepare_rhs = False
+    # PostgreSQL array operator, and how keys are combined elsewhere
+    operator = None
+    connector = None
+
+    def get_prep_lookup(self):
+        if isinstance(self.rhs, str):
+            return [key for key in self.rhs.split(',') if key]
+        return [str(key) for key in self.rhs]
+
+    def as_postgresql(self, compiler, connection):
+        lhs, lhs_params = compiler.compile(ChoiceKeys(self.lhs))
+        return f"{lhs} {self.operator} %s::text[]", [*lhs_params, self.rhs]
+
+    def as_sql(self, compiler, connection):
+        if not self.rhs:
+            return ('1 = 1', []) if self.connector == 'AND' else ('1 = 0', [])
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        condition = f"INSTR(',' || {lhs} || ',', %s) > 0"
+        sql = f" {self.connector} ".join([condition] * len(self.rhs))
+        params = []
+        for key in self.rhs:
+            params += [*lhs_params, f",{key},"]
+        return f"({sql})", params
+
+
+@MultiSelectField.register_lookup
+class AllOf(ChoiceSetLookup):
+    lookup_name = 'all_of'
+    operator = '@>'
+    connector = 'AND'
+
+
+@MultiSelectField.register_lookup
+class AnyOf(ChoiceSetLookup):
+    lookup_name = 'any_of'
+    operator = '&&'
+    connector = 'OR'
+
+
+class ChoiceSetIndex(models.Index):
+    """
+    GIN index over the keys of a MultiSelectField on PostgreSQL, serving the
+    ``all_of`` and ``any_of`` lookups. A plain index on the column elsewhere.
+    """
+
+    def __init__(self, field_name, *, name):
+        self.field_name = field_name
+        super().__init__(ChoiceKeys(field_name), name=name)
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        if schema_editor.connection.vendor == 'postgresql':
+            using = " USING gin"
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+    def deconstruct(self):
+        path = f"{self.__class__.__module__}.{self.__class__.__name__}"
+        return path, (self.field_name,), {'name': self.name}
+
+    def clone(self):
+        return self.__class__(self.field_name, name=self.name)
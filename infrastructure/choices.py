@@ -0,0 +1,55 @@
+"""
+Choice tables shared by models, serializers and the schema settings.
+
+Country and language tables are read from compact JSON files generated by
+``manage.py generate_choice_tables``, so neither ``pycountry`` nor
+``language_tags`` (and the registries they parse) are imported at startup.
+Every table is built on first use and memoized; callers share the same list.
+"""
+import csv
+import json
+from functools import lru_cache
+from pathlib import Path
+
+CHOICES_DIR = Path(__file__).resolve().parent
+COUNTRIES_FILE = CHOICES_DIR / "countries.json"
+LANGUAGES_FILE = CHOICES_DIR / "languages.json"
+INDUSTRIES_FILE = CHOICES_DIR / "industries.csv"
+
+
+def _load_pairs(path):
+    with open(path, encoding="utf-8") as f:
+        return [tuple(pair) for pair in json.load(f)]
+
+
+@lru_cache(maxsize=None)
+def countries():
+    """ISO 3166-1 ``(alpha_2, name)`` pairs."""
+    return _load_pairs(COUNTRIES_FILE)
+
+
+@lru_cache(maxsize=None)
+def spoken_languages():
+    """RFC 5646-compliant ``(subtag, description)`` pairs of languages."""
+    return _load_pairs(LANGUAGES_FILE)
+
+
+@lru_cache(maxsize=None)
+def industries():
+    """``(industry, industry)`` pairs read from industries.csv."""
+    with open(INDUSTRIES_FILE, newline="", encoding="utf-8") as f:
+        return [(row[0], row[0]) for row in csv.reader(f) if row and row[0]]
+
+
+_LAZY_TABLES = {
+    "COUNTRIES": countries,
+    "SPOKEN_LANGUAGES": spoken_languages,
+    "INDUSTRIES": industries,
+}
+
+
+def __getattr__(name):
+    # Module-level names for import strings, e.g. SPECTACULAR_SETTINGS enum overrides
+    if name in _LAZY_TABLES:
+        return _LAZY_TABLES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -10,9 +10,10 @@ from django.db.models import Q
 from infrastructure.models import (LightHouse, MentorHelpRequest,
                                    MentorRequestStatus, Table, Team)
 from infrastructure.serializers import LightHouseSerializer
+from infrastructure.utils.metrics import MetricsConsumerMixin
 
 
-class LightHouseByTableConsumer(AsyncWebsocketConsumer):
+class LightHouseByTableConsumer(MetricsConsumerMixin, AsyncWebsocketConsumer):
     async def connect(self):
         self.table = self.scope["url_route"]["kwargs"]["table"]
         self.room_group_name = f"lighthouse_{self.table}"
@@ -67,9 +68,7 @@ class LightHouseByTableConsumer(AsyncWebsocketConsumer):
                     return
                 except json.decoder.JSONDecodeError as error:
                     message = {"type": "chat.message", "message": {"error": str(error), "original_message": message}}
-            await self.channel_layer.group_send(
-                self.room_group_name, message
-            )
+            await self.send_to_group(self.room_group_name, message)
         except (json.JSONDecodeError) as error:
             pass
 
@@ -80,7 +79,7 @@ class LightHouseByTableConsumer(AsyncWebsocketConsumer):
         await self.send(text_data=json.dumps({"message": message}))
 
 
-class LightHousesConsumer(AsyncWebsocketConsumer):
+class LightHousesConsumer(MetricsConsumerMixin, AsyncWebsocketConsumer):
 
     async def connect(self):
         self.room_group_name = f"lighthouses"
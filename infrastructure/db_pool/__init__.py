@@ -0,0 +1,22 @@
+"""
+PostgreSQL backend keeping a pool of connections per process.
+
+Daphne runs the synchronous part of every HTTP request in a thread of its
+own, so Django's persistent connections (CONN_MAX_AGE), which live in a
+thread, are never reused for HTTP: every request connects to Postgres again.
+With ``ENGINE = 'infrastructure.db_pool'`` closing a connection at the end of
+a request hands it back to a process-wide pool instead, and the next request,
+in whichever thread, checks it out again.
+
+Django 4.2 has no pooling of its own (the psycopg 3 pool arrives in 5.1);
+this backend works with psycopg2. Options, under ``POOL`` in the database
+settings:
+
+- ``max_size``: connections open at once, default 20
+- ``timeout``: seconds to wait for a free connection, default 10
+- ``max_lifetime``: seconds before a connection is replaced, default 1800
+
+With ``CONN_HEALTH_CHECKS`` a connection is tested before it is handed out.
+``CONN_MAX_AGE`` should stay 0 so connections go back to the pool after every
+request.
+"""
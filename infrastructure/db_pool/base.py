@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+from django.db.backends.postgresql import base
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+
+from infrastructure.utils.metrics import registry
+
+DEFAULTS = {'max_size': 20, 'timeout': 10, 'max_lifetime': 1800}
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of DB-API connections. At most ``max_size`` are checked
+    out at once; ``acquire`` waits up to ``timeout`` seconds for one to come
+    back.
+    """
+
+    def __init__(self, alias, max_size=20, timeout=10, max_lifetime=1800):
+        self.alias = alias
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        # (connection, opened at) of connections not checked out
+        self._idle = deque()
+        self._opened = {}
+
+    def acquire(self, connect, is_usable=None):
+        """A pooled connection, or a new one from ``connect()``"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise OperationalError(
+                f"No connection free in the '{self.alias}' pool after "
+                f"{self.timeout} seconds"
+            )
+        try:
+            while True:
+                with self._lock:
+                    idle = self._idle.pop() if self._idle else None
+                if idle is None:
+                    return self._open(connect)
+                connection, opened = idle
+                if self._expired(connection, opened) or (
+                    is_usable is not None and not is_usable(connection)
+                ):
+                    self._discard(connection)
+                    continue
+                self._opened[id(connection)] = opened
+                return connection
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection):
+        opened = self._opened.pop(id(connection), 0)
+        try:
+            status = connection.info.transaction_status if not connection.closed \
+                else TRANSACTION_STATUS_UNKNOWN
+            if status not in (TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN):
+                connection.rollback()
+                status = connection.info.transaction_status
+            if status == TRANSACTION_STATUS_IDLE and not self._expired(
+                connection, opened
+            ):
+                with self._lock:
+                    self._idle.append((connection, opened))
+            else:
+                self._discard(connection)
+        except Exception:
+            self._discard(connection)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def _open(self, connect):
+        connection = connect()
+        self._opened[id(connection)] = time.monotonic()
+        registry.inc('db_pool_connections_opened_total', (('alias', self.alias),))
+        return connection
+
+    def _expired(self, connection, opened):
+        return connection.closed or time.monotonic() - opened > self.max_lifetime
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    @property
+    def pool(self):
+        with _pools_lock:
+            if self.alias not in _pools:
+                options = {**DEFAULTS, **self.settings_dict.get('POOL', {})}
+                _pools[self.alias] = ConnectionPool(self.alias, **options)
+            return _pools[self.alias]
+
+    def get_new_connection(self, conn_params):
+        is_usable = None
+        if self.settings_dict['CONN_HEALTH_CHECKS']:
+            is_usable = self._is_usable
+        connection = self.pool.acquire(
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+            is_usable,
+        )
+        # Set by the base class when it connects; the same for every connection
+        self.isolation_level = base.IsolationLevel(
+            self.settings_dict['OPTIONS'].get(
+                'isolation_level', base.IsolationLevel.READ_COMMITTED
+            )
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.release(self.connection)
+
+    @staticmethod
+    def _is_usable(connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except base.Database.Error:
+            return False
+        # SELECT 1 opened a transaction unless in autocommit
+        if connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            connection.rollback()
+        return True
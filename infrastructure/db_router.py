@@ -0,0 +1,74 @@
+"""
+Routing of heavy reads to an optional read replica.
+
+With a ``replica`` database configured (see DATABASE_REPLICA_* in settings),
+reads made under ``replica_reads()`` go to the replica; everything else,
+writes and reads inside transactions included, stays on the primary. Without
+one the router does nothing.
+
+Viewsets opt in with ReplicaReadMixin (infrastructure.mixins) for their safe
+actions, export commands wrap their work in ``replica_reads()``.
+
+A replica lags the primary a little, so a client that just wrote must not
+read its write back from the replica. ReplicaStickinessMiddleware sets the
+PRIMARY_COOKIE for REPLICA_STICKY_SECONDS after every successful write, and
+requests carrying it, or the PRIMARY_HEADER, read from the primary.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA = 'replica'
+PRIMARY_COOKIE = 'read_primary'
+PRIMARY_HEADER = 'X-Read-Primary'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_configured() -> bool:
+    return REPLICA in settings.DATABASES
+
+
+@contextmanager
+def replica_reads():
+    """Send reads to the replica, when there is one."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def reads_may_lag(request) -> bool:
+    """Whether ``request`` may read data a little behind its own writes."""
+    return not (
+        request.COOKIES.get(PRIMARY_COOKIE) or request.headers.get(PRIMARY_HEADER)
+    )
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or not replica_configured():
+            return None
+        # The transaction's own writes are only visible on the primary
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both hold the same data
+        databases = {DEFAULT_DB_ALIAS, REPLICA}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary
+        if db == REPLICA:
+            return False
+        return None
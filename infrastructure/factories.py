@@ -1,12 +1,12 @@
 import factory
 import factory.fuzzy
-import pycountry
 from django.contrib.auth.models import Group
 from factory.django import DjangoModelFactory
 from django.utils import timezone
 
 from infrastructure import models
 from infrastructure import event_context
+from infrastructure.choices import countries
 
 
 class UploadedFileFactory(DjangoModelFactory):
@@ -26,7 +26,7 @@ class ApplicationFactory(DjangoModelFactory):
     middle_name = factory.Faker("first_name")
     last_name = factory.Faker("last_name")
     current_country = factory.Faker(
-        'random_element', elements=[[x.alpha_2] for x in pycountry.countries]
+        'random_element', elements=[[x[0]] for x in countries()]
     )
     current_city = factory.Faker("city")
     pronouns = factory.fuzzy.FuzzyText(length=10)
@@ -37,7 +37,7 @@ class ApplicationFactory(DjangoModelFactory):
     secondary_portfolio = factory.Faker("url")
     resume = factory.Iterator(models.UploadedFile.objects.all())
     nationality = factory.Faker(
-        'random_element', elements=[[x.alpha_2] for x in pycountry.countries]
+        'random_element', elements=[[x[0]] for x in countries()]
     )
     status = factory.Faker(
         'random_element', elements=[str(x[0]) for x in models.Application.Status.choices]
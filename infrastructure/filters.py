@@ -7,8 +7,12 @@ for Django Filter integration with DRF ViewSets.
 
 from django_filters import rest_framework as filters
 from infrastructure import event_context
+from infrastructure.constants import MENTOR_HELP_REQUEST_TOPICS
 from infrastructure.models import (
+    Attendee,
+    DestinyHardware,
     Hardware,
+    HardwareTags,
     HardwareDevice,
     HardwareRequest,
     Location,
@@ -16,11 +20,44 @@ from infrastructure.models import (
     Project,
     Table,
     Team,
+    Track,
     Workshop,
     WorkshopAttendee,
 )
 
 
+class ChoiceSetFilter(filters.BaseCSVFilter, filters.ChoiceFilter):
+    """
+    Comma separated choice keys matched against a MultiSelectField, e.g.
+    ``?tracks=S,E``: rows having all of them, or any of them with
+    ``lookup_expr='any_of'``. Uses the field's ChoiceSetIndex on PostgreSQL.
+    """
+
+    def __init__(self, *args, lookup_expr='all_of', **kwargs):
+        super().__init__(*args, lookup_expr=lookup_expr, **kwargs)
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        return self.get_method(qs)(**{f"{self.field_name}__{self.lookup_expr}": value})
+
+
+class AttendeeFilter(filters.FilterSet):
+    """Filter for Attendee with set queries on intended tracks."""
+
+    intended_tracks = ChoiceSetFilter(choices=Track.choices)
+    intended_tracks__any = ChoiceSetFilter(
+        field_name='intended_tracks', choices=Track.choices, lookup_expr='any_of'
+    )
+
+    class Meta:
+        model = Attendee
+        fields = [
+            'first_name', 'last_name', 'communications_platform_username', 'email',
+            'participation_class', 'participation_role', 'checked_in_at'
+        ]
+
+
 class TeamFilter(filters.FilterSet):
     """Filter for Team model with event-scoped Table queryset."""
 
@@ -28,6 +65,15 @@ class TeamFilter(filters.FilterSet):
         field_name='table',
         queryset=None  # Set dynamically
     )
+    tracks = ChoiceSetFilter(choices=Track.choices)
+    tracks__any = ChoiceSetFilter(
+        field_name='tracks', choices=Track.choices, lookup_expr='any_of'
+    )
+    destiny_hardware = ChoiceSetFilter(choices=DestinyHardware.choices)
+    destiny_hardware__any = ChoiceSetFilter(
+        field_name='destiny_hardware', choices=DestinyHardware.choices,
+        lookup_expr='any_of'
+    )
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -51,6 +97,10 @@ class MentorHelpRequestFilter(filters.FilterSet):
         field_name='team',
         queryset=None  # Set dynamically
     )
+    topic = ChoiceSetFilter(choices=MENTOR_HELP_REQUEST_TOPICS)
+    topic__any = ChoiceSetFilter(
+        field_name='topic', choices=MENTOR_HELP_REQUEST_TOPICS, lookup_expr='any_of'
+    )
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -88,6 +138,19 @@ class ProjectFilter(filters.FilterSet):
         fields = ['team']
 
 
+class HardwareFilter(filters.FilterSet):
+    """Filter for Hardware with set queries on tags."""
+
+    tags = ChoiceSetFilter(choices=HardwareTags.choices)
+    tags__any = ChoiceSetFilter(
+        field_name='tags', choices=HardwareTags.choices, lookup_expr='any_of'
+    )
+
+    class Meta:
+        model = Hardware
+        fields = ['relates_to_destiny_hardware']
+
+
 class HardwareDeviceFilter(filters.FilterSet):
     """Filter for HardwareDevice with event-scoped querysets."""
 
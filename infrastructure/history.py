@@ -0,0 +1,58 @@
+"""
+Historical records (django-simple-history) with indexes and an off switch.
+
+``IndexedHistoricalRecords`` takes ``indexes`` for the historical model; the
+history tables get a row on every save and are read per event and object,
+newest first, so they want ``(event, id, history_date)`` and
+``(event, history_date)``.
+
+``skip_history(*models)`` turns history off for the given models within a
+block, for bulk maintenance that would otherwise write a historical row per
+instance:
+
+    with skip_history(HardwareDevice):
+        ...
+
+``bulk_create_with_history`` and ``bulk_update_with_history`` write history
+on their own; use the plain bulk methods inside such a block.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from simple_history.models import HistoricalRecords
+
+_skipped = ContextVar('history_skipped', default=frozenset())
+
+
+@contextmanager
+def skip_history(*models):
+    token = _skipped.set(_skipped.get() | frozenset(models))
+    try:
+        yield
+    finally:
+        _skipped.reset(token)
+
+
+def history_skipped(model) -> bool:
+    return model in _skipped.get()
+
+
+class IndexedHistoricalRecords(HistoricalRecords):
+    def __init__(self, *args, indexes=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.indexes = list(indexes)
+
+    def get_meta_options(self, model):
+        meta_fields = super().get_meta_options(model)
+        meta_fields['indexes'] = self.indexes
+        return meta_fields
+
+    def post_save(self, instance, created, using=None, **kwargs):
+        if history_skipped(type(instance)):
+            return
+        super().post_save(instance, created, using=using, **kwargs)
+
+    def post_delete(self, instance, using=None, **kwargs):
+        if history_skipped(type(instance)):
+            return
+        super().post_delete(instance, using=using, **kwargs)
@@ -4,16 +4,36 @@ import urllib
 import secrets
 import uuid
 import json
+from django.core.exceptions import ImproperlyConfigured
 from django.core.mail import send_mail
+from django.utils.functional import lazy
 from infrastructure import email
 from infrastructure.models import Attendee, ParticipationClass
 
 
-CLIENT_ID = os.environ['KEYCLOAK_CLIENT_ID']
-CLIENT_SECRET_KEY = os.environ['KEYCLOAK_CLIENT_SECRET_KEY']
-KEYCLOAK_URL = os.environ['KEYCLOAK_SERVER_URL']
-KEYCLOAK_REALM = os.environ['KEYCLOAK_REALM']
-EVENT_YEAR = os.environ['EVENT_YEAR']
+# Module attribute -> environment variable, read on first use rather than at
+# import so commands and workers that never talk to Keycloak start without them
+KEYCLOAK_ENV = {
+    'CLIENT_ID': 'KEYCLOAK_CLIENT_ID',
+    'CLIENT_SECRET_KEY': 'KEYCLOAK_CLIENT_SECRET_KEY',
+    'KEYCLOAK_URL': 'KEYCLOAK_SERVER_URL',
+    'KEYCLOAK_REALM': 'KEYCLOAK_REALM',
+    'EVENT_YEAR': 'EVENT_YEAR',
+}
+
+
+def keycloak_setting(name: str) -> str:
+    variable = KEYCLOAK_ENV[name]
+    try:
+        return os.environ[variable]
+    except KeyError:
+        raise ImproperlyConfigured(f"{variable} must be set to use Keycloak")
+
+
+def __getattr__(name):
+    if name in KEYCLOAK_ENV:
+        return keycloak_setting(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def remove_invalid_username_chars(username: str) -> str:
@@ -26,30 +46,51 @@ def remove_invalid_username_chars(username: str) -> str:
     return username
 
 
-EVENT_YEAR = os.environ['EVENT_YEAR']
+class EventRole:
+    """
+    Role name for the current EVENT_YEAR. Looking it up gives a lazy string,
+    resolved when compared or hashed, so the role lists of view classes do
+    not need EVENT_YEAR at import.
+    """
+
+    def __init__(self, role: str):
+        self.role = role
+
+    def __get__(self, instance, owner) -> str:
+        return lazy(self.resolve, str)()
+
+    def resolve(self) -> str:
+        return f"{self.role}:{keycloak_setting('EVENT_YEAR')}"
 
 
 class KeycloakRoles(object):
-    ATTENDEE = f"attendee:{EVENT_YEAR}"
-    ORGANIZER = f"organizer:{EVENT_YEAR}"
-    ADMIN = f"admin:{EVENT_YEAR}"
-    MENTOR = f"mentor:{EVENT_YEAR}"
-    JUDGE = f"judge:{EVENT_YEAR}"
-    VOLUNTEER = f"volunteer:{EVENT_YEAR}"
-    SPONSOR = f"sponsor:{EVENT_YEAR}"
+    ATTENDEE = EventRole("attendee")
+    ORGANIZER = EventRole("organizer")
+    ADMIN = EventRole("admin")
+    MENTOR = EventRole("mentor")
+    JUDGE = EventRole("judge")
+    VOLUNTEER = EventRole("volunteer")
+    SPONSOR = EventRole("sponsor")
 
 
 class KeycloakClient:
     def __init__(self):
+        # The token is fetched on the first authenticated request, so creating
+        # a client (e.g. as a command attribute) makes no network calls
         self.access_token = None
         self.expires_in = None
         self.client_uuid = None
-        self.base_url = f"{KEYCLOAK_URL}/admin/realms/{KEYCLOAK_REALM}"
         self.client_role_map = {}
-        self._get_authentication_token()
+
+    @property
+    def base_url(self):
+        url = keycloak_setting('KEYCLOAK_URL')
+        return f"{url}/admin/realms/{keycloak_setting('KEYCLOAK_REALM')}"
 
     @property
     def authentication_headers(self):
+        if not self.access_token:
+            self._get_authentication_token()
         return {
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json"
@@ -58,10 +99,11 @@ class KeycloakClient:
     def _get_authentication_token(self):
         access_token_params = {
             "grant_type": "client_credentials",
-            "client_id": CLIENT_ID,
-            "client_secret": CLIENT_SECRET_KEY
+            "client_id": keycloak_setting('CLIENT_ID'),
+            "client_secret": keycloak_setting('CLIENT_SECRET_KEY')
         }
-        token_url = (f"{KEYCLOAK_URL}/realms/{KEYCLOAK_REALM}"
+        token_url = (f"{keycloak_setting('KEYCLOAK_URL')}/realms/"
+                     f"{keycloak_setting('KEYCLOAK_REALM')}"
                      f"/protocol/openid-connect/token")
         token_response = requests.post(
             url=token_url,
@@ -80,7 +122,7 @@ class KeycloakClient:
         if not self.access_token:
             self._get_authentication_token()
         client_uuid = requests.get(
-            url=f"{self.base_url}/clients?clientId={CLIENT_ID}",
+            url=f"{self.base_url}/clients?clientId={keycloak_setting('CLIENT_ID')}",
             headers=self.authentication_headers,
         )
         if not client_uuid.ok:
@@ -185,7 +227,9 @@ class KeycloakClient:
         else:
             role = attendee.get_participation_class_display().lower()
 
-        client_role = self.get_client_role_mapping(f"{role}:{EVENT_YEAR}")
+        client_role = self.get_client_role_mapping(
+            f"{role}:{keycloak_setting('EVENT_YEAR')}"
+        )
 
         if not client_role:
             raise Exception(f"Client role not found for {role}")
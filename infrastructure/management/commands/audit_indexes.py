@@ -0,0 +1,85 @@
+"""
+Check that the event-scoped lookups of the API are served by indexes.
+
+Runs EXPLAIN for every list filter of the registered viewsets and for the
+lookups made in code (infrastructure.utils.index_audit.CODE_SHAPES), scoped to
+an event with real values from its rows, and prints each plan's verdict and
+the index or constraint that would fix a full scan, a partial index, or a
+unique lookup nothing keeps unique. Audit the seeded benchmark event
+(benchmark_api --seed) for plans at a realistic size.
+
+--check exits with an error when any lookup needs fixing, for CI.
+
+Usage:
+    python manage.py audit_indexes
+    python manage.py audit_indexes --event-id <uuid> --check
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from event_server.urls import router
+from infrastructure.event_context import get_active_event
+from infrastructure.models import Event
+from infrastructure.utils.index_audit import CODE_SHAPES, audit, viewset_shapes
+
+
+class Command(BaseCommand):  # pragma: no cover
+    help = "EXPLAIN the event-scoped lookups of the API and suggest indexes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--event-id',
+            type=str,
+            help='Event UUID to audit. If not provided, uses active event.'
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Exit with an error when a lookup needs an index or constraint'
+        )
+
+    def handle(self, *args, **options):
+        if options['event_id']:
+            try:
+                event = Event.objects.get(id=options['event_id'])
+            except Event.DoesNotExist:
+                raise CommandError(f"Event {options['event_id']} not found")
+        else:
+            event = get_active_event()
+        if event is None:
+            raise CommandError("No event given and no active event")
+
+        findings = audit(viewset_shapes(router.registry) + CODE_SHAPES, event)
+        self.report(findings)
+        failing = [finding for finding in findings if not finding.ok]
+        self.suggest(failing)
+        if not failing:
+            self.stdout.write(self.style.SUCCESS("Every lookup uses an index"))
+        elif options['check']:
+            raise CommandError(f"{len(failing)} lookups need an index")
+
+    def report(self, findings):
+        rows = [('lookup', 'plan', 'index', 'source')] + [
+            (
+                finding.shape.label,
+                finding.verdict + ('*' if finding.placeholder else ''),
+                finding.detail,
+                finding.shape.source,
+            )
+            for finding in findings
+        ]
+        widths = [max(len(row[column]) for row in rows) + 2 for column in range(3)]
+        for row in rows:
+            self.stdout.write(''.join(
+                value.ljust(width) for value, width in zip(row, widths)
+            ) + row[3])
+        if any(finding.placeholder for finding in findings):
+            self.stdout.write("* no rows in the event, explained with a placeholder")
+
+    def suggest(self, failing):
+        for finding in failing:
+            problem = finding.verdict
+            if finding.shape.unique and not finding.constrained:
+                problem = "not unique"
+                if finding.duplicates:
+                    problem += f", {finding.duplicates} duplicated values"
+            suggestion = finding.shape.suggestion() or "check the joins"
+            self.stdout.write(f"{finding.shape.label} ({problem}): {suggestion}")
@@ -0,0 +1,254 @@
+"""
+Reproducible API benchmark at event-day scale.
+
+Seeds a separate (inactive) event with setup_test_data at realistic volumes,
+then requests the hot endpoints in process through the full middleware and
+view stack and records latency percentiles and queries per request. Results
+go to a JSON file; --compare fails when a run regressed against an earlier
+one, so CI can keep a baseline artifact around and check every build.
+
+RSVP creation is measured too. Keycloak account creation is an external call
+and is stubbed out. A run activates the benchmarked event (RSVPs always go to
+the active one) and rolls that back along with every request afterwards, so
+reruns against the same seeded event see the same data.
+
+Usage:
+    python manage.py benchmark_api --seed
+    python manage.py benchmark_api --event-id <event_id> --output run.json
+    python manage.py benchmark_api --event-id <event_id> --endpoint teams
+    python manage.py benchmark_api --event-id <event_id> --compare base.json
+    python manage.py benchmark_api --compare base.json --against run.json
+"""
+import itertools
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from infrastructure import event_context
+from infrastructure.event_context import get_active_event
+from infrastructure.history import skip_history
+from infrastructure.management.commands import setup_test_data
+from infrastructure.models import (Application, Attendee, Event, HardwareDevice,
+                                   MentorHelpRequest)
+from infrastructure.utils.benchmarks import (Endpoint, compare_runs, measure,
+                                             read_run, run_metadata, write_run)
+
+KEYCLOAK_MIDDLEWARE = 'infrastructure.middleware.KeycloakMiddleware'
+BENCHMARK_MIDDLEWARE = 'infrastructure.utils.benchmarks.BenchmarkAuthMiddleware'
+
+LIST_ENDPOINTS = (
+    'attendees', 'teams', 'hardware', 'tables', 'mentorhelprequests',
+    'applications',
+)
+
+
+def rsvp_payload(application):
+    return {
+        "application": str(application.id),
+        "dietary_restrictions": [],
+        "dietary_allergies": [],
+        "us_visa_support_is_required": False,
+        "under_18_by_date": False,
+        "personal_phone_number": "+19048800020",
+        "emergency_contact_name": "Benchmark Contact",
+        "emergency_contact_phone_number": "+14072394137",
+        "emergency_contact_email": "contact@example.com",
+        "emergency_contact_relationship": "Friend",
+    }
+
+
+class Command(BaseCommand):  # pragma: no cover
+    help = "Benchmark API latency and queries per request, optionally seeding data"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--event-id',
+            type=str,
+            help='Event UUID to benchmark. If not provided, uses active event.'
+        )
+        parser.add_argument(
+            '--seed', action='store_true',
+            help='Create and populate a new benchmark event first'
+        )
+        parser.add_argument('--attendees', type=int, default=1000)
+        parser.add_argument('--teams', type=int, default=200)
+        parser.add_argument('--tables', type=int, default=300)
+        parser.add_argument('--applications', type=int, default=2000)
+        parser.add_argument('--hardware-devices', type=int, default=500)
+        parser.add_argument('--mentor-help-requests', type=int, default=100)
+        parser.add_argument('--runs', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--endpoint', action='append',
+            choices=['me', *LIST_ENDPOINTS, 'rsvp_create'],
+            help='Only benchmark this endpoint; may be repeated'
+        )
+        parser.add_argument('--output', default='benchmark_api.json')
+        parser.add_argument(
+            '--compare', metavar='BASELINE',
+            help='Fail when this run regressed against the BASELINE run file'
+        )
+        parser.add_argument(
+            '--against', metavar='RUN',
+            help='With --compare: compare this run file instead of benchmarking'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.25,
+            help='Allowed p50/p95 slowdown as a fraction of the baseline'
+        )
+        parser.add_argument(
+            '--query-threshold', type=int, default=0,
+            help='Allowed extra queries per request over the baseline'
+        )
+
+    def handle(self, *args, **options):
+        if options['against']:
+            if not options['compare']:
+                raise CommandError("--against needs --compare")
+            self.compare(read_run(options['compare']), read_run(options['against']),
+                         options)
+            return
+
+        if options['seed']:
+            event = self.seed(options)
+        elif options['event_id']:
+            try:
+                event = Event.objects.get(id=options['event_id'])
+            except Event.DoesNotExist:
+                raise CommandError(f"Event {options['event_id']} not found")
+        else:
+            event = get_active_event()
+        if event is None:
+            raise CommandError("No event given and no active event")
+
+        endpoints = self.endpoints(event, options['runs'] + options['warmup'])
+        if options['endpoint']:
+            endpoints = [
+                endpoint for endpoint in endpoints
+                if endpoint.name in options['endpoint']
+            ]
+        results = self.run(event, endpoints, options['runs'], options['warmup'])
+        meta = run_metadata(
+            event=str(event.id), runs=options['runs'], warmup=options['warmup']
+        )
+        write_run(options['output'], meta, results)
+        self.report(results)
+        self.stdout.write(f"Wrote {options['output']}")
+        if options['compare']:
+            self.compare(
+                read_run(options['compare']),
+                {'meta': meta, 'endpoints': results},
+                options,
+            )
+
+    def seed(self, options):
+        now = timezone.now()
+        event = Event.objects.create(
+            name=f"Benchmark {now:%Y-%m-%d %H:%M}",
+            start_date=now,
+            end_date=now + timedelta(days=3),
+        )
+        self.stdout.write(f"Seeding {event.name} ({event.id})...")
+        event_context.set_current_event(event)
+        try:
+            # Seed data has no history worth keeping
+            with transaction.atomic(), skip_history(HardwareDevice, MentorHelpRequest):
+                setup_test_data.add_all(
+                    number_of_attendees=options['attendees'],
+                    number_of_teams=options['teams'],
+                    number_of_tables=options['tables'],
+                    number_of_applications=options['applications'],
+                    number_of_hardware_devices=options['hardware_devices'],
+                    number_of_mentor_help_requests=options['mentor_help_requests'],
+                    preferences_per_attendee=5,
+                )
+        finally:
+            event_context.clear_current_event()
+        return event
+
+    def endpoints(self, event, requests):
+        # me/ cycles through attendees on a team, so most requests miss the
+        # read model cache like they do at check-in
+        authentication_ids = itertools.cycle(list(
+            Attendee.objects.filter(
+                team_attendees__event=event, authentication_id__isnull=False
+            ).distinct().values_list('authentication_id', flat=True)[:requests]
+        ) or [None])
+        # Each RSVP needs an application nobody has RSVP'd with yet
+        applications = list(
+            Application.objects.for_event(event).filter(
+                attendee__isnull=True
+            )[:requests]
+        )
+
+        def me(run):
+            return '/me/', {'HTTP_AUTHORIZATION': next(authentication_ids)}
+
+        def rsvp(run):
+            if run >= len(applications):
+                raise CommandError(
+                    f"Only {len(applications)} applications left to RSVP with"
+                )
+            return '/rsvps/', {
+                'data': rsvp_payload(applications[run]),
+                'content_type': 'application/json',
+            }
+
+        endpoints = [Endpoint('me', 'GET', me)]
+        for name in LIST_ENDPOINTS:
+            endpoints.append(
+                Endpoint(name, 'GET', lambda run, path=f'/{name}/': (path, {}))
+            )
+        endpoints.append(Endpoint('rsvp_create', 'POST', rsvp, expected_status=201))
+        return endpoints
+
+    def run(self, event, endpoints, runs, warmup):
+        middleware = [
+            BENCHMARK_MIDDLEWARE if name == KEYCLOAK_MIDDLEWARE else name
+            for name in settings.MIDDLEWARE
+        ]
+        client = Client(HTTP_X_EVENT_ID=str(event.id))
+        results = {}
+        with override_settings(
+            MIDDLEWARE=middleware,
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+        ), mock.patch('infrastructure.views.handle_keycloak_account_creation'):
+            with transaction.atomic():
+                # RSVPs always go to the active event; rolled back with the rest
+                if not event.is_active:
+                    event.activate()
+                for endpoint in endpoints:
+                    self.stdout.write(f"{endpoint.name}...")
+                    results[endpoint.name] = measure(client, endpoint, runs, warmup)
+                transaction.set_rollback(True)
+        return results
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'endpoint':<20}{'p50':>10}{'p95':>10}{'p99':>10}"
+            f"{'queries':>9}{'errors':>8}"
+        )
+        for name, summary in results.items():
+            self.stdout.write(
+                f"{name:<20}{summary['p50']:>10.2f}{summary['p95']:>10.2f}"
+                f"{summary['p99']:>10.2f}{summary['queries']:>9}"
+                f"{summary['errors']:>8}"
+            )
+
+    def compare(self, baseline, current, options):
+        regressions = compare_runs(
+            baseline, current,
+            latency_threshold=options['threshold'],
+            query_threshold=options['query_threshold'],
+        )
+        if regressions:
+            raise CommandError(
+                "Regressions against the baseline:\n"
+                + "\n".join(f"  {regression}" for regression in regressions)
+            )
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
@@ -0,0 +1,146 @@
+"""
+Benchmark database connection handling the way Daphne serves requests.
+
+Every request runs in a new thread, as Daphne runs the synchronous part of
+each HTTP request, between the request_started and request_finished signals
+that open and close Django's connections. It makes the queries of a small
+read (the active event and a count of its attendees on teams). For each
+connection mode the command reports latency percentiles and how many
+connections to the database server each request opened:
+
+- per_request: CONN_MAX_AGE 0, a new connection every request
+- persistent: CONN_MAX_AGE 60, which cannot outlive a request's thread
+- pooled: infrastructure.db_pool (PostgreSQL only)
+
+--same-thread runs every request in the command's thread instead, as
+websocket consumers and WSGI workers do, where persistent connections are
+reused.
+
+Usage:
+    python manage.py benchmark_connections
+    python manage.py benchmark_connections --requests 500 --mode pooled
+    python manage.py benchmark_connections --same-thread --output conn.json
+"""
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from infrastructure.models import Attendee, Event
+from infrastructure.utils.benchmarks import percentile, run_metadata, write_run
+from infrastructure.utils.metrics import registry
+
+MODES = {
+    'per_request': {'CONN_MAX_AGE': 0},
+    'persistent': {'CONN_MAX_AGE': 60},
+    'pooled': {'ENGINE': 'infrastructure.db_pool', 'CONN_MAX_AGE': 0},
+}
+
+
+class Command(BaseCommand):  # pragma: no cover
+    help = "Benchmark connection setup per request for each connection mode"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument(
+            '--mode', action='append', choices=list(MODES),
+            help='Only benchmark this mode; may be repeated'
+        )
+        parser.add_argument(
+            '--same-thread', action='store_true',
+            help='Serve every request in one thread instead of one thread each'
+        )
+        parser.add_argument('--output', help='Write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        default = connections.settings['default']
+        modes = options['mode'] or list(MODES)
+        if connections['default'].vendor != 'postgresql':
+            if options['mode'] and 'pooled' in modes:
+                raise CommandError("The pooled mode needs PostgreSQL")
+            modes = [mode for mode in modes if mode != 'pooled']
+
+        self.created = Counter()
+        connection_created.connect(self.count_connection)
+        results = {}
+        try:
+            for mode in modes:
+                alias = f"benchmark_{mode}"
+                connections.settings[alias] = {**default, **MODES[mode]}
+                try:
+                    results[mode] = self.measure(
+                        alias, options['requests'], options['same_thread']
+                    )
+                finally:
+                    connections[alias].close()
+                    if mode == 'pooled':
+                        connections[alias].pool.close()
+        finally:
+            connection_created.disconnect(self.count_connection)
+
+        self.report(results)
+        if options['output']:
+            meta = run_metadata(
+                requests=options['requests'], same_thread=options['same_thread']
+            )
+            write_run(options['output'], meta, results)
+            self.stdout.write(f"Wrote {options['output']}")
+
+    def count_connection(self, sender, connection, **kwargs):
+        self.created[connection.alias] += 1
+
+    def opened(self, alias):
+        """Connections to the server so far: new ones, not pool checkouts"""
+        if connections[alias].settings_dict['ENGINE'] == 'infrastructure.db_pool':
+            labels = (('alias', alias),)
+            return registry.snapshot().get(
+                ('db_pool_connections_opened_total', labels), 0
+            )
+        return self.created[alias]
+
+    def measure(self, alias, requests, same_thread):
+        timings = []
+
+        def request():
+            request_started.send(sender=self.__class__)
+            start = time.perf_counter()
+            try:
+                event = Event.objects.using(alias).filter(is_active=True).first()
+                Attendee.objects.using(alias).filter(
+                    team_attendees__event=event
+                ).distinct().count()
+            finally:
+                timings.append(time.perf_counter() - start)
+                request_finished.send(sender=self.__class__)
+
+        opened = self.opened(alias)
+        for _ in range(requests):
+            if same_thread:
+                request()
+                continue
+            thread = threading.Thread(target=request)
+            thread.start()
+            thread.join()
+        milliseconds = [timing * 1000 for timing in timings]
+        return {
+            'p50': round(percentile(milliseconds, 50), 3),
+            'p95': round(percentile(milliseconds, 95), 3),
+            'connections_per_request': round(
+                (self.opened(alias) - opened) / requests, 3
+            ),
+            'requests': requests,
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'mode':<14}{'p50':>10}{'p95':>10}{'connections/request':>22}"
+        )
+        for mode, summary in results.items():
+            self.stdout.write(
+                f"{mode:<14}{summary['p50']:>10.2f}{summary['p95']:>10.2f}"
+                f"{summary['connections_per_request']:>22.3f}"
+            )
@@ -0,0 +1,74 @@
+"""
+Import-time benchmark for a cold start of the Django app.
+
+Every run is a fresh interpreter (python -X importtime) that sets Django up
+and imports the given modules, which is what manage.py commands and Daphne
+workers pay on start. Reports the median wall time and the modules with the
+largest cumulative import time.
+
+Usage:
+    python manage.py benchmark_imports
+    python manage.py benchmark_imports --runs 10 --top 15
+    python manage.py benchmark_imports --module infrastructure.views
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand
+
+from infrastructure.utils.startup import parse_importtime
+
+DEFAULT_MODULES = ['infrastructure.models', 'infrastructure.serializers']
+
+SCRIPT = """
+import time
+start = time.perf_counter()
+import django
+django.setup()
+{imports}
+print(time.perf_counter() - start)
+"""
+
+
+class Command(BaseCommand):  # pragma: no cover
+    help = "Measure cold-start import time of the app in fresh interpreters"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument(
+            '--module',
+            action='append',
+            dest='modules',
+            help='Module imported after django.setup(); repeatable'
+        )
+
+    def handle(self, *args, **options):
+        modules = options['modules'] or DEFAULT_MODULES
+        script = SCRIPT.format(
+            imports="\n".join(f"import {module}" for module in modules)
+        )
+        env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+
+        timings = []
+        slowest = {}
+        for _ in range(options['runs']):
+            result = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", script],
+                capture_output=True, text=True, env=env, check=True,
+            )
+            timings.append(float(result.stdout.strip().splitlines()[-1]))
+            for cumulative, module in parse_importtime(result.stderr):
+                slowest[module] = min(cumulative, slowest.get(module, cumulative))
+
+        self.stdout.write(
+            f"django.setup() + {', '.join(modules)}: "
+            f"median {statistics.median(timings) * 1000:.1f} ms, "
+            f"min {min(timings) * 1000:.1f} ms over {len(timings)} runs"
+        )
+        self.stdout.write("Largest cumulative imports (best run, ms):")
+        top = sorted(slowest.items(), key=lambda item: item[1], reverse=True)
+        for module, cumulative in top[:options['top']]:
+            self.stdout.write(f"  {cumulative / 1000:8.1f}  {module}")
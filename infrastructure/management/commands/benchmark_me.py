@@ -0,0 +1,84 @@
+"""
+Regression benchmark for the me/ read model.
+
+Builds the AttendeeDetailSerializer payload for attendees of the event, cold
+(cache cleared) and warm, and reports queries and latency per call. Pass
+--max-queries to fail when a cold build needs more queries than that, e.g.
+in CI after seeding with setup_test_data.
+
+Usage:
+    python manage.py benchmark_me
+    python manage.py benchmark_me --attendees 100 --max-queries 10
+    python manage.py benchmark_me --event-id <event_id>
+"""
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from infrastructure.event_context import get_active_event
+from infrastructure.models import Attendee, Event
+from infrastructure.utils.attendee_detail import (attendee_detail_cache_key,
+                                                  attendee_detail_data)
+
+
+class Command(BaseCommand):  # pragma: no cover
+    help = "Measure queries and latency of building the me/ payload"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--event-id',
+            type=str,
+            help='Event UUID to benchmark. If not provided, uses active event.'
+        )
+        parser.add_argument('--attendees', type=int, default=50)
+        parser.add_argument('--max-queries', type=int)
+
+    def handle(self, *args, **options):
+        if options['event_id']:
+            try:
+                event = Event.objects.get(id=options['event_id'])
+            except Event.DoesNotExist:
+                raise CommandError(f"Event {options['event_id']} not found")
+        else:
+            event = get_active_event()
+        if event is None:
+            raise CommandError("No event given and no active event")
+        attendees = list(
+            Attendee.objects.filter(team_attendees__event=event).distinct()[
+                :options['attendees']
+            ]
+        )
+        if not attendees:
+            raise CommandError(f"No attendees on a team in {event.name}")
+
+        cold = self.measure(attendees, event, clear=True)
+        warm = self.measure(attendees, event, clear=False)
+        for label, (queries, timings) in (('cold', cold), ('warm', warm)):
+            self.stdout.write(
+                f"{label}: {max(queries)} queries max, "
+                f"{statistics.mean(queries):.1f} mean; "
+                f"{statistics.median(timings) * 1000:.2f} ms median, "
+                f"{max(timings) * 1000:.2f} ms max "
+                f"over {len(attendees)} attendees"
+            )
+        if options['max_queries'] is not None and max(cold[0]) > options['max_queries']:
+            raise CommandError(
+                f"me/ payload took {max(cold[0])} queries, "
+                f"budget is {options['max_queries']}"
+            )
+
+    def measure(self, attendees, event, clear):
+        queries, timings = [], []
+        for attendee in attendees:
+            if clear:
+                cache.delete(attendee_detail_cache_key(attendee.pk, event.pk))
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                attendee_detail_data(attendee, event)
+                timings.append(time.perf_counter() - start)
+            queries.append(len(captured))
+        return queries, timings
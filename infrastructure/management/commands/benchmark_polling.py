@@ -0,0 +1,151 @@
+"""
+Benchmark one worker under concurrent polling: the DRF list routes the
+frontend polls against their async versions (infrastructure.async_views).
+
+Requests go through Django's ASGI request handling in process, each in its
+own ThreadSensitiveContext as Daphne serves them: synchronous views and
+middleware run in a worker thread, async views in the event loop.
+--clients pollers request a route concurrently, --polls times each. For
+every route the command reports requests per second and latency
+percentiles of:
+
+- sync: the DRF viewset, e.g. /lighthouses/
+- async: /async/lighthouses/, answered from the poll cache between changes
+- async_uncached: the same with POLL_CACHE_SECONDS=0, so every request
+  reads the database through the async ORM
+
+Keycloak is replaced by BenchmarkAuthMiddleware, as in benchmark_api. The
+polled viewsets read the active event, so the benchmarked event is
+activated for the run and the previously active event afterwards.
+
+Usage:
+    python manage.py benchmark_polling
+    python manage.py benchmark_polling --event-id <uuid> --clients 200
+    python manage.py benchmark_polling --route lighthouses --output polling.json
+"""
+import asyncio
+import time
+
+from asgiref.sync import ThreadSensitiveContext, async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, override_settings
+
+from infrastructure.event_context import get_active_event
+from infrastructure.management.commands.benchmark_api import (
+    BENCHMARK_MIDDLEWARE, KEYCLOAK_MIDDLEWARE)
+from infrastructure.models import Event
+from infrastructure.utils.benchmarks import percentile, run_metadata, write_run
+
+ROUTES = ('mentorhelprequests', 'lighthouses', 'hardwarerequests')
+
+# Variant -> (path, settings)
+VARIANTS = {
+    'sync': ('/{route}/', {}),
+    'async': ('/async/{route}/', {}),
+    'async_uncached': ('/async/{route}/', {'POLL_CACHE_SECONDS': 0}),
+}
+
+
+class Command(BaseCommand):  # pragma: no cover
+    help = "Benchmark polling throughput of the sync and async list routes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--event-id',
+            type=str,
+            help='Event UUID to benchmark. If not provided, uses active event.'
+        )
+        parser.add_argument('--clients', type=int, default=50)
+        parser.add_argument('--polls', type=int, default=20)
+        parser.add_argument(
+            '--route', action='append', choices=ROUTES,
+            help='Only benchmark this route; may be repeated'
+        )
+        parser.add_argument('--output', help='Write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        if options['event_id']:
+            try:
+                event = Event.objects.get(id=options['event_id'])
+            except Event.DoesNotExist:
+                raise CommandError(f"Event {options['event_id']} not found")
+        else:
+            event = get_active_event()
+        if event is None:
+            raise CommandError("No event given and no active event")
+
+        middleware = [
+            BENCHMARK_MIDDLEWARE if name == KEYCLOAK_MIDDLEWARE else name
+            for name in settings.MIDDLEWARE
+        ]
+        previous = Event.get_active()
+        event.activate()
+        results = {}
+        try:
+            for route in options['route'] or ROUTES:
+                for variant, (path, overrides) in VARIANTS.items():
+                    name = f"{route}/{variant}"
+                    self.stdout.write(f"{name}...")
+                    with override_settings(MIDDLEWARE=middleware, **overrides):
+                        results[name] = async_to_sync(self.poll)(
+                            path.format(route=route), event,
+                            options['clients'], options['polls'],
+                        )
+        finally:
+            if previous is not None:
+                previous.activate()
+            else:
+                Event.objects.filter(pk=event.pk).update(is_active=False)
+
+        self.report(results)
+        if options['output']:
+            meta = run_metadata(
+                event=str(event.id), clients=options['clients'],
+                polls=options['polls'],
+            )
+            write_run(options['output'], meta, results)
+            self.stdout.write(f"Wrote {options['output']}")
+
+    async def poll(self, path, event, clients, polls):
+        client = AsyncClient(HTTP_X_EVENT_ID=str(event.id))
+        timings = []
+        errors = 0
+
+        async def request():
+            # A context per request, as Daphne's handler makes
+            async with ThreadSensitiveContext():
+                return await client.get(path)
+
+        async def poller():
+            nonlocal errors
+            for _ in range(polls):
+                start = time.perf_counter()
+                response = await request()
+                timings.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        await request()
+        start = time.perf_counter()
+        await asyncio.gather(*(poller() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+        milliseconds = [timing * 1000 for timing in timings]
+        return {
+            'requests_per_second': round(len(timings) / elapsed, 1),
+            'p50': round(percentile(milliseconds, 50), 3),
+            'p95': round(percentile(milliseconds, 95), 3),
+            'requests': len(timings),
+            'errors': errors,
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'route':<36}{'req/s':>10}{'p50':>10}{'p95':>10}{'errors':>8}"
+        )
+        for name, summary in results.items():
+            self.stdout.write(
+                f"{name:<36}{summary['requests_per_second']:>10.1f}"
+                f"{summary['p50']:>10.2f}{summary['p95']:>10.2f}"
+                f"{summary['errors']:>8}"
+            )
@@ -0,0 +1,76 @@
+"""
+Microbenchmark for the per-instance overhead of EventScopedSerializer.
+
+Serializes unsaved in-memory instances, the way a list endpoint would, and
+compares the current lazy field scoping against eagerly re-scoping every
+related field on each instantiation (the previous behaviour).
+
+Usage:
+    python manage.py benchmark_serializers
+    python manage.py benchmark_serializers --instances 500 --repeat 5
+"""
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from infrastructure import event_context, serializers
+from infrastructure.models import (Application, Attendee, Event, HardwareRequest,
+                                   MentorHelpRequest, Team)
+
+BENCHMARKED = [
+    (serializers.ApplicationSerializer, Application),
+    (serializers.AttendeeRSVPCreateSerializer, Attendee),
+    (serializers.TeamSerializer, Team),
+    (serializers.MentorHelpRequestSerializer, MentorHelpRequest),
+    (serializers.HardwareRequestCreateSerializer, HardwareRequest),
+]
+
+
+def eager_scope(serializer, event):
+    """The old __init__ behaviour: walk every field and clone its queryset."""
+    for field in serializer.fields.values():
+        if serializers.is_event_scoped_relation(field):
+            relation = getattr(field, 'child_relation', field)
+            relation.queryset = relation.queryset.for_event(event)
+
+
+class Command(BaseCommand):  # pragma: no cover
+    help = "Measure per-instance EventScopedSerializer overhead for list endpoints"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--instances', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=7)
+
+    def handle(self, *args, **options):
+        # Unsaved instances without a pk keep the database out of the numbers
+        event = Event(name="benchmark")
+        event_context.set_current_event(event)
+        count = options['instances']
+        try:
+            for serializer_class, model in BENCHMARKED:
+                kwargs = {'event': event} if hasattr(model, 'event') else {}
+                instances = [model(pk=None, **kwargs) for _ in range(count)]
+
+                def lazy():
+                    for instance in instances:
+                        serializer_class(instance).data
+
+                def eager():
+                    for instance in instances:
+                        serializer = serializer_class(instance)
+                        eager_scope(serializer, event)
+                        serializer.data
+
+                lazy_us = self.per_instance_us(lazy, options['repeat'], count)
+                eager_us = self.per_instance_us(eager, options['repeat'], count)
+                self.stdout.write(
+                    f"{serializer_class.__name__:40} "
+                    f"lazy {lazy_us:8.1f} us/instance  "
+                    f"eager {eager_us:8.1f} us/instance  "
+                    f"saved {eager_us - lazy_us:7.1f} us"
+                )
+        finally:
+            event_context.clear_current_event()
+
+    def per_instance_us(self, func, repeat, count):
+        return min(timeit.repeat(func, number=1, repeat=repeat)) / count * 1e6
@@ -0,0 +1,116 @@
+"""
+Collapse no-op rows of the HardwareDevice and MentorHelpRequest history.
+
+Every save adds a historical row, also when nothing but ``updated_at``
+changed. An update row that tracks the same values as the row before it for
+the same object is dropped; creations, deletions and real changes stay.
+--older-than-days keeps recent history as it is.
+
+Usage:
+    python manage.py compact_history --dry-run
+    python manage.py compact_history --older-than-days 30
+    python manage.py compact_history --model hardwaredevice --event-id <uuid>
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from infrastructure.event_context import get_active_event
+from infrastructure.models import Event, HardwareDevice, MentorHelpRequest
+
+MODELS = {
+    'hardwaredevice': HardwareDevice,
+    'mentorhelprequest': MentorHelpRequest,
+}
+
+# Bookkeeping that changes on every save, not part of the record
+IGNORED_FIELDS = {
+    'history_id', 'history_date', 'history_change_reason', 'history_type',
+    'history_user', 'updated_at',
+}
+
+BATCH_SIZE = 1000
+
+
+def tracked_fields(history_model):
+    return [
+        field.attname for field in history_model._meta.concrete_fields
+        if field.name not in IGNORED_FIELDS and field.name != 'id'
+    ]
+
+
+def redundant_history_ids(history, tracked):
+    """
+    history_ids of update rows in ``history`` tracking the same ``tracked``
+    values as the previous row of the same object.
+    """
+    previous_id, previous_values = None, None
+    rows = history.order_by('id', 'history_date', 'history_id').values_list(
+        'history_id', 'history_type', 'id', *tracked
+    )
+    for history_id, history_type, object_id, *values in rows.iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        if (
+            history_type == '~'
+            and object_id == previous_id
+            and values == previous_values
+        ):
+            yield history_id
+            continue
+        previous_id, previous_values = object_id, values
+
+
+class Command(BaseCommand):  # pragma: no cover
+    help = "Delete historical rows that record no change"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--event-id',
+            type=str,
+            help='Event UUID to compact. If not provided, uses active event.'
+        )
+        parser.add_argument(
+            '--model', action='append', choices=list(MODELS),
+            help='Only compact the history of this model; may be repeated'
+        )
+        parser.add_argument(
+            '--older-than-days', type=int, default=0,
+            help='Only compact rows older than this many days'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Count the rows that would be deleted without deleting them'
+        )
+
+    def handle(self, *args, **options):
+        if options['event_id']:
+            try:
+                event = Event.objects.get(id=options['event_id'])
+            except Event.DoesNotExist:
+                raise CommandError(f"Event {options['event_id']} not found")
+        else:
+            event = get_active_event()
+        if event is None:
+            raise CommandError("No event given and no active event")
+
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        for name in options['model'] or MODELS:
+            history_model = MODELS[name].history.model
+            history = history_model.objects.filter(
+                event_id=event.id, history_date__lt=cutoff
+            )
+            total = history.count()
+            redundant = list(
+                redundant_history_ids(history, tracked_fields(history_model))
+            )
+            if not options['dry_run']:
+                for start in range(0, len(redundant), BATCH_SIZE):
+                    history_model.objects.filter(
+                        history_id__in=redundant[start:start + BATCH_SIZE]
+                    ).delete()
+            verb = "Would delete" if options['dry_run'] else "Deleted"
+            self.stdout.write(
+                f"{verb} {len(redundant)} of {total} {name} history rows"
+            )
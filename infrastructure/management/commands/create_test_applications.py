@@ -14,20 +14,19 @@ emails_to_test = [
     # "attendee@test.com",
 ]
 
-event = event_context.get_active_event()
-print(f"Event: {event.name}")
-print(f"Event ID: {event.id}")
-frontend_domain = os.environ["FRONTEND_DOMAIN"]
-
 
 def get_rsvp_request_uri(application_id: str) -> str:
-    return f"{frontend_domain}/rsvp/{application_id}"
+    return f"{os.environ['FRONTEND_DOMAIN']}/rsvp/{application_id}"
 
 
 class Command(BaseCommand):
     help = "Create test applications for the given emails"
 
     def handle(self, *args, **options):
+        event = event_context.get_active_event()
+        print(f"Event: {event.name}")
+        print(f"Event ID: {event.id}")
+
         # first ensure we have existing attendees for the given emails
         for email in emails_to_test:
             if not (existing_attendee := Attendee.objects.filter(email=email).first()):
@@ -1,88 +1,47 @@
-from typing import List
-from django.core.management.base import BaseCommand
+import os
 
-from dataclasses import dataclass
+from django.core.management.base import BaseCommand, CommandError
 
-from infrastructure.models import Attendee, DestinyHardware, Project, Location, Track
+from infrastructure.db_router import replica_reads
+from infrastructure.event_context import get_active_event
+from infrastructure.models import Event
+from infrastructure.utils.gavel import gavel_projects, iter_gavel_csv, split_projects
 
 
 class Command(BaseCommand):  # pragma: no cover
-    help = "Export projects.csv and judges.csv for importing into Gavel"
-
-    def handle(self, *args, **kwargs):  # noqa: C901        
-        all_projects = Project.objects.all()
-
-        projects_to_be_judged_entries = []
-        projects_excluded_entries = []
-        
-        for project in all_projects:
-            line = to_csv_line(project)
-            if is_community_hack(project):
-                projects_excluded_entries.append(line)
-            else:
-                projects_to_be_judged_entries.append(line)
-        
-        with open("projects.csv", "w") as f:
-            f.write("\n".join(projects_to_be_judged_entries))
-        with open("projects_excluded.csv", "w") as f:
-            f.write("\n".join(projects_excluded_entries))
-
-
-def is_community_hack(project):
-    for track in project.team.tracks:
-        if track == Track.COMMUNITY_HACKS:
-            return True
-    return False
-
-def to_csv_line(project):
-    team = project.team
-
-    table = team.table
-    location= table.location
-
-    uuid = ""
-    name = project.name
-    zone = location.building
-    location = f"Table {table.number}" if zone == Location.Building.WALKER else f"{location.room}, Table {table.number}"
-    tags = " ".join(get_tags(project))
-    link = team.devpost_url
-    description = "By {team.name}" # Not including user-submitted project description here
-
-    # Gavel format: UUID (optional), name, zone, location, tags (space-delimited), link, description
-    return f'"{uuid}","{name}","{zone}","{location}","{tags}","{link}","{description}"'
-
-
-map_destiny_hardware_tag={
-    DestinyHardware.META: "Meta",
-    DestinyHardware.HORIZON:"Horizon",
-    DestinyHardware.SNAP:"Snap",
-    DestinyHardware.STYLY:"STYLY",
-    DestinyHardware.SHAPESXR:"ShapesXR",
-    DestinyHardware.HAPTICS:"INVALID:Haptics", #!!!
-    DestinyHardware.LAMBDA:"INVALID:Lambda", #!!!
-    DestinyHardware.APPLE_VISION:"VisionPro", #TODO!
-    DestinyHardware.NEUROADAPTIVE: "OpenBCI",
-    DestinyHardware.QUALCOMM:"Qualcomm", #TODO!
-}
-
-map_track_tag={
-    Track.COMMUNITY_HACKS: "EXCLUDE:Topic:Community",
-    Track.SOCIAL_XR: "Topic:Social_XR",
-    Track.AUGMENTED_ENGINEERING: "Topic:AugmentedEng",
-    Track.SUSTAINABILITY: "Topic:Sustainability",
-    Track.AEROSPATIAL_EXPLORATION: "Topic:Aerospace",
-    Track.AUGMENTED_INTELLIGENCE: "Topic:AI",
-    Track.HEALTHCARE: "INVALID:Healthcare", #!!!
-}
-
-def get_tags(project):
-    team = project.team
-    tags = []
-    for destiny_hardware in team.destiny_hardware:
-        tags.append(map_destiny_hardware_tag[destiny_hardware])
-    for track in team.tracks:
-        tags.append(map_track_tag[track])
-    if team.hardware_hack:
-        tags.append("HardwareHack")
-    
-    return tags
\ No newline at end of file
+    help = "Export projects.csv and projects_excluded.csv for importing into Gavel"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--event-id',
+            type=str,
+            help='Event UUID to export. If not provided, uses active event.'
+        )
+        parser.add_argument(
+            '--output-dir',
+            type=str,
+            default='.',
+            help='Directory the csv files are written to'
+        )
+
+    def handle(self, *args, **options):
+        if options['event_id']:
+            try:
+                event = Event.objects.get(id=options['event_id'])
+            except Event.DoesNotExist:
+                raise CommandError(f"Event {options['event_id']} not found")
+        else:
+            event = get_active_event()
+        if event is None:
+            raise CommandError("No event given and no active event")
+
+        # An export may lag the primary a little; keep it off the primary
+        with replica_reads():
+            judged, excluded = split_projects(gavel_projects(event))
+        for filename, projects in (
+            ("projects.csv", judged), ("projects_excluded.csv", excluded)
+        ):
+            path = os.path.join(options['output_dir'], filename)
+            with open(path, "w", newline="") as f:
+                f.writelines(iter_gavel_csv(projects))
+            self.stdout.write(f"Wrote {len(projects)} projects to {path}")
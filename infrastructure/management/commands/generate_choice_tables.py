@@ -0,0 +1,35 @@
+"""
+Regenerate the country and language choice tables read by infrastructure.choices.
+
+Run after upgrading pycountry or language_tags, then make migrations so any
+renamed country ends up in the model field choices.
+
+Usage:
+    python manage.py generate_choice_tables
+"""
+import json
+
+import language_tags
+import pycountry
+from django.core.management.base import BaseCommand
+
+from infrastructure.choices import COUNTRIES_FILE, LANGUAGES_FILE
+
+
+class Command(BaseCommand):  # pragma: no cover
+    help = "Write countries.json and languages.json from pycountry and language_tags"
+
+    def handle(self, *args, **options):
+        tables = {
+            COUNTRIES_FILE: [(x.alpha_2, x.name) for x in pycountry.countries],
+            LANGUAGES_FILE: [
+                (x["Subtag"], ", ".join(x["Description"]))
+                for x in language_tags.data.cache['registry']
+                if x["Type"] == "language" and x.get("Scope") != "special"
+            ],
+        }
+        for path, pairs in tables.items():
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(pairs, f, ensure_ascii=False, separators=(",", ":"))
+                f.write("\n")
+            self.stdout.write(f"Wrote {len(pairs)} choices to {path.name}")
@@ -1,20 +1,110 @@
-from django.core.management.base import BaseCommand
+"""
+Relabel HardwareDevice serials as ``<key>-1`` .. ``<key>-n`` per hardware type.
+
+Usage:
+    python manage.py map_hardware_device_labels <hardware_id> <key>
+    python manage.py map_hardware_device_labels <id1> <key1> <id2> <key2> ...
+    python manage.py map_hardware_device_labels <hardware_id> <key> --event-id <uuid>
+    python manage.py map_hardware_device_labels <hardware_id> <key> --skip-history
+"""
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from simple_history.utils import bulk_update_with_history
+
+from infrastructure.event_context import get_active_event
+from infrastructure.models import Event, Hardware, HardwareDevice
+
+BATCH_SIZE = 500
+
+
+def keys_by_hardware_id(mappings):
+    """Serial prefix by hardware id, the ids spelled as ``str(Hardware.id)``"""
+    if len(mappings) % 2:
+        raise CommandError("Expected <hardware_id> <key> pairs")
+    keys = {}
+    for hardware_id, key in zip(mappings[::2], mappings[1::2]):
+        try:
+            keys[str(uuid.UUID(hardware_id))] = key
+        except ValueError:
+            raise CommandError(f"Invalid hardware id: {hardware_id}")
+    return keys
 
-from infrastructure.models import Hardware, HardwareDevice
 
 class Command(BaseCommand):  # pragma: no cover
-    help = "Given a hardware ID, generate the HardwareDevice Serial using a string key and sequential numbering from 1 to n (where n is the number of devices for that hardware)"
-    
+    help = (
+        "Given one or more hardware ID and key pairs, generate the HardwareDevice "
+        "Serial using the key and sequential numbering from 1 to n (where n is "
+        "the number of devices for that hardware)"
+    )
+
     def add_arguments(self, parser):
-        parser.add_argument('hardware_id', type=str, help='The ID of the hardware to generate a serial for')
-        parser.add_argument('key', type=str, help='The key to use for the serial')
-   
-    def handle(self, *args, **kwargs):
-        hardware_id = kwargs['hardware_id']
-        key = kwargs['key']
-        hardware = Hardware.objects.get(id=hardware_id)
-        devices = HardwareDevice.objects.filter(hardware=hardware)
-        for i, device in enumerate(devices):
-            device.serial = f"{key}-{i+1}"
-            device.save()
-        print(f"Updated {len(devices)} devices for {hardware.name}")
+        parser.add_argument(
+            'mappings',
+            nargs='+',
+            type=str,
+            help='Pairs of <hardware_id> <key>; the key is the serial prefix'
+        )
+        parser.add_argument(
+            '--event-id',
+            type=str,
+            help='Event UUID the devices belong to. If not provided, uses active event.'
+        )
+        parser.add_argument(
+            '--skip-history', action='store_true',
+            help='Relabel without adding a historical record per device'
+        )
+
+    def handle(self, *args, **options):
+        keys_by_hardware = keys_by_hardware_id(options['mappings'])
+
+        if options['event_id']:
+            try:
+                event = Event.objects.get(id=options['event_id'])
+            except (Event.DoesNotExist, ValidationError):
+                raise CommandError(f"Event {options['event_id']} not found")
+        else:
+            event = get_active_event()
+        if event is None:
+            raise CommandError("No event given and no active event")
+
+        hardware = self.get_hardware(event, keys_by_hardware.keys())
+        devices = list(
+            HardwareDevice.objects.for_event(event)
+            .filter(hardware__in=hardware.keys())
+            .order_by('hardware', 'created_at', 'id')
+        )
+        counts = {}
+        for device in devices:
+            hardware_id = str(device.hardware_id)
+            counts[hardware_id] = counts.get(hardware_id, 0) + 1
+            device.serial = f"{keys_by_hardware[hardware_id]}-{counts[hardware_id]}"
+
+        with transaction.atomic():
+            if options['skip_history']:
+                HardwareDevice.objects.for_event(event).bulk_update(
+                    devices, ['serial'], batch_size=BATCH_SIZE
+                )
+            else:
+                bulk_update_with_history(
+                    devices, HardwareDevice, ['serial'], batch_size=BATCH_SIZE,
+                    default_change_reason='map_hardware_device_labels'
+                )
+
+        for hardware_id, h in hardware.items():
+            self.stdout.write(
+                f"Updated {counts.get(hardware_id, 0)} devices for {h.name}")
+
+    def get_hardware(self, event, hardware_ids):
+        """The event's hardware by id, or a CommandError naming missing ids"""
+        hardware = {
+            str(h.id): h for h in Hardware.objects.for_event(event).filter(
+                id__in=hardware_ids)
+        }
+        missing = set(hardware_ids) - set(hardware)
+        if missing:
+            raise CommandError(
+                f"Hardware not found for {event.name}: {', '.join(sorted(missing))}")
+        return hardware
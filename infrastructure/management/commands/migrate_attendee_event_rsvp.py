@@ -1,85 +1,166 @@
-from django.core.management.base import BaseCommand
+"""
+Backfill EventRsvp rows for an event from the per-attendee fields on Attendee.
+
+Every concrete field EventRsvp shares with Attendee is copied over, so new
+fields are picked up without touching this command. Re-running is safe:
+attendees that already have an RSVP for the event are skipped. A batch
+that fails is retried one attendee at a time and the attendees that still
+fail are logged.
+
+Usage:
+    python manage.py migrate_attendee_event_rsvp
+    python manage.py migrate_attendee_event_rsvp --event-id <uuid>
+    python manage.py migrate_attendee_event_rsvp --event-id <uuid> --exclude application
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, transaction
+from django.db.models import Prefetch
+from infrastructure.event_context import get_active_event
 from infrastructure.models import Attendee, EventRsvp, Event
 import logging
 
 
 logger = logging.getLogger(__name__)
 
+# Attendee field name -> EventRsvp field name, where they differ
+RENAMED_FIELDS = {
+    'communications_platform_username': 'communication_platform_username',
+}
+SKIPPED_FIELDS = {'id', 'event', 'attendee', 'created_at', 'updated_at'}
+
+
+def batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def copied_fields(exclude=()):
+    """(attendee attname, rsvp attname) pairs copied into each EventRsvp."""
+    rsvp_fields = {
+        field.name: field.attname for field in EventRsvp._meta.concrete_fields
+        if field.name not in SKIPPED_FIELDS and field.name not in exclude
+    }
+    pairs = []
+    for field in Attendee._meta.concrete_fields:
+        rsvp_name = RENAMED_FIELDS.get(field.name, field.name)
+        if rsvp_name in rsvp_fields:
+            pairs.append((field.attname, rsvp_fields[rsvp_name]))
+    return pairs
+
 
-class Command(BaseCommand):
+class Command(BaseCommand):  # pragma: no cover
     help = "Migrate attendee event rsvp data to EventRsvp model"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--event-id',
+            type=str,
+            help='Event UUID the RSVPs are created for. If not provided, uses '
+                 'active event.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of RSVPs inserted per query'
+        )
+        parser.add_argument(
+            '--exclude',
+            nargs='*',
+            default=[],
+            help='EventRsvp fields not to copy from the attendee (e.g. application)'
+        )
+
+    def get_event(self, event_id):
+        if event_id:
+            try:
+                return Event.objects.get(id=event_id)
+            except Event.DoesNotExist:
+                raise CommandError(f"Event {event_id} not found")
+        event = get_active_event()
+        if event is None:
+            raise CommandError("No event given and no active event")
+        return event
+
     def handle(self, *args, **options):
-        attendees = Attendee.objects.all()
-        event_2025 = Event.objects.get(name="Reality Hack at MIT 2025")
+        event = self.get_event(options['event_id'])
+        batch_size = options['batch_size']
+        fields = copied_fields(options['exclude'])
+        attendees = (
+            Attendee.objects.order_by('pk')
+            .only(*[attendee_attname for attendee_attname, _ in fields])
+            .prefetch_related(
+                Prefetch('guardian_of', queryset=Attendee.objects.only('pk'))
+            )
+            .iterator(chunk_size=batch_size)
+        )
 
-        for attendee in attendees:
+        created = skipped = failed = 0
+        for batch in batches(attendees, batch_size):
             try:
-                discord_username = attendee.communications_platform_username
-                visa_required = attendee.us_visa_letter_of_invitation_required
-                visa_document_number = attendee.us_visa_support_document_number
-                project_to_product = attendee.reality_hack_project_to_product
-                id_type = attendee.us_visa_support_national_identification_document_type
-                rules_cc = attendee.agree_to_rules_code_of_conduct
-                emergency_phone = attendee.emergency_contact_phone_number
-                emergency_rel = attendee.emergency_contact_relationship
-
-                guardian_of = attendee.guardian_of
-                sponsor_handler = attendee.sponsor_handler
-
-                event_rsvp = EventRsvp.objects.create(
-                    attendee=attendee,
-                    event=event_2025,
-                    status=attendee.status,
-                    participation_class=attendee.participation_class,
-                    sponsor_handler=sponsor_handler,
-                    communications_platform_username=discord_username,
-                    application=attendee.application,
-                    participation_role=attendee.participation_role,
-                    shirt_size=attendee.shirt_size,
-                    intended_tracks=attendee.intended_tracks,
-                    intended_hardware_hack=attendee.intended_hardware_hack,
-                    prefers_destiny_hardware=attendee.prefers_destiny_hardware,
-                    dietary_restrictions=attendee.dietary_restrictions,
-                    dietary_restrictions_other=attendee.dietary_restrictions_other,
-                    dietary_allergies=attendee.dietary_allergies,
-                    dietary_allergies_other=attendee.dietary_allergies_other,
-                    additional_accommodations=attendee.additional_accommodations,
-                    us_visa_support_is_required=attendee.us_visa_support_is_required,
-                    us_visa_letter_of_invitation_required=visa_required,
-                    us_visa_support_full_name=attendee.us_visa_support_full_name,
-                    us_visa_support_document_number=visa_document_number,
-                    us_visa_support_national_identification_document_type=id_type,
-                    us_visa_support_citizenship=attendee.us_visa_support_citizenship,
-                    us_visa_support_address=attendee.us_visa_support_address,
-                    under_18_by_date=attendee.under_18_by_date,
-                    parental_consent_form_signed=attendee.parental_consent_form_signed,
-                    agree_to_media_release=attendee.agree_to_media_release,
-                    agree_to_liability_release=attendee.agree_to_liability_release,
-                    agree_to_rules_code_of_conduct=rules_cc,
-                    emergency_contact_name=attendee.emergency_contact_name,
-                    personal_phone_number=attendee.personal_phone_number,
-                    emergency_contact_phone_number=emergency_phone,
-                    emergency_contact_email=attendee.emergency_contact_email,
-                    emergency_contact_relationship=emergency_rel,
-                    app_in_store=attendee.app_in_store,
-                    currently_build_for_xr=attendee.currently_build_for_xr,
-                    currently_use_xr=attendee.currently_use_xr,
-                    non_xr_talents=attendee.non_xr_talents,
-                    ar_vr_ap_in_store=attendee.ar_vr_ap_in_store,
-                    reality_hack_project_to_product=project_to_product,
-                    sponsor_company=attendee.sponsor_company,
-                    breakthrough_hacks_interest=attendee.breakthrough_hacks_interest,
-                    loaner_headset_preference=attendee.loaner_headset_preference,
-                )
-
-                if guardian_of:
-                    event_rsvp.guardian_of.set(guardian_of.all())
-
-                event_rsvp.save()
-                logger.info(f"Migrated attendee {attendee.email} event rsvp data")
-            except Exception as e:
-                logger.error(
-                    f"Error migrating attendee {attendee.email}: {e}"
-                )
-                continue
+                batch_created = self.migrate_batch(event, batch, fields)
+            except DatabaseError:
+                # Retry the batch one attendee at a time, so one bad row does
+                # not hold back the others
+                batch_created = 0
+                for attendee in batch:
+                    try:
+                        batch_created += self.migrate_batch(event, [attendee], fields)
+                    except DatabaseError as e:
+                        failed += 1
+                        logger.error(
+                            f"Error migrating attendee {attendee.pk} event rsvp "
+                            f"data: {e}"
+                        )
+            created += batch_created
+            skipped += len(batch) - batch_created
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created} event RSVPs for {event.name}, "
+            f"skipped {skipped - failed} attendees that already had one"
+        ))
+        if failed:
+            self.stdout.write(self.style.ERROR(
+                f"Failed to migrate {failed} attendees, see the log"
+            ))
+
+    @transaction.atomic
+    def migrate_batch(self, event, attendees, fields):
+        rsvps = [
+            EventRsvp(
+                event=event,
+                attendee_id=attendee.pk,
+                **{
+                    rsvp_attname: getattr(attendee, attendee_attname)
+                    for attendee_attname, rsvp_attname in fields
+                },
+            )
+            for attendee in attendees
+        ]
+        EventRsvp.objects.bulk_create(rsvps, ignore_conflicts=True)
+
+        # ignore_conflicts leaves the in-memory ids of skipped rows dangling, so
+        # only the rows whose generated id made it into the table are new
+        created_ids = set(
+            EventRsvp.objects.for_event(event)
+            .filter(id__in=[rsvp.id for rsvp in rsvps])
+            .values_list('id', flat=True)
+        )
+        through = EventRsvp.guardian_of.through
+        through.objects.bulk_create(
+            [
+                through(eventrsvp_id=rsvp.id, attendee_id=ward.pk)
+                for attendee, rsvp in zip(attendees, rsvps)
+                if rsvp.id in created_ids
+                for ward in attendee.guardian_of.all()
+            ],
+            ignore_conflicts=True,
+        )
+        logger.info(f"Migrated {len(created_ids)} attendee event rsvps")
+        return len(created_ids)
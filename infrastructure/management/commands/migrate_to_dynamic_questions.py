@@ -16,6 +16,10 @@ from infrastructure.models import (
 )
 from infrastructure.event_context import get_active_event
 
+BATCH_SIZE = 1000
+PROGRESS_EVERY = 500
+SelectedChoice = ApplicationResponse.selected_choices.through
+
 
 class Command(BaseCommand):
     help = 'Migrate existing application fields to dynamic question system'
@@ -107,29 +111,19 @@ class Command(BaseCommand):
         """Migrate existing essay responses"""
         self.stdout.write("\n  Migrating existing essay responses...")
 
-        applications = Application.objects.for_event(event).all()
-        migrated_count = 0
+        applications = Application.objects.for_event(event).only(
+            'id', 'email', 'theme_essay'
+        )
+        builder = ResponseBuilder()
 
-        for app in applications:
+        for app in self.iterate_with_progress(applications):
             if app.theme_essay:
-                try:
-                    ApplicationResponse.objects.create(
-                        application=app,
-                        question=essay_q,
-                        text_response=app.theme_essay
-                    )
-                    migrated_count += 1
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            "  Warning: Failed to migrate theme_essay for "
-                            f"{app.email}: {e}"
-                        )
-                    )
+                builder.add(app, essay_q, text_response=app.theme_essay)
 
+        migrated_count = self.flush(builder)
         self.stdout.write(
-            "  Migrated {migrated_count} essay responses from "
-            f"{applications.count()} applications"
+            f"  Migrated {migrated_count} essay responses from "
+            f"{self.total} applications"
         )
 
     def create_theme_questions(self, event, dry_run):
@@ -297,104 +291,48 @@ class Command(BaseCommand):
         """Migrate existing theme responses"""
         self.stdout.write("\n  Migrating existing theme responses...")
 
-        applications = Application.objects.for_event(event).all()
-        migrated_count = 0
-
-        for app in applications:
-            # Migrate theme_interest_track_one
-            if (
-                app.theme_interest_track_one and
-                app.theme_interest_track_one in ['Y', 'N']
-            ):
-                try:
-                    response = ApplicationResponse.objects.create(
-                        application=app,
-                        question=track_one_q,
-                    )
-                    choice = track_one_q.choices.get(
-                        choice_key=app.theme_interest_track_one
-                    )
-                    response.selected_choices.add(choice)
-                    response.update_selected_snapshot()
-                    migrated_count += 1
-                except ApplicationQuestionChoice.DoesNotExist as e:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f"  Warning: Choice not found for {app.email}: {e}"
-                        )
-                    )
+        applications = Application.objects.for_event(event).only(
+            'id', 'email', 'theme_interest_track_one', 'theme_interest_track_two',
+            'theme_detail_one', 'theme_detail_two', 'theme_detail_three'
+        )
+        builder = ResponseBuilder()
+        yes_no = ['Y', 'N']
 
-            # Migrate parent question (theme_interest_track_two)
-            # Check for explicit values (not None or empty string)
-            if (
-                app.theme_interest_track_two and
-                app.theme_interest_track_two in ['Y', 'N']
-            ):
-                try:
-                    response = ApplicationResponse.objects.create(
-                        application=app,
-                        question=parent_q,
+        for app in self.iterate_with_progress(applications):
+            try:
+                # Migrate theme_interest_track_one
+                if app.theme_interest_track_one in yes_no:
+                    builder.add(
+                        app, track_one_q, choice_keys=[app.theme_interest_track_one]
                     )
-                    choice = parent_q.choices.get(
-                        choice_key=app.theme_interest_track_two
+
+                # Migrate parent question (theme_interest_track_two)
+                # Check for explicit values (not None or empty string)
+                if app.theme_interest_track_two in yes_no:
+                    builder.add(
+                        app, parent_q, choice_keys=[app.theme_interest_track_two]
                     )
-                    response.selected_choices.add(choice)
-                    response.update_selected_snapshot()
-                    migrated_count += 1
 
                     # Only migrate sub-questions if parent was 'Y'
                     if app.theme_interest_track_two == 'Y':
-                        # Migrate detail_one
-                        if app.theme_detail_one and app.theme_detail_one in ['Y', 'N']:
-                            detail_response = ApplicationResponse.objects.create(
-                                application=app,
-                                question=detail_one_q,
-                            )
-                            detail_choice = detail_one_q.choices.get(
-                                choice_key=app.theme_detail_one
-                            )
-                            detail_response.selected_choices.add(detail_choice)
-                            detail_response.update_selected_snapshot()
-                            migrated_count += 1
-
-                        # Migrate detail_two
-                        if app.theme_detail_two and app.theme_detail_two in ['Y', 'N']:
-                            detail_response = ApplicationResponse.objects.create(
-                                application=app,
-                                question=detail_two_q,
-                            )
-                            detail_choice = detail_two_q.choices.get(
-                                choice_key=app.theme_detail_two
-                            )
-                            detail_response.selected_choices.add(detail_choice)
-                            detail_response.update_selected_snapshot()
-                            migrated_count += 1
-
-                        # Migrate detail_three
-                        if (
-                            app.theme_detail_three and
-                            app.theme_detail_three in ['Y', 'N']
+                        for question, key in (
+                            (detail_one_q, app.theme_detail_one),
+                            (detail_two_q, app.theme_detail_two),
+                            (detail_three_q, app.theme_detail_three),
                         ):
-                            detail_response = ApplicationResponse.objects.create(
-                                application=app,
-                                question=detail_three_q,
-                            )
-                            detail_choice = detail_three_q.choices.get(
-                                choice_key=app.theme_detail_three
-                            )
-                            detail_response.selected_choices.add(detail_choice)
-                            detail_response.update_selected_snapshot()
-                            migrated_count += 1
-                except ApplicationQuestionChoice.DoesNotExist as e:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f"  Warning: Choice not found for {app.email}: {e}"
-                        )
+                            if key in yes_no:
+                                builder.add(app, question, choice_keys=[key])
+            except ApplicationQuestionChoice.DoesNotExist as e:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"  Warning: Choice not found for {app.email}: {e}"
                     )
+                )
 
+        migrated_count = self.flush(builder)
         self.stdout.write(
-            "  Migrated {migrated_count} responses from "
-            f"{applications.count()} applications"
+            f"  Migrated {migrated_count} responses from "
+            f"{self.total} applications"
         )
 
     def create_hardware_questions(self, event, dry_run):
@@ -506,70 +444,123 @@ class Command(BaseCommand):
         """Migrate existing hardware responses"""
         self.stdout.write("\n  Migrating existing hardware responses...")
 
-        applications = Application.objects.for_event(event).all()
-        migrated_count = 0
+        applications = Application.objects.for_event(event).only(
+            'id', 'email', 'hardware_hack_interest', 'hardware_hack_detail'
+        )
+        builder = ResponseBuilder()
+        detail_choices = builder.choices_for(detail_q)
 
-        for app in applications:
+        for app in self.iterate_with_progress(applications):
             # Migrate parent question (hardware_hack_interest)
             # Check for valid choice values
             valid_choices = ['A', 'B', 'C', 'D']
-            if (app.hardware_hack_interest and
-                    app.hardware_hack_interest in valid_choices):
-                try:
-                    response = ApplicationResponse.objects.create(
-                        application=app,
-                        question=parent_q,
-                    )
-                    choice = parent_q.choices.get(
-                        choice_key=app.hardware_hack_interest
+            if app.hardware_hack_interest not in valid_choices:
+                continue
+            try:
+                builder.add(app, parent_q, choice_keys=[app.hardware_hack_interest])
+            except ApplicationQuestionChoice.DoesNotExist as e:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"  Warning: Choice not found for "
+                        f"{app.email}: {e}"
                     )
-                    response.selected_choices.add(choice)
-                    response.update_selected_snapshot()
-                    migrated_count += 1
-
-                    # Only migrate detail if parent was B, C, or D
-                    if app.hardware_hack_interest in ['B', 'C', 'D']:
-                        if app.hardware_hack_detail:
-                            detail_response = (
-                                ApplicationResponse.objects.create(
-                                    application=app,
-                                    question=detail_q,
-                                )
+                )
+                continue
+
+            # Only migrate detail if parent was B, C, or D
+            if (app.hardware_hack_interest in ['B', 'C', 'D'] and
+                    app.hardware_hack_detail):
+                selected_keys = []
+                for key in app.hardware_hack_detail:
+                    key = key.strip()
+                    if key in detail_choices:
+                        selected_keys.append(key)
+                    else:
+                        self.stdout.write(
+                            self.style.WARNING(
+                                f"  Warning: Choice '{key}' "
+                                f"not found for {app.email}"
                             )
-
-                            selected_keys = (
-                                list(app.hardware_hack_detail)
-                                if app.hardware_hack_detail else []
-                            )
-
-                            for key in selected_keys:
-                                key = key.strip()
-                                try:
-                                    detail_choice = (
-                                        detail_q.choices.get(choice_key=key)
-                                    )
-                                    detail_response.selected_choices.add(
-                                        detail_choice
-                                    )
-                                except ApplicationQuestionChoice.DoesNotExist:
-                                    self.stdout.write(
-                                        self.style.WARNING(
-                                            f"  Warning: Choice '{key}' "
-                                            f"not found for {app.email}"
-                                        )
-                                    )
-
-                            detail_response.update_selected_snapshot()
-                            migrated_count += 1
-                except ApplicationQuestionChoice.DoesNotExist as e:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f"  Warning: Choice not found for "
-                            f"{app.email}: {e}"
                         )
-                    )
+                builder.add(app, detail_q, choice_keys=selected_keys)
 
+        migrated_count = self.flush(builder)
         self.stdout.write(
             f"  Migrated {migrated_count} responses from "
-            f"{applications.count()} applications"
-        )
+            f"{self.total} applications"
+        )
+
+    def iterate_with_progress(self, applications):
+        """Stream applications, reporting progress every PROGRESS_EVERY rows"""
+        self.total = applications.count()
+        for count, app in enumerate(
+            applications.order_by('pk').iterator(chunk_size=BATCH_SIZE), start=1
+        ):
+            yield app
+            if count % PROGRESS_EVERY == 0:
+                self.stdout.write(f"  Processed {count}/{self.total} applications")
+
+    def flush(self, builder):
+        """Insert the built responses and their selected choices in bulk"""
+        responses = ApplicationResponse.populate_snapshots_bulk(builder.responses)
+        links = builder.choice_links
+        for start in range(0, len(responses), BATCH_SIZE):
+            ApplicationResponse.objects.bulk_create(
+                responses[start:start + BATCH_SIZE]
+            )
+            self.stdout.write(
+                f"  Inserted {min(start + BATCH_SIZE, len(responses))}/"
+                f"{len(responses)} responses"
+            )
+        SelectedChoice.objects.bulk_create(links, batch_size=BATCH_SIZE)
+        return len(responses)
+
+
+class ResponseBuilder:
+    """Builds ApplicationResponse rows in memory for a bulk insert.
+
+    Choices are loaded once per question. Snapshots are filled in when the
+    responses are flushed, by ApplicationResponse.populate_snapshots_bulk,
+    without a save (and choices query) per response.
+    """
+
+    def __init__(self):
+        self.responses = []
+        self.choice_links = []
+        self._choices = {}
+
+    def choices_for(self, question):
+        if question.id not in self._choices:
+            self._choices[question.id] = {
+                choice.choice_key: choice for choice in question.choices.all()
+            }
+        return self._choices[question.id]
+
+    def add(self, application, question, text_response='', choice_keys=()):
+        response = ApplicationResponse(
+            application=application,
+            question=question,
+            text_response=text_response,
+        )
+        if question.question_type in ['S', 'M']:
+            choices = self.choices_for(question)
+            selected = []
+            for key in choice_keys:
+                if key not in choices:
+                    raise ApplicationQuestionChoice.DoesNotExist(
+                        f"{question.question_key} has no choice '{key}'"
+                    )
+                selected.append(choices[key])
+            selected.sort(key=lambda choice: (choice.order, choice.choice_key))
+            response.selected_keys_snapshot = [
+                choice.choice_key for choice in selected
+            ]
+            self.choice_links.extend(
+                SelectedChoice(
+                    applicationresponse_id=response.id,
+                    applicationquestionchoice_id=choice.id,
+                )
+                for choice in selected
+            )
+        self.responses.append(response)
+        return response
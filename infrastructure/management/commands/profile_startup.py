@@ -0,0 +1,109 @@
+"""
+Startup profile of the Django app: per-module import time plus every database
+query and network call made while importing.
+
+Runs a fresh interpreter (python -X importtime) that sets Django up and imports
+the URLconf and ASGI application, i.e. what Daphne workers and most management
+commands load. Anything reported under "Import-time side effects" runs on every
+boot and should be moved into a function, property or handle().
+
+Usage:
+    python manage.py profile_startup
+    python manage.py profile_startup --command send_rsvp_emails --top 20
+    python manage.py profile_startup --all-commands --offline --strict
+"""
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management import get_commands
+from django.core.management.base import BaseCommand, CommandError
+
+from infrastructure.utils.startup import PROBE_SCRIPT, parse_importtime, read_report
+
+
+class Command(BaseCommand):  # pragma: no cover
+    help = "Report import time per module and DB/network calls made at import"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15)
+        parser.add_argument(
+            '--module',
+            action='append',
+            dest='modules',
+            help='Module to import instead of the URLconf and ASGI app; repeatable'
+        )
+        parser.add_argument(
+            '--command',
+            action='append',
+            dest='commands',
+            default=[],
+            help='Management command whose module is loaded as well; repeatable'
+        )
+        parser.add_argument(
+            '--all-commands',
+            action='store_true',
+            help='Load every infrastructure management command'
+        )
+        parser.add_argument(
+            '--offline',
+            action='store_true',
+            help='Fail network calls in the profiled interpreter'
+        )
+        parser.add_argument(
+            '--strict',
+            action='store_true',
+            help='Exit with an error when any import-time side effect is found'
+        )
+
+    def handle(self, *args, **options):
+        modules = options['modules'] or [
+            settings.ROOT_URLCONF,
+            settings.ASGI_APPLICATION.rsplit('.', 1)[0],
+        ]
+        commands = list(options['commands'])
+        if options['all_commands']:
+            commands += sorted(
+                name for name, app in get_commands().items()
+                if app == 'infrastructure' and name != 'profile_startup'
+            )
+        script = PROBE_SCRIPT.format(
+            modules=modules, commands=commands, offline=options['offline']
+        )
+        env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", script],
+            capture_output=True, text=True, env=env,
+        )
+        try:
+            report = read_report(result.stdout)
+        except ValueError:
+            raise CommandError(f"Startup probe failed:\n{result.stderr[-2000:]}")
+
+        self.stdout.write("Wall time (ms):")
+        for label, seconds in report['timings'].items():
+            self.stdout.write(f"  {seconds * 1000:8.1f}  {label}")
+
+        self.stdout.write("Largest cumulative imports (ms):")
+        imports = sorted(parse_importtime(result.stderr), reverse=True)
+        for cumulative, module in imports[:options['top']]:
+            self.stdout.write(f"  {cumulative / 1000:8.1f}  {module.strip()}")
+
+        for label, error in report['errors'].items():
+            self.stderr.write(f"Failed to load {label}: {error}")
+
+        calls = report['calls']
+        if not calls:
+            self.stdout.write(self.style.SUCCESS("No import-time side effects"))
+            return
+        self.stdout.write(self.style.WARNING(
+            f"Import-time side effects ({len(calls)}):"
+        ))
+        for call in calls:
+            self.stdout.write(
+                f"  [{call['kind']}] {call['module']} {call['location']}\n"
+                f"      {call['detail']}"
+            )
+        if options['strict']:
+            raise CommandError(f"{len(calls)} import-time side effects found")
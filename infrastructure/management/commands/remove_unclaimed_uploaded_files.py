@@ -1,14 +1,57 @@
+from datetime import timedelta
+
 from django.core.management.base import BaseCommand
-from django.db import transaction
 
-from infrastructure.models import Application, UploadedFile
+from infrastructure.utils.uploaded_files import (
+    S3_DELETE_OBJECTS_LIMIT, remove_unclaimed_uploaded_files
+)
 
 
 class Command(BaseCommand):  # pragma: no cover
     help = "Deletes orphaned resumes and images"
 
-    def handle(self, *args, **kwargs):  # noqa: C901
-        unclaimed_files = UploadedFile.objects.all().filter(claimed=False)
-        for unclaimed_file in unclaimed_files:
-            unclaimed_file.delete()
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=int,
+            default=24,
+            help='Only delete unclaimed files older than this many hours'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=S3_DELETE_OBJECTS_LIMIT,
+            help='Number of files selected and deleted per batch'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Number of threads issuing storage deletes'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count orphaned files without deleting anything'
+        )
 
+    def handle(self, *args, **options):
+        summary = remove_unclaimed_uploaded_files(
+            grace_period=timedelta(hours=options['grace_hours']),
+            batch_size=options['batch_size'],
+            max_workers=options['workers'],
+            dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f"Found {summary.scanned} orphaned files")
+            return
+        self.stdout.write(
+            f"Scanned {summary.scanned} orphaned files, "
+            f"deleted {summary.deleted_files} from storage "
+            f"and {summary.deleted_rows} rows"
+        )
+        if summary.failed:
+            self.stdout.write(self.style.ERROR(
+                f"Failed to delete {len(summary.failed)} files, "
+                "they will be retried on the next run"
+            ))
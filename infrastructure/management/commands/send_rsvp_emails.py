@@ -10,7 +10,6 @@ import infrastructure.event_context as event_context
 
 class Command(BaseCommand):  # pragma: no cover
     help = "Sends RSVP emails to those that have not received them"
-    event = event_context.get_active_event()
 
     def add_arguments(self, parser):
         parser.add_argument("--email", nargs=1, type=str, required=False)
@@ -49,6 +48,7 @@ class Command(BaseCommand):  # pragma: no cover
                   f" Email: {application.email}")
 
     def handle(self, *args, **kwargs):  # noqa: C901
+        self.event = event_context.get_active_event()
         accepted_applications_with_unsent_rsvp_emails = []
         try:
             if "force_email" in kwargs and kwargs["force_email"] is not None:
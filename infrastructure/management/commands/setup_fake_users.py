@@ -2,6 +2,7 @@
 import os
 import time
 from argparse import Namespace
+from functools import cached_property
 
 import requests
 from django.core.files.base import ContentFile
@@ -64,7 +65,10 @@ class Command(BaseCommand):  # pragma: no cover
         "sponsor_company": None,
         "us_visa_support_citizenship_option": None
     }
-    keycloak_client = KeycloakClient()
+
+    @cached_property
+    def keycloak_client(self):
+        return KeycloakClient()
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -73,7 +73,24 @@ def format_skill_name(skill_name: str) -> str:
     return skill_name.lower().replace(" ", "_").replace("-", "_").replace(",", "")
 
 
-def add_all():  # noqa: C901
+def add_all(  # noqa: C901
+    number_of_attendees=NUMBER_OF_ATTENDEES,
+    number_of_teams=NUMBER_OF_TEAMS,
+    number_of_tables=NUMBER_OF_TEAMS,
+    number_of_applications=None,
+    number_of_hardware_devices=NUMBER_OF_HARDWARE_TYPES * NUMBER_OF_HARDWARE_DEVICES,
+    number_of_mentor_help_requests=NUMBER_OF_MENTOR_HELP_REQUESTS,
+    preferences_per_attendee=NUMBER_OF_TEAMS,
+):
+    """
+    Populate the current event. The defaults make a small event for local
+    development; benchmark_api passes event-day numbers. Applications default
+    to two per attendee and must be at least ``number_of_attendees + 5``: that
+    many are accepted, the extra five becoming mentors.
+    """
+    accepted = number_of_attendees + 5
+    if number_of_applications is None:
+        number_of_applications = accepted * 2
     groups = []
     for _ in range(NUMBER_OF_GROUPS):
         group = factories.GroupFactory()
@@ -89,14 +106,14 @@ def add_all():  # noqa: C901
     applications = []
     uploaded_files = []
     # + 5 to account for mentors
-    for i in range((NUMBER_OF_ATTENDEES + 5) * 2):
+    for i in range(number_of_applications):
         application_skill_proficiencies = []
         resume = factories.UploadedFileFactory()
         uploaded_files.append(resume)
         application = factories.ApplicationFactory(
             resume=resume,
             **(dict(status=Application.Status.ACCEPTED_IN_PERSON)
-               if i < NUMBER_OF_ATTENDEES + 5 else {}))
+               if i < accepted else {}))
         number_of_skill_proficiencies = random.randint(
             1, NUMBER_OF_SKILL_PROFICIENCIES)
         for _ in range(number_of_skill_proficiencies):
@@ -113,9 +130,9 @@ def add_all():  # noqa: C901
     for i, application in enumerate(applications):
         if application.status != Application.Status.ACCEPTED_IN_PERSON:
             continue
-        if i < NUMBER_OF_ATTENDEES:
+        if i < number_of_attendees:
             participation_class = ParticipationClass.PARTICIPANT
-        elif i < NUMBER_OF_ATTENDEES + 5:
+        elif i < accepted:
             participation_class = ParticipationClass.MENTOR
         else:
             participation_class = ParticipationClass.PARTICIPANT
@@ -134,11 +151,11 @@ def add_all():  # noqa: C901
     factories.LocationFactory(room=Location.Room.ATLANTIS)
     factories.LocationFactory(room=Location.Room.MAIN_HALL)
     tables = []
-    for _ in range(NUMBER_OF_TEAMS):
+    for _ in range(number_of_tables):
         table = factories.TableFactory()
         tables.append(table)
     lighthouses = []
-    for _ in range(NUMBER_OF_TEAMS):
+    for _ in range(number_of_teams):
         lighthouse = factories.LightHouseFactory()
         lighthouses.append(lighthouse)
     attendee_subset_index = 0
@@ -147,7 +164,7 @@ def add_all():  # noqa: C901
         participation_class=ParticipationClass.PARTICIPANT)
     )
     team_participants = []
-    for _ in range(NUMBER_OF_TEAMS):
+    for _ in range(number_of_teams):
         team_members = participants[
                 attendee_subset_index:attendee_subset_index + TEAM_SIZE
             ]
@@ -164,7 +181,7 @@ def add_all():  # noqa: C901
         )
         projects.append(project)
     mentor_help_requests = []
-    for participant in random.sample(team_participants, NUMBER_OF_MENTOR_HELP_REQUESTS):
+    for participant in random.sample(team_participants, number_of_mentor_help_requests):
         try:
             team = Team.objects.for_event(
                 event_context.get_current_event()
@@ -185,7 +202,7 @@ def add_all():  # noqa: C901
     for _ in range(NUMBER_OF_HARDWARE_REQUESTS):
         hardware_request = factories.HardwareRequestFactory()
         hardware_requests.append(hardware_request)
-    for _ in range(NUMBER_OF_HARDWARE_TYPES * NUMBER_OF_HARDWARE_DEVICES):
+    for _ in range(number_of_hardware_devices):
         # no checkout.
         hardware_device = factories.HardwareDeviceFactory(
             checked_out_to=None)
@@ -202,8 +219,8 @@ def add_all():  # noqa: C901
             workshop_attendees.append(workshop_attendee)
         workshops.append(workshop)
     attendee_preferences = []
-    for preferer in random.sample(attendees, NUMBER_OF_ATTENDEES):
-        for preferee in random.sample(attendees, NUMBER_OF_TEAMS):
+    for preferer in random.sample(attendees, number_of_attendees):
+        for preferee in random.sample(attendees, preferences_per_attendee):
             if preferer != preferee:
                 if (preferer.participation_class == "P" and
                         preferee.participation_class == "P"):
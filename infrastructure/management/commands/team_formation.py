@@ -1,10 +1,13 @@
 import sqlite3
 import uuid
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
+from infrastructure.event_context import get_active_event
 from infrastructure.models import (Attendee, AttendeePreference, DestinyTeam,
-                                   DestinyTeamAttendeeVibe, Team)
+                                   DestinyTeamAttendeeVibe, Event, EventSequence,
+                                   Table, Team)
 
 
 class Command(BaseCommand):  # pragma: no cover
@@ -15,6 +18,25 @@ class Command(BaseCommand):  # pragma: no cover
         parser.add_argument("--finalize", action='store_true', required=False)
         parser.add_argument("--import", action='store_true', required=False)
         parser.add_argument("--export", action='store_true', required=False)
+        parser.add_argument(
+            "--event-id",
+            type=str,
+            help=(
+                "Event UUID teams are imported into. If not provided, uses "
+                "active event."
+            )
+        )
+
+    def get_event(self, kwargs):
+        if kwargs.get("event_id"):
+            try:
+                return Event.objects.get(id=kwargs["event_id"])
+            except Event.DoesNotExist:
+                raise CommandError(f"Event {kwargs['event_id']} not found")
+        event = get_active_event()
+        if event is None:
+            raise CommandError("No event given and no active event")
+        return event
     
     def handle(self, *args, **kwargs):  # noqa: C901
         if kwargs.get("initialize") and kwargs.get("finalize"):
@@ -67,12 +89,14 @@ class Command(BaseCommand):  # pragma: no cover
                 print(f"{sqlite_db_name} saved.")
                 exit(0)
             elif kwargs.get("import"):  # 5
-                # delete existing import
-                Team.objects.all().delete()
+                event = self.get_event(kwargs)
+                # delete existing import and restart team numbers at 1
+                Team.objects.for_event(event).delete()
+                EventSequence.objects.for_event(event).filter(name='team').delete()
                 # serialize and import final teams
                 sqlite_db_name = "finalize_import.sqlite3"
                 con = sqlite3.connect(sqlite_db_name)
-                self.import_teams(con)
+                self.import_teams(con, event)
                 con.close()
                 print(f"{sqlite_db_name} imported.")
                 exit(0)
@@ -91,7 +115,7 @@ class Command(BaseCommand):  # pragma: no cover
             destiny_team.attendees.set(destiny_team_attendees_by_destiny_team_id[values[0]])
             destiny_team.save()
 
-    def import_teams(self, con):
+    def import_teams(self, con, event):
         cur = con.cursor()
         res = cur.execute("SELECT * FROM teamattendees")
         team_attendees_by_team_id = {}
@@ -99,12 +123,32 @@ class Command(BaseCommand):  # pragma: no cover
             if values[1] not in team_attendees_by_team_id:
                 team_attendees_by_team_id[values[1]] = []
             team_attendees_by_team_id[values[1]].append(values[2])
+        # tables are exported by number (str(table))
+        table_ids_by_number = dict(
+            Table.objects.for_event(event).values_list('number', 'id')
+        )
         res = cur.execute("SELECT * FROM teams")
-        for values in res.fetchall():
-            team = Team.objects.create(id=values[0], table=values[1], track=values[2], hardware_hack=values[3], destiny_hardware=values[4])
-            team.attendees.set(team_attendees_by_team_id[values[0]])
-            team.save()
-        
+        teams = [
+            Team(
+                id=values[0],
+                event=event,
+                table_id=table_ids_by_number.get(int(values[1])) if values[1] else None,
+                tracks=[values[2]] if values[2] else [],
+                hardware_hack=bool(values[3]),
+                destiny_hardware=values[4].split(",") if values[4] else [],
+            )
+            for values in res.fetchall()
+        ]
+        # One counter update numbers every team; one INSERT per batch adds them
+        with transaction.atomic():
+            Team.bulk_create_numbered(teams)
+            Team.attendees.through.objects.bulk_create([
+                Team.attendees.through(team_id=team.id, attendee_id=attendee_id)
+                for team in teams
+                for attendee_id in team_attendees_by_team_id.get(team.id, [])
+            ], batch_size=1000)
+        print(f"{len(teams)} teams imported.")
+
     def export_attendees(self, con):
         cur = con.cursor()
         cur.execute("CREATE TABLE attendees('id', 'participation_role', 'intended_tracks', 'prefers_destiny_hardware', 'intended_hardware_hack')")
@@ -12,10 +12,15 @@ Supports multiple detection strategies:
 """
 
 import uuid
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
 from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
+from django_keycloak_auth import middleware as keycloak_middleware
+from infrastructure import db_router
 from infrastructure.event_context import set_current_event, clear_current_event
 from infrastructure.models import Event
+from infrastructure.utils.metrics import RequestTimings, current_timings, registry
 
 
 class EventDetectionMiddleware(MiddlewareMixin):
@@ -213,6 +218,127 @@ class EventDetectionMiddleware(MiddlewareMixin):
             return None, None
 
 
+class ServerTimingMiddleware:
+    """
+    Times every request (database, cache, serializers, total), answers with a
+    Server-Timing header and records the request in the metrics registry
+    served at /metrics/.
+
+    Place it right before EventDetectionMiddleware so event detection is
+    part of the measured time.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            with timings.recording():
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.record(request, response, timings)
+
+    async def __acall__(self, request):
+        # Only counts the queries made on this thread: those of sync code
+        # Django runs in a worker thread (sync middleware, sync views, the
+        # async ORM) are missing from the db timing
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            with timings.recording():
+                response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.record(request, response, timings)
+
+    def record(self, request, response, timings):
+        # Serializer time is only known to viewsets (BudgetMixin)
+        action_profile = getattr(request, 'action_profile', None)
+        if action_profile is not None:
+            timings.serializer_time = action_profile.serializer_time
+        response['Server-Timing'] = timings.server_timing()
+        match = request.resolver_match
+        registry.record_request(
+            match.view_name if match else 'unmatched',
+            request.method,
+            response.status_code,
+            timings,
+        )
+        registry.maybe_flush()
+        return response
+
+
+class ReplicaStickinessMiddleware:
+    """
+    After a successful write, sends the client's reads to the primary for
+    REPLICA_STICKY_SECONDS so it reads its own writes (see
+    infrastructure.db_router).
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.stick(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.stick(request, await self.get_response(request))
+
+    def stick(self, request, response):
+        if (
+            request.method not in self.SAFE_METHODS
+            and response.status_code < 400
+            and db_router.replica_configured()
+        ):
+            response.set_cookie(
+                db_router.PRIMARY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                secure=request.is_secure(),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class KeycloakMiddleware(keycloak_middleware.KeycloakMiddleware):
+    """
+    django_keycloak_auth's KeycloakMiddleware, usable in an async middleware
+    chain so async views (infrastructure.async_views) are not run through a
+    sync adapter. Its token check stays in the synchronous process_view.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
 class EventRequiredMiddleware(MiddlewareMixin):
     """
     Simplified middleware that requires X-Event-ID header on all API requests.
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.20 on 2026-10-19 01:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('infrastructure', '0051_eventrsvp_device_preference_ranked'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('value', models.PositiveIntegerField(default=0)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='infrastructure.event')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='eventsequence',
+            constraint=models.UniqueConstraint(fields=('event', 'name'), name='unique_event_sequence'),
+        ),
+    ]
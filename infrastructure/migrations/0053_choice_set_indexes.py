@@ -0,0 +1,62 @@
+# Generated by Django 4.2.20 on 2026-10-19 01:59
+
+from django.db import migrations, models
+from django.db.models.functions import Cast
+import infrastructure.choice_sets
+
+CHOICE_SET_FIELDS = [
+    ('Attendee', 'intended_tracks'),
+    ('Hardware', 'tags'),
+    ('MentorHelpRequest', 'topic'),
+    ('Team', 'tracks'),
+    ('Team', 'destiny_hardware'),
+]
+
+
+def normalize_choice_keys(apps, schema_editor):
+    """
+    Strip whitespace, empty and repeated keys (e.g. "S, E," from imports), so
+    the all_of/any_of lookups see exactly the keys MultiSelectField would store.
+    """
+    for model_name, field_name in CHOICE_SET_FIELDS:
+        model = apps.get_model('infrastructure', model_name)
+        # The raw column; MultiSelectField would strip the keys on load
+        rows = model.objects.exclude(**{f"{field_name}__isnull": True}).values_list(
+            'pk', Cast(field_name, models.TextField())
+        )
+        for pk, stored in rows:
+            keys = stored.replace('\uff0c', ',').split(',')
+            normalized = ','.join(dict.fromkeys(key.strip() for key in keys if key.strip()))
+            if normalized != stored:
+                model.objects.filter(pk=pk).update(**{field_name: normalized.split(',')})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('infrastructure', '0052_eventsequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_choice_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='attendee',
+            index=infrastructure.choice_sets.ChoiceSetIndex('intended_tracks', name='attendee_intended_tracks_keys'),
+        ),
+        migrations.AddIndex(
+            model_name='hardware',
+            index=infrastructure.choice_sets.ChoiceSetIndex('tags', name='hardware_tags_keys'),
+        ),
+        migrations.AddIndex(
+            model_name='mentorhelprequest',
+            index=infrastructure.choice_sets.ChoiceSetIndex('topic', name='mentorhelprequest_topic_keys'),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=infrastructure.choice_sets.ChoiceSetIndex('tracks', name='team_tracks_keys'),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=infrastructure.choice_sets.ChoiceSetIndex('destiny_hardware', name='team_destiny_hardware_keys'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.20 on 2026-10-19 02:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('infrastructure', '0053_choice_set_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicalhardwaredevice',
+            index=models.Index(fields=['event', 'id', 'history_date'], name='hist_hwdevice_event_id_date'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalhardwaredevice',
+            index=models.Index(fields=['event', 'history_date'], name='hist_hwdevice_event_date'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalhardwaredevice',
+            index=models.Index(fields=['event', 'serial'], name='hist_hwdevice_event_serial'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalmentorhelprequest',
+            index=models.Index(fields=['event', 'id', 'history_date'], name='hist_mentorhelp_event_id_date'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalmentorhelprequest',
+            index=models.Index(fields=['event', 'history_date'], name='hist_mentorhelp_event_date'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalmentorhelprequest',
+            index=models.Index(fields=['event', 'status', 'history_date'], name='hist_mentorhelp_status_date'),
+        ),
+    ]
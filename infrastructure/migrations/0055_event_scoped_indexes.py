@@ -0,0 +1,73 @@
+# Generated by Django 4.2.20 on 2026-10-19 02:43
+
+from django.db import migrations, models
+import logging
+
+
+def renumber_duplicate_tables(apps, schema_editor):
+    """Move all but the oldest table sharing an event and number to free numbers"""
+    logger = logging.getLogger(__name__)
+    tables = apps.get_model('infrastructure', 'Table')._base_manager
+    duplicates = (tables.values('event_id', 'number').order_by()
+                  .annotate(count=models.Count('id')).filter(count__gt=1))
+    for duplicate in list(duplicates):
+        event_tables = tables.filter(event_id=duplicate['event_id'])
+        next_number = event_tables.aggregate(models.Max('number'))['number__max'] + 1
+        renumbered = event_tables.filter(
+            number=duplicate['number']).order_by('created_at', 'id')[1:]
+        for table in renumbered:
+            logger.warning(
+                f"Renumbering table {table.id} of event {duplicate['event_id']} "
+                f"from {table.number} to {next_number}")
+            tables.filter(pk=table.pk).update(number=next_number)
+            next_number += 1
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('infrastructure', '0054_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='applicationquestion',
+            index=models.Index(fields=['event', 'parent_question'], name='infrastruct_event_i_7a1599_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendeepreference',
+            index=models.Index(fields=['event', 'preferer'], name='infrastruct_event_i_78fed6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendeepreference',
+            index=models.Index(fields=['event', 'preferee'], name='infrastruct_event_i_9e7dc9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='destinyteam',
+            index=models.Index(fields=['event', 'round'], name='infrastruct_event_i_0178f6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='destinyteamattendeevibe',
+            index=models.Index(fields=['event', 'attendee'], name='infrastruct_event_i_e5990e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lighthouse',
+            index=models.Index(fields=['event', 'table'], name='infrastruct_event_i_18818e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skillproficiency',
+            index=models.Index(fields=['event', 'attendee'], name='infrastruct_event_i_f14533_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workshopattendee',
+            index=models.Index(fields=['event', 'attendee'], name='infrastruct_event_i_081a0a_idx'),
+        ),
+        migrations.RunPython(
+            renumber_duplicate_tables,
+            reverse_code=migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='table',
+            constraint=models.UniqueConstraint(fields=('event', 'number'), name='unique_table_event_number'),
+        ),
+    ]
@@ -1,47 +1,101 @@
 import logging
+from contextlib import ExitStack
 from rest_framework import viewsets
+from rest_framework.permissions import SAFE_METHODS
+from infrastructure import db_router
 from infrastructure.event_context import get_current_event, get_active_event
+from infrastructure.utils.budgets import ActionProfile, check_budget
+from infrastructure.utils.request_logging import summarize
 
 
-class LoggingMixin:
+class BudgetMixin:
     """
-    Provides full logging of requests and responses
+    Profiles every action and checks it against the viewset's ``budgets``,
+    a dict of action name to Budget (see infrastructure.utils.budgets)
+    """
+    budgets = {}
+
+    def dispatch(self, request, *args, **kwargs):
+        self.profile = request.action_profile = ActionProfile()
+        with self.profile.recording():
+            response = super().dispatch(request, *args, **kwargs)
+        action = getattr(self, 'action', None)
+        check_budget(
+            f"{request.method} {request.path} "
+            f"({self.__class__.__name__}.{action})",
+            self.profile,
+            self.budgets.get(action),
+        )
+        return response
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        # Schema generation asks for serializers without dispatching
+        if getattr(self, 'profile', None) is None:
+            return serializer
+        return self.profile.timed_serializer(serializer)
+
+
+class LoggingMixin(BudgetMixin):
+    """
+    Logs summaries of requests and responses at DEBUG; see
+    infrastructure.utils.request_logging
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.logger = logging.getLogger('django.request')
 
     def initial(self, request, *args, **kwargs):
-        try:
-            self.logger.debug({
-                "request": request.data,
-                "method": request.method,
-                "endpoint": request.path,
-                # "user": request.user.username,
-                "ip_address": request.META.get('REMOTE_ADDR'),
-                "user_agent": request.META.get('HTTP_USER_AGENT')
-            })
-        except Exception:
-            self.logger.exception("Error logging request data")
-            self.logger.info({"request": request.data})
+        if self.logger.isEnabledFor(logging.DEBUG):
+            try:
+                self.logger.debug({
+                    "request": summarize(request.data),
+                    "method": request.method,
+                    "endpoint": request.path,
+                    "ip_address": request.META.get('REMOTE_ADDR'),
+                    "user_agent": request.META.get('HTTP_USER_AGENT')
+                })
+            except Exception:
+                self.logger.exception("Error logging request data")
         super().initial(request, *args, **kwargs)
 
     def finalize_response(self, request, response, *args, **kwargs):
-        try:
-            self.logger.debug({
-                "response": response.data,
-                "status_code": response.status_code,
-                # "user": request.user.username,
-                "ip_address": request.META.get('REMOTE_ADDR'),
-                "user_agent": request.META.get('HTTP_USER_AGENT')
-            })
-        except Exception:
-            self.logger.exception("Error logging response data")
-            self.logger.info({"request": response.data})
+        if self.logger.isEnabledFor(logging.DEBUG):
+            try:
+                self.logger.debug({
+                    "response": summarize(getattr(response, 'data', None)),
+                    "status_code": response.status_code,
+                    "endpoint": request.path,
+                    "ip_address": request.META.get('REMOTE_ADDR'),
+                    "user_agent": request.META.get('HTTP_USER_AGENT')
+                })
+            except Exception:
+                self.logger.exception("Error logging response data")
         return super().finalize_response(request, response, *args, **kwargs)
 
 
-class EventScopedModelViewSet(viewsets.ModelViewSet):
+class ReplicaReadMixin:
+    """
+    Sends the reads of ``replica_actions`` to the read replica, if there is one
+    and the client has not written just before (see infrastructure.db_router)
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def dispatch(self, request, *args, **kwargs):
+        with ExitStack() as self.replica_reads:
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in SAFE_METHODS
+            and self.action in self.replica_actions
+            and db_router.reads_may_lag(request)
+        ):
+            self.replica_reads.enter_context(db_router.replica_reads())
+
+
+class EventScopedModelViewSet(BudgetMixin, viewsets.ModelViewSet):
     """
     Base ViewSet that automatically scopes queries by event.
 
@@ -5,20 +5,20 @@ import time
 import logging
 import threading
 
-import language_tags
-import pycountry
 from django.contrib.auth.models import AbstractUser
 from django.core.mail import send_mail
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.db.models.signals import post_delete, post_save
 from django.utils.translation import gettext_lazy as _
 from multiselectfield import MultiSelectField
 from phonenumber_field.modelfields import PhoneNumberField
-from simple_history.models import HistoricalRecords
+from infrastructure.choice_sets import ChoiceSetIndex
+from infrastructure.choices import countries, industries
 from infrastructure.constants import MENTOR_HELP_REQUEST_TOPICS
 from infrastructure import email
+from infrastructure.history import IndexedHistoricalRecords
 from infrastructure.managers import EventScopedManager
 
 logger = logging.getLogger(__name__)
@@ -42,9 +42,7 @@ def send_email_background(subject, body, from_email, recipient_list):
 
 # settings.AUTH_USER_MODEL
 
-with open("infrastructure/industries.csv", "r") as f:
-    industries = f.read().strip().split(",\n")
-    INDUSTRIES = [(x, x) for x in industries]
+INDUSTRIES = industries()
 
 
 class Event(models.Model):
@@ -74,6 +72,49 @@ class Event(models.Model):
         self.save(update_fields=['is_active'])
 
 
+class EventSequence(models.Model):
+    """Per-event counter handing out consecutive numbers, e.g. team numbers."""
+    event = models.ForeignKey(
+        Event, on_delete=models.CASCADE, related_name='%(class)s_set'
+    )
+    name = models.CharField(max_length=50)
+    value = models.PositiveIntegerField(default=0)
+
+    objects = EventScopedManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['event', 'name'], name='unique_event_sequence'
+            )
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.event_id} {self.name}: {self.value}"
+
+    @classmethod
+    def allocate(cls, event, name, count=1, seed=0) -> int:
+        """
+        Reserve ``count`` consecutive numbers and return the first one.
+
+        The counter row is locked until the surrounding transaction ends, so
+        concurrent callers never receive the same numbers. ``seed`` (a value
+        or callable) is the last number already in use when the counter is
+        first created.
+        """
+        event_id = getattr(event, 'pk', event)
+        with transaction.atomic():
+            sequence, _ = cls.objects.for_event(
+                event_id
+            ).select_for_update().get_or_create(
+                event_id=event_id, name=name, defaults={'value': seed},
+            )
+            first = sequence.value + 1
+            sequence.value += count
+            sequence.save(update_fields=['value'])
+        return first
+
+
 class ParticipationRole(models.TextChoices):
     DESIGNER = 'A', _('Digital/Creative Designer')
     DEVELOPER = 'D', _('Developer')
@@ -131,6 +172,9 @@ class SkillProficiency(models.Model):
     class Meta:
         verbose_name = "skill proficiencies"
         unique_together = [['attendee', 'skill']]
+        indexes = [
+            models.Index(fields=['event', 'attendee']),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover
         return f"Skill: {self.skill}, Proficiency: {self.proficiency}"
@@ -145,14 +189,6 @@ class ShirtSize(models.TextChoices):
     XXL = '6', _('XXL')
 
 
-# RFC 5646-compliant mapping of languages
-SPOKEN_LANGUAGES = [
-    (x["Subtag"], ", ".join(x["Description"]))
-    for x in language_tags.data.cache['registry']
-    if x["Type"] == "language" and x.get("Scope") != "special"
-]
-
-
 class DisabilityIdentity(models.TextChoices):
     A = 'A', _('Yes')
     B = 'B', _('No')
@@ -414,15 +450,15 @@ class Application(models.Model):
         default=ParticipationClass.PARTICIPANT
     )
     nationality = MultiSelectField(
-        choices=[(x.alpha_2, x.name) for x in pycountry.countries],
+        choices=countries(),
         max_choices=8,
-        max_length=len(pycountry.countries),
+        max_length=len(countries()),
         null=True
     )
     current_country = MultiSelectField(
-        choices=[(x.alpha_2, x.name) for x in pycountry.countries],
+        choices=countries(),
         max_choices=8,
-        max_length=len(pycountry.countries),
+        max_length=len(countries()),
         null=True
     )
     current_city = models.CharField(max_length=100, blank=False, null=True)
@@ -648,6 +684,7 @@ class ApplicationQuestion(models.Model):
             models.Index(fields=['event', 'question_key']),
             models.Index(fields=['event', 'order']),
             models.Index(fields=['parent_question']),
+            models.Index(fields=['event', 'parent_question']),
         ]
         unique_together = [['event', 'question_key']]
 
@@ -741,6 +778,11 @@ class ApplicationResponse(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Filled by populate_snapshots
+    SNAPSHOT_FIELDS = (
+        'question_text_snapshot', 'choices_snapshot', 'text_response_snapshot'
+    )
+
     class Meta:
         unique_together = [['application', 'question']]
         indexes = [
@@ -751,26 +793,80 @@ class ApplicationResponse(models.Model):
     def __str__(self) -> str:
         return f"{self.application.email} - {self.question.question_key}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_question_id = instance.__dict__.get('question_id')
+        return instance
+
     def save(self, *args, **kwargs):
-        """Auto-populate snapshots on creation"""
+        """Populate snapshots before the write on creation or a question change"""
+        if self._state.adding or (
+            self.question_id != getattr(self, '_snapshot_question_id', None)
+        ):
+            self.populate_snapshots()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *self.SNAPSHOT_FIELDS}
         super().save(*args, **kwargs)
 
-        self.question_text_snapshot = self.question.question_text
-
-        if self.question.question_type in ['S', 'M']:
-            choices_dict = {}
-            for choice in self.question.choices.all():
-                choices_dict[choice.choice_key] = choice.choice_text
-            self.choices_snapshot = choices_dict
-
-        if self.question.question_type in ['T', 'L']:
+    def populate_snapshots(self, question=None, choices=None):
+        """
+        Fill the question, choices and text snapshots in memory.
+
+        Pass ``question`` and its ``choices`` (or prefetch ``choices`` on the
+        question) to do this without queries.
+        """
+        if question is not None:
+            self.question = question
+        question = self.question
+        self.question_text_snapshot = question.question_text
+        if question.question_type in ['S', 'M']:
+            if choices is None:
+                choices = question.choices.all()
+            self.choices_snapshot = {
+                choice.choice_key: choice.choice_text for choice in choices
+            }
+        if question.question_type in ['T', 'L']:
             self.text_response_snapshot = self.text_response
+        self._snapshot_question_id = self.question_id
 
-        super().save(update_fields=[
-            'question_text_snapshot',
-            'choices_snapshot',
-            'text_response_snapshot'
-        ])
+    @classmethod
+    def populate_snapshots_bulk(cls, responses):
+        """
+        Fill snapshots for responses about to be bulk_create()d, which skips
+        save(). Questions missing on the responses and choices not prefetched
+        are loaded in one query each.
+        """
+        responses = list(responses)
+        questions = {
+            response.question_id: response.question
+            for response in responses
+            if cls.question.is_cached(response)
+        }
+        missing = {response.question_id for response in responses} - set(questions)
+        if missing:
+            questions.update(
+                ApplicationQuestion._base_manager.in_bulk(missing)
+            )
+        choices = {}
+        unfetched = [
+            question.id for question in questions.values()
+            if question.question_type in ['S', 'M']
+            and 'choices' not in getattr(question, '_prefetched_objects_cache', {})
+        ]
+        if unfetched:
+            for choice in ApplicationQuestionChoice.objects.filter(
+                question_id__in=unfetched
+            ):
+                choices.setdefault(choice.question_id, []).append(choice)
+        for response in responses:
+            question = questions[response.question_id]
+            response.populate_snapshots(
+                question,
+                choices.get(question.id, []) if question.id in unfetched else None,
+            )
+        return responses
 
     def update_selected_snapshot(self):
         """Update the selected_keys_snapshot based on current selected_choices"""
@@ -922,7 +1018,7 @@ class Attendee(AbstractUser):
     )  # passport or national ID
     us_visa_support_citizenship = models.CharField(
         max_length=2,
-        choices=[(x.alpha_2, x.name) for x in pycountry.countries],
+        choices=countries(),
         blank=False,
         null=True
     )
@@ -998,7 +1094,8 @@ class Attendee(AbstractUser):
             models.Index(fields=['username']),
             models.Index(fields=['email']),
             models.Index(fields=['is_staff']),
-            models.Index(fields=['authentication_id'])
+            models.Index(fields=['authentication_id']),
+            ChoiceSetIndex('intended_tracks', name='attendee_intended_tracks_keys'),
         ]
 
     def __str__(self) -> str:  # pragma: no cover
@@ -1084,7 +1181,7 @@ class EventRsvp(models.Model):
     )  # passport or national ID
     us_visa_support_citizenship = models.CharField(
         max_length=2,
-        choices=[(x.alpha_2, x.name) for x in pycountry.countries],
+        choices=countries(),
         blank=False,
         null=True
     )
@@ -1212,6 +1309,12 @@ class Table(models.Model):
 
     objects = EventScopedManager()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'number'],
+                                    name='unique_table_event_number')
+        ]
+
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.number}"
 
@@ -1240,17 +1343,47 @@ class Team(models.Model):
         indexes = [
             models.Index(fields=['event', 'name']),
             models.Index(fields=['name']),
-            models.Index(fields=['table'])
+            models.Index(fields=['table']),
+            ChoiceSetIndex('tracks', name='team_tracks_keys'),
+            ChoiceSetIndex('destiny_hardware', name='team_destiny_hardware_keys'),
         ]
 
     def __str__(self) -> str:  # pragma: no cover
         return f"Name: {self.name}, Table: {self.table}, Number: {self.number}"
-    
+
+    def save(self, *args, **kwargs):
+        # Numbered in the INSERT itself, from the event's team sequence
+        if self._state.adding and self.number is None:
+            self.number = Team.allocate_numbers(self.event_id)[0]
+        return super().save(*args, **kwargs)
+
     @classmethod
-    def post_save(cls, sender, instance, created, **kwargs):
-        if created:
-            instance.number = Team.objects.for_event(instance.event).count() + 1
-            instance.save()
+    def allocate_numbers(cls, event, count=1) -> range:
+        """Reserve ``count`` consecutive team numbers for ``event``."""
+        first = EventSequence.allocate(
+            event, 'team', count,
+            seed=lambda: cls.objects.for_event(event).aggregate(
+                last=models.Max('number'))['last'] or 0,
+        )
+        return range(first, first + count)
+
+    @classmethod
+    def bulk_create_numbered(cls, teams, batch_size=1000):
+        """
+        bulk_create ``teams`` of one event, numbering those without a number.
+
+        Numbers come from a single counter update, however many teams there are.
+        """
+        teams = list(teams)
+        if len({team.event_id for team in teams}) > 1:
+            raise ValueError("Teams must belong to a single event")
+        unnumbered = [team for team in teams if team.number is None]
+        with transaction.atomic():
+            if unnumbered:
+                numbers = cls.allocate_numbers(unnumbered[0].event_id, len(unnumbered))
+                for team, number in zip(unnumbered, numbers):
+                    team.number = number
+            return cls.objects.bulk_create(teams, batch_size=batch_size)
 
 
 class Project(models.Model):
@@ -1324,6 +1457,11 @@ class LightHouse(models.Model):
 
     objects = EventScopedManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'table']),
+        ]
+
     def __str__(self) -> str:  # pragma: no cover
         return f"Table: {self.table}, IP: {self.ip_address}"
 
@@ -1361,13 +1499,21 @@ class MentorHelpRequest(models.Model):
     status = models.CharField(choices=MentorRequestStatus.choices, max_length=1, default=MentorRequestStatus.REQUESTED.value)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    history = HistoricalRecords()
+    history = IndexedHistoricalRecords(indexes=[
+        models.Index(fields=['event', 'id', 'history_date'],
+                     name='hist_mentorhelp_event_id_date'),
+        models.Index(fields=['event', 'history_date'],
+                     name='hist_mentorhelp_event_date'),
+        models.Index(fields=['event', 'status', 'history_date'],
+                     name='hist_mentorhelp_status_date'),
+    ])
 
     objects = EventScopedManager()
 
     class Meta:
         indexes = [
             models.Index(fields=['event', 'status', 'created_at']),
+            ChoiceSetIndex('topic', name='mentorhelprequest_topic_keys'),
         ]
 
     def __str__(self):
@@ -1405,6 +1551,11 @@ class Hardware(models.Model):
 
     objects = EventScopedManager()
 
+    class Meta:
+        indexes = [
+            ChoiceSetIndex('tags', name='hardware_tags_keys'),
+        ]
+
     def __str__(self) -> str:  # pragma: no cover
         return f"Name: {self.name}"
 
@@ -1418,7 +1569,13 @@ class HardwareDevice(models.Model):
         'HardwareRequest', on_delete=models.CASCADE, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    history = HistoricalRecords()
+    history = IndexedHistoricalRecords(indexes=[
+        models.Index(fields=['event', 'id', 'history_date'],
+                     name='hist_hwdevice_event_id_date'),
+        models.Index(fields=['event', 'history_date'],
+                     name='hist_hwdevice_event_date'),
+        models.Index(fields=['event', 'serial'], name='hist_hwdevice_event_serial'),
+    ])
 
     objects = EventScopedManager()
 
@@ -1517,6 +1674,11 @@ class WorkshopAttendee(models.Model):
 
     objects = EventScopedManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'attendee']),
+        ]
+
     def __str__(self):
         return f"Attendee: {self.attendee}, Participation: {self.participation}, Workshop: {self.workshop}"
 
@@ -1535,6 +1697,12 @@ class AttendeePreference(models.Model):
 
     objects = EventScopedManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'preferer']),
+            models.Index(fields=['event', 'preferee']),
+        ]
+
     def __str__(self):
         return f"Preferrer: {self.preferer}, Preferee: {self.preferee}, Preference: {self.preference}"
 
@@ -1553,6 +1721,11 @@ class DestinyTeam(models.Model):
 
     objects = EventScopedManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'round']),
+        ]
+
     def __str__(self):  # pragma: no cover
         return f"Table: {self.table}, Round: {self.round}"
 
@@ -1566,6 +1739,11 @@ class DestinyTeamAttendeeVibe(models.Model):
 
     objects = EventScopedManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'attendee']),
+        ]
+
     def __str__(self):
         return f"Destiny Team: {self.destiny_team}, Attendee: {self.attendee}, Vibe: {self.vibe}"
 
@@ -1591,7 +1769,3 @@ post_delete.connect(
 post_save.connect(
     MentorHelpRequest.post_save, sender=MentorHelpRequest, dispatch_uid="mentor_help_request_entry_saved"
 )
-
-post_save.connect(
-    Team.post_save, sender=Team, dispatch_uid='new_team_registered'   
-)
\ No newline at end of file
@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class HistoryCursorPagination(CursorPagination):
+    """
+    Keyset pagination of historical records, newest first. A page seeks to
+    the cursor's history_date on the history indexes instead of skipping an
+    offset, so later pages cost as much as the first.
+    """
+    ordering = ('-history_date', '-history_id')
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
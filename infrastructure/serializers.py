@@ -1,8 +1,9 @@
-import pycountry
 from django.contrib.auth.models import Group
+from django.db.models import Prefetch
 from rest_framework import fields, serializers
 from drf_spectacular.utils import extend_schema_field
 from infrastructure import models, event_context
+from infrastructure.choices import countries
 from infrastructure.models import (INDUSTRIES, MENTOR_HELP_REQUEST_TOPICS,
                                    Application, Attendee, ApplicationQuestion,
                                    ApplicationQuestionChoice, ApplicationResponse,
@@ -16,6 +17,41 @@ from infrastructure.models import (INDUSTRIES, MENTOR_HELP_REQUEST_TOPICS,
                                    WorkshopAttendee, Event, EventRsvp)
 
 
+def is_event_scoped_relation(field):
+    """True for a (possibly many=True) pk/slug field backed by an EventScopedManager."""
+    relation = getattr(field, 'child_relation', field)
+    if not isinstance(
+        relation,
+        (
+            serializers.PrimaryKeyRelatedField,
+            serializers.SlugRelatedField,
+        ),
+    ):
+        return False
+    return relation.queryset is not None and hasattr(relation.queryset, 'for_event')
+
+
+def scope_relation_lazily(relation):
+    """
+    Scope a related field's queryset to the current event on first use.
+
+    The queryset is only needed to validate input or list choices, so scoping
+    it from ``get_queryset`` keeps plain serialization free of the event
+    lookup and queryset cloning.
+    """
+    unscoped_get_queryset = relation.get_queryset
+
+    def get_queryset():
+        queryset = unscoped_get_queryset()
+        event = event_context.get_current_event()
+        if event:
+            return queryset.for_event(event)
+        # Fallback: allow all events (for admin use or testing without event)
+        return queryset.all_events()
+
+    relation.get_queryset = get_queryset
+
+
 class EventScopedSerializer(serializers.ModelSerializer):
     """
     Base serializer that automatically scopes foreign key fields to the current event.
@@ -24,6 +60,10 @@ class EventScopedSerializer(serializers.ModelSerializer):
     only objects from the current event are considered valid. This is crucial
     for maintaining proper event isolation in the multi-tenant system.
 
+    The names of the fields that need scoping are worked out once per
+    serializer class, and each field only resolves the event when its
+    queryset is actually used.
+
     Usage:
         class MySerializer(EventScopedSerializer):
             class Meta:
@@ -31,27 +71,24 @@ class EventScopedSerializer(serializers.ModelSerializer):
                 fields = ['id', 'name', 'foreign_key_field']
     """
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        event = event_context.get_current_event()
-
-        # Auto-scope fields that have EventScopedManager
-        for field_name, field in self.fields.items():
-            if isinstance(
-                field,
-                (
-                    serializers.PrimaryKeyRelatedField,
-                    serializers.SlugRelatedField,
-                ),
-            ):
-                queryset = field.queryset
-                # Check if the queryset has event scoping methods
-                if queryset is not None and hasattr(queryset, 'for_event'):
-                    if event:
-                        field.queryset = queryset.for_event(event)
-                    else:
-                        # Fallback: allow all events (for admin use or testing without event)
-                        field.queryset = queryset.all_events()
+    @classmethod
+    def get_scoped_field_names(cls, fields):
+        """Names of the event scoped related fields, cached on the class."""
+        names = cls.__dict__.get('_scoped_field_names')
+        if names is None:
+            names = tuple(
+                field_name for field_name, field in fields.items()
+                if is_event_scoped_relation(field)
+            )
+            cls._scoped_field_names = names
+        return names
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for field_name in self.get_scoped_field_names(fields):
+            field = fields[field_name]
+            scope_relation_lazily(getattr(field, 'child_relation', field))
+        return fields
 
 
 class GroupSerializer(serializers.ModelSerializer):
@@ -90,10 +127,10 @@ class ApplicationSerializer(EventScopedSerializer):
         choices=Application.GenderIdentities.choices,
     )
     nationality = fields.MultipleChoiceField(
-        choices=[(x.alpha_2, x.name) for x in pycountry.countries],
+        choices=countries(),
     )
     current_country = fields.MultipleChoiceField(
-        choices=[(x.alpha_2, x.name) for x in pycountry.countries]
+        choices=countries()
     )
     race_ethnic_group = fields.MultipleChoiceField(
         choices=Application.RaceEthnicGroups.choices,
@@ -188,10 +225,10 @@ class ApplicationDetailSerializer(EventScopedSerializer):
         choices=Application.GenderIdentities.choices,
     )
     nationality = fields.MultipleChoiceField(
-        choices=[(x.alpha_2, x.name) for x in pycountry.countries],
+        choices=countries(),
     )
     current_country = fields.MultipleChoiceField(
-        choices=[(x.alpha_2, x.name) for x in pycountry.countries],
+        choices=countries(),
     )
     race_ethnic_group = fields.MultipleChoiceField(choices=Application.RaceEthnicGroups)
     previous_participation = fields.MultipleChoiceField(
@@ -368,10 +405,41 @@ class LocationSerializer(EventScopedSerializer):
                   'created_at', 'updated_at']
 
 
-class TableSerializer(EventScopedSerializer):
+class TableNumberValidationMixin:
+    """Table numbers are unique per event (unique_table_event_number)"""
+
+    def get_table_event(self):
+        """The event of the table being updated, or the one it is created in"""
+        if self.instance is not None:
+            return self.instance.event
+        view = self.context.get('view')
+        if hasattr(view, 'get_event'):
+            return view.get_event()
+        return event_context.get_current_event()
+
+    def validate_number(self, value):
+        event = self.get_table_event()
+        if event is None:
+            # Nothing to compare against; the constraint still guards the save
+            return value
+        tables = Table.objects.for_event(event)
+        if self.instance is not None:
+            tables = tables.exclude(pk=self.instance.pk)
+        if tables.filter(number=value).exists():
+            raise serializers.ValidationError(
+                f"Table {value} already exists for this event"
+            )
+        return value
+
+
+class TableSerializer(TableNumberValidationMixin, EventScopedSerializer):
     is_claimed = serializers.SerializerMethodField()
 
     def get_is_claimed(self, obj) -> bool:
+        # TableViewSet.list annotates is_claimed, sparing a query per table
+        is_claimed = getattr(obj, 'is_claimed', None)
+        if is_claimed is not None:
+            return is_claimed
         return hasattr(obj, 'team') and obj.team is not None
 
     class Meta:
@@ -379,6 +447,64 @@ class TableSerializer(EventScopedSerializer):
         fields = ['id', 'number', 'location', 'created_at', 'updated_at', 'is_claimed']
 
 
+TABLE_INCLUDES = ('team', 'lighthouse')
+
+
+class TableTeamSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Team
+        fields = ['id', 'number', 'name', 'tracks', 'destiny_hardware',
+                  'team_description', 'created_at', 'updated_at']
+
+
+class TableLightHouseSerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    ip_address = serializers.IPAddressField()
+    announcement_pending = serializers.CharField()
+    mentor_requested = serializers.CharField()
+
+
+class TableListSerializer(TableSerializer):
+    """
+    Reads the claim, team and lighthouse annotations added by TableViewSet.list.
+
+    When ``context['include']`` is given (the ``?include=`` query parameter),
+    ``team`` and ``lighthouse`` are only present if listed in it.
+    """
+    team_id = serializers.UUIDField(read_only=True, allow_null=True)
+    team_name = serializers.CharField(read_only=True, allow_null=True)
+    mentor_requested = serializers.CharField(
+        source='lighthouse_mentor_requested', read_only=True, allow_null=True)
+    announcement_pending = serializers.CharField(
+        source='lighthouse_announcement_pending', read_only=True, allow_null=True)
+    team = TableTeamSerializer(read_only=True, allow_null=True)
+    lighthouse = serializers.SerializerMethodField()
+
+    @extend_schema_field(TableLightHouseSerializer(allow_null=True))
+    def get_lighthouse(self, obj):
+        if obj.lighthouse_id is None:
+            return None
+        return TableLightHouseSerializer({
+            'id': obj.lighthouse_id,
+            'ip_address': obj.lighthouse_ip_address,
+            'announcement_pending': obj.lighthouse_announcement_pending,
+            'mentor_requested': obj.lighthouse_mentor_requested,
+        }).data
+
+    def get_fields(self):
+        fields = super().get_fields()
+        include = self.context.get('include')
+        if include is not None:
+            for name in set(TABLE_INCLUDES) - set(include):
+                fields.pop(name)
+        return fields
+
+    class Meta(TableSerializer.Meta):
+        fields = TableSerializer.Meta.fields + [
+            'team_id', 'team_name', 'mentor_requested', 'announcement_pending',
+            'team', 'lighthouse']
+
+
 class TableTruncatedSerializer(EventScopedSerializer):
     class Meta:
         model = Table
@@ -606,7 +732,7 @@ class TableDetailSerializer(EventScopedSerializer):
                   'created_at', 'updated_at']
 
 
-class TableCreateSerializer(EventScopedSerializer):
+class TableCreateSerializer(TableNumberValidationMixin, EventScopedSerializer):
     class Meta:
         model = Table
         fields = ['id', 'number', 'location']
@@ -767,12 +893,39 @@ class WorkshopSerializer(EventScopedSerializer):
     @extend_schema_field(serializers.ListField(child=serializers.IntegerField()))
     def get_skills(self, obj):
         """Get skill IDs from the workshop's existing relationships."""
-        return list(Skill.objects.for_event(obj.event).filter(workshop_skills=obj).values_list('id', flat=True))
+        if 'skills' in getattr(obj, '_prefetched_objects_cache', {}):
+            return [skill.id for skill in obj.skills.all()]
+        return list(
+            Skill.objects.for_event(obj.event_id)
+            .filter(workshop_skills=obj)
+            .values_list('id', flat=True)
+        )
 
     @extend_schema_field(serializers.ListField(child=serializers.IntegerField()))
     def get_hardware(self, obj):
         """Get hardware IDs from the workshop's existing relationships."""
-        return list(Hardware.objects.for_event(obj.event).filter(workshop_hardware=obj).values_list('id', flat=True))
+        if 'hardware' in getattr(obj, '_prefetched_objects_cache', {}):
+            return [hardware.id for hardware in obj.hardware.all()]
+        return list(
+            Hardware.objects.for_event(obj.event_id)
+            .filter(workshop_hardware=obj)
+            .values_list('id', flat=True)
+        )
+
+
+def workshop_prefetches(event, lookup=''):
+    """
+    Event-scoped Prefetch objects for WorkshopSerializer's skills and hardware.
+
+    ``lookup`` is the path to the workshop, e.g. ``'workshop__'`` when
+    prefetching through WorkshopAttendee.
+    """
+    return [
+        Prefetch(f'{lookup}skills', queryset=Skill.objects.for_event(event).only('id')),
+        Prefetch(
+            f'{lookup}hardware', queryset=Hardware.objects.for_event(event).only('id')
+        ),
+    ]
 
 
 class WorkshopAttendeeSerializer(EventScopedSerializer):
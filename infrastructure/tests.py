@@ -1,27 +1,57 @@
+import asyncio
 import copy
+import csv
+import importlib.util
+import json
 import os
 import random
+import threading
+import time
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.conf import settings
+from django.core.cache import cache
 from django.contrib.auth.models import Group
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.db.models import Max
 from django.http.response import JsonResponse
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.test import APIClient, APITestCase
+from storages.backends.s3 import S3Storage
 
-from infrastructure import factories, models, serializers
-from infrastructure.management.commands import setup_test_data
-from infrastructure.keycloak import KeycloakRoles
+from infrastructure import db_router, factories, models, serializers, views
+from infrastructure.db_pool.base import ConnectionPool
+from infrastructure.history import skip_history
+from infrastructure.management.commands import compact_history, setup_test_data
+from infrastructure.keycloak import KeycloakClient, KeycloakRoles
 from infrastructure import event_context
+from infrastructure.utils import (benchmarks, budgets, choice_masks, index_audit,
+                                  metrics, request_logging, startup,
+                                  uploaded_files)
 
 
 class KeycloakTestMiddleware(object):
+    # Async capable as the middleware it replaces, so async views (long polls)
+    # do not hold a worker thread under test
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         # Django response
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
         return self.get_response(request)
@@ -56,10 +86,10 @@ class KeycloakTestMiddleware(object):
 
 middleware = settings.MIDDLEWARE[:]
 middleware.insert(
-    middleware.index("django_keycloak_auth.middleware.KeycloakMiddleware") + 1,
+    middleware.index("infrastructure.middleware.KeycloakMiddleware") + 1,
     "infrastructure.tests.KeycloakTestMiddleware",
 )
-middleware.remove("django_keycloak_auth.middleware.KeycloakMiddleware")
+middleware.remove("infrastructure.middleware.KeycloakMiddleware")
 keycloak_test = override_settings(
     MIDDLEWARE=middleware,
     KEYCLOAK_EXEMPT_URIS=settings.KEYCLOAK_EXEMPT_URIS + [".*"],
@@ -123,6 +153,86 @@ class MeTests(EventTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()["id"], self.mock_attendee["id"])
 
+    def test_get_me_query_count_independent_of_workshops(self):
+        skill = factories.SkillFactory()
+        hardware = factories.HardwareFactory()
+
+        def get_me_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get('/me/', headers={
+                    "Authorization": self.mock_attendee_model.authentication_id
+                })
+            self.assertEqual(response.status_code, 200)
+            return len(queries), response.json()["workshops"]
+
+        def attend_workshop():
+            # The request clears the event context, so pass the event along
+            workshop = factories.WorkshopFactory(
+                event=self.active_event, location=self.location,
+                skills=[skill], hardware=[hardware])
+            factories.WorkshopAttendeeFactory(
+                event=self.active_event, attendee=self.mock_attendee_model,
+                workshop=workshop)
+
+        attend_workshop()
+        single_workshop_queries, _ = get_me_queries()
+        attend_workshop()
+        attend_workshop()
+        queries, workshops = get_me_queries()
+        self.assertEqual(queries, single_workshop_queries)
+        self.assertEqual(len(workshops), 3)
+        self.assertEqual(workshops[0]["workshop"]["skills"], [str(skill.id)])
+        self.assertEqual(workshops[0]["workshop"]["hardware"], [str(hardware.id)])
+
+    def get_me(self):
+        return self.client.get('/me/', headers={
+            "Authorization": self.mock_attendee_model.authentication_id
+        })
+
+    def test_get_me_read_model(self):
+        cache.clear()
+        hardware = factories.HardwareFactory()
+        hardware_request = factories.HardwareRequestFactory(
+            hardware=hardware, requester=self.mock_attendee_model)
+        device = factories.HardwareDeviceFactory(
+            hardware=hardware, checked_out_to=hardware_request)
+        factories.SkillProficiencyFactory(
+            attendee=self.mock_attendee_model, skill=factories.SkillFactory())
+        # Active event, attendee, skill proficiencies, team, team attendees,
+        # hardware devices, workshops, guardian_of (no workshops or profile
+        # image to fetch here)
+        with self.assertNumQueries(8):
+            response = self.get_me()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["team"]["id"], self.mock_team["id"])
+        self.assertEqual(
+            set(response.json()["team"]["attendees"]),
+            set(map(str, self.mock_team["attendees"])))
+        self.assertEqual(len(response.json()["skill_proficiencies"]), 1)
+        self.assertEqual(response.json()["hardware_devices"][0]["id"], str(device.id))
+        # Cached: only the attendee and active event lookups
+        with self.assertNumQueries(2):
+            cached = self.get_me().json()
+        for key in ("id", "team", "skill_proficiencies", "hardware_devices"):
+            self.assertEqual(cached[key], response.json()[key])
+
+    def test_get_me_invalidated_on_write(self):
+        cache.clear()
+        self.assertEqual(self.get_me().json()["skill_proficiencies"], [])
+        event_context.set_current_event(self.active_event)
+        factories.SkillProficiencyFactory(
+            attendee=self.mock_attendee_model, skill=factories.SkillFactory())
+        self.assertEqual(len(self.get_me().json()["skill_proficiencies"]), 1)
+
+        models.Team.objects.for_event(self.active_event).get().attendees.remove(
+            self.mock_attendee_model)
+        self.assertIsNone(self.get_me().json()["team"])
+
+        self.mock_attendee_model.bio = "Updated bio"
+        self.mock_attendee_model.save()
+        self.assertEqual(self.get_me().json()["bio"], "Updated bio")
+
     def test_get_me_no_team(self):
         models.Team.objects.for_event(
             event_context.get_current_event()
@@ -377,6 +487,94 @@ class TeamTests(EventTestCase):
         self.assertEqual(mock_team["name"], response.json()["name"])
         self.assertNotEqual(self.mock_team["id"], response.json()["id"])
 
+    def test_team_numbers_assigned_on_insert(self):
+        last = models.Team.objects.for_event(self.active_event).aggregate(
+            last=Max('number'))['last']
+        with CaptureQueriesContext(connection) as queries:
+            team = models.Team.objects.create(event=self.active_event, name="Numbered")
+        writes = [
+            query["sql"].split(" ")[:3] for query in queries
+            if query["sql"].startswith(("INSERT", "UPDATE"))
+        ]
+        # The number is part of the INSERT; the team is not saved twice
+        self.assertEqual(writes, [
+            ["UPDATE", '"infrastructure_eventsequence"', "SET"],
+            ["INSERT", "INTO", '"infrastructure_team"'],
+        ])
+        self.assertEqual(team.number, last + 1)
+        team.refresh_from_db()
+        self.assertEqual(team.number, last + 1)
+
+        other_event = factories.EventFactory()
+        other_team = models.Team.objects.create(event=other_event, name="Elsewhere")
+        self.assertEqual(other_team.number, 1)
+
+    def test_bulk_create_numbered_teams(self):
+        first = models.Team.allocate_numbers(self.active_event)[0] + 1
+        teams = [
+            models.Team(event=self.active_event, name=f"Team {i}") for i in range(50)
+        ]
+        teams[0].number = 999
+        with CaptureQueriesContext(connection) as queries:
+            models.Team.bulk_create_numbered(teams)
+        writes = [
+            query["sql"].split(" ")[:3] for query in queries
+            if query["sql"].startswith(("INSERT", "UPDATE"))
+        ]
+        self.assertEqual(writes, [
+            ["UPDATE", '"infrastructure_eventsequence"', "SET"],
+            ["INSERT", "INTO", '"infrastructure_team"'],
+        ])
+        numbers = list(models.Team.objects.for_event(self.active_event).filter(
+            id__in=[team.id for team in teams]
+        ).order_by('number').values_list('number', flat=True))
+        self.assertEqual(numbers, list(range(first, first + 49)) + [999])
+
+    def test_get_teams_choice_set_filters(self):
+        teams = models.Team.objects.for_event(self.active_event)
+        teams.update(tracks=[])
+        for name, tracks in (("both", ["S", "E"]), ("social", ["S"]), ("other", ["A"])):
+            models.Team.objects.create(
+                event=self.active_event, name=name, tracks=tracks
+            )
+        for query, expected in (
+            ("tracks=S,E", ["both"]),
+            ("tracks=S", ["both", "social"]),
+            ("tracks__any=E,A", ["both", "other"]),
+        ):
+            response = self.client.get(f"/teams/?{query}")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(sorted(team["name"] for team in response.json()), expected)
+        response = self.client.get("/teams/?tracks=unknown")
+        self.assertEqual(response.status_code, 400)
+
+        team = teams.get(name="both")
+        for topic in (["LANG_JAVASCRIPT"], ["LANG_JAVA", "OTHER"]):
+            models.MentorHelpRequest.objects.create(
+                event=self.active_event, team=team, topic=topic
+            )
+        requests = models.MentorHelpRequest.objects.for_event(self.active_event)
+        self.assertEqual(requests.filter(topic__contains="LANG_JAVA").count(), 2)
+        self.assertEqual(
+            list(requests.filter(topic__all_of=["LANG_JAVA"]).values_list(
+                "topic", flat=True)),
+            [["LANG_JAVA", "OTHER"]]
+        )
+        self.assertEqual(requests.filter(topic__any_of=["AI_OTHER"]).count(), 0)
+
+    def test_create_team_table_from_other_event(self):
+        other_event = factories.EventFactory()
+        other_table = models.Table.objects.create(event=other_event, number=1)
+        serializer = serializers.TeamCreateSerializer(data={
+            "name": "other event table", "attendees": [], "table": other_table.id
+        })
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors["table"][0].code, "does_not_exist")
+        self.assertEqual(
+            serializers.TeamCreateSerializer.get_scoped_field_names(serializer.fields),
+            ("table",)
+        )
+
     def test_partial_update_team(self):
         mock_team = serializers.TeamCreateSerializer(
             models.Team.objects.for_event(
@@ -460,6 +658,30 @@ class ProjectTests(EventTestCase):
         self.assertEqual(new_name, response.json()["name"])
         self.assertNotEqual(self.mock_project["name"], response.json()["name"])
 
+    def test_export_gavel_projects(self):
+        project = models.Project.objects.for_event(self.active_event).get(
+            id=self.mock_project["id"])
+        project.name = 'Say "hi", world'
+        project.save()
+        project.team.tracks = [models.Track.SOCIAL_XR]
+        project.team.destiny_hardware = []
+        project.team.hardware_hack = False
+        project.team.save()
+
+        response = self.client.get('/gavel/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.reader(
+            b"".join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][1], project.name)
+        self.assertEqual(rows[0][4], "Topic:Social_XR")
+        self.assertEqual(rows[0][6], f"By {project.team.name}")
+
+        response = self.client.get('/gavel/', {"excluded": "true"})
+        self.assertEqual(b"".join(response.streaming_content), b"")
+
+
 @keycloak_test
 class HardwareTests(EventTestCase):
     def setUp(self):
@@ -477,6 +699,32 @@ class HardwareTests(EventTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.json()), 1)
 
+    def test_get_hardwares_counts(self):
+        event = event_context.get_current_event()
+        factories.HardwareDeviceFactory.create_batch(
+            3, hardware=self.hardware_type, checked_out_to=None)
+        requester = factories.AttendeeFactory()
+        for status in ("A", "C", "R"):
+            factories.HardwareRequestFactory(
+                hardware=self.hardware_type, requester=requester, team=None,
+                status=status)
+        factories.HardwareFactory.create_batch(2)
+        # One query resolves the active event, one lists the counted hardware
+        with self.assertNumQueries(2):
+            response = self.client.get('/hardware/')
+        self.assertEqual(response.status_code, 200)
+        counts = {
+            hardware["id"]: (hardware["available"], hardware["checked_out"],
+                             hardware["total"])
+            for hardware in response.json()
+        }
+        self.assertEqual(counts[str(self.hardware_type.id)], (1, 1, 3))
+        for hardware_type in models.Hardware.objects.for_event(event):
+            self.assertEqual(
+                counts[str(hardware_type.id)],
+                views.hardware_count(hardware_type, event)
+            )
+
     def get_application_alternate_choice(self, choice, choices):
         alternate_choice = choice
         while alternate_choice == choice:
@@ -842,6 +1090,33 @@ class TableTests(EventTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.json()), 1)
 
+    def test_get_tables_annotated(self):
+        factories.TableFactory.create_batch(3, location=self.location)
+        lighthouse = factories.LightHouseFactory(
+            table=models.Table.objects.for_event(
+                event_context.get_current_event()
+            ).get(pk=self.mock_table["id"]))
+        # One query resolves the active event, one lists the tables
+        with self.assertNumQueries(2):
+            response = self.client.get('/tables/?include=team,lighthouse')
+        self.assertEqual(response.status_code, 200)
+        tables = {table["id"]: table for table in response.json()}
+        self.assertEqual(len(tables), 4)
+        claimed = tables[self.mock_table["id"]]
+        self.assertTrue(claimed["is_claimed"])
+        self.assertEqual(claimed["team_id"], self.mock_team["id"])
+        self.assertEqual(claimed["team"]["name"], self.mock_team["name"])
+        self.assertEqual(claimed["lighthouse"]["id"], str(lighthouse.id))
+        self.assertEqual(claimed["mentor_requested"], lighthouse.mentor_requested)
+        unclaimed = [table for table in tables.values() if not table["is_claimed"]]
+        self.assertEqual(len(unclaimed), 3)
+        self.assertIsNone(unclaimed[0]["team"])
+        self.assertIsNone(unclaimed[0]["lighthouse"])
+
+        response = self.client.get('/tables/')
+        self.assertNotIn("team", response.json()[0])
+        self.assertNotIn("lighthouse", response.json()[0])
+
     def test_get_table(self):
         response = self.client.get(f"/tables/{self.mock_table['id']}/")
         self.assertEqual(response.status_code, 200)
@@ -860,6 +1135,30 @@ class TableTests(EventTestCase):
         self.assertEqual(mock_table["number"], response.json()["number"])
         self.assertNotEqual(self.mock_table["id"], response.json()["id"])
 
+    def test_create_table_number_taken(self):
+        response = self.client.post('/tables/', {
+            "number": self.mock_table["number"], "location": self.location.id
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("number", response.json())
+
+    def test_table_number_scoped_to_table_event(self):
+        other_event = factories.EventFactory()
+        other_table = models.Table.objects.create(
+            event=other_event, number=self.mock_table["number"] + 100)
+        response = self.client.post('/tables/', {
+            "number": other_table.number, "location": self.location.id
+        })
+        self.assertEqual(response.status_code, 201)
+        # The other event's table is checked against its own event's numbers
+        serializer = serializers.TableSerializer(
+            other_table, data={"number": self.mock_table["number"]}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        models.Table.objects.create(event=other_event, number=7000)
+        serializer = serializers.TableSerializer(
+            other_table, data={"number": 7000}, partial=True)
+        self.assertFalse(serializer.is_valid())
+
     def test_partial_update_table(self):
         mock_table = serializers.TableCreateSerializer(
             models.Table.objects.for_event(
@@ -978,6 +1277,102 @@ class ApplicationTests(EventTestCase):
         self.assertEqual(new_last_name, response.json()["last_name"])
         self.assertNotEqual(self.mock_application["last_name"], response.json()["last_name"])
 
+    def create_question(self, question_key, question_type, choices=()):
+        question = models.ApplicationQuestion.objects.create(
+            event=self.active_event, question_key=question_key,
+            question_text=f"{question_key}?", question_type=question_type
+        )
+        for order, choice_key in enumerate(choices):
+            question.choices.create(
+                choice_key=choice_key, choice_text=f"Choice {choice_key}", order=order
+            )
+        return question
+
+    def test_application_response_snapshots_single_write(self):
+        question = self.create_question("interest", "M", choices=("A", "B"))
+        application = models.Application.objects.for_event(self.active_event).get(
+            id=self.mock_application["id"]
+        )
+        with CaptureQueriesContext(connection) as queries:
+            app_response = models.ApplicationResponse.objects.create(
+                application=application, question=question
+            )
+        writes = [query["sql"].split(" ")[0] for query in queries
+                  if query["sql"].startswith(("INSERT", "UPDATE"))]
+        self.assertEqual(writes, ["INSERT"])
+        self.assertEqual(app_response.question_text_snapshot, "interest?")
+        self.assertEqual(
+            app_response.choices_snapshot, {"A": "Choice A", "B": "Choice B"}
+        )
+
+        app_response = models.ApplicationResponse.objects.get(id=app_response.id)
+        app_response.selected_choices.set(question.choices.filter(choice_key="B"))
+        question.choices.update(choice_text="changed")
+        with CaptureQueriesContext(connection) as queries:
+            app_response.update_selected_snapshot()
+        self.assertEqual(len(queries), 2)
+        app_response.refresh_from_db()
+        self.assertEqual(app_response.selected_keys_snapshot, ["B"])
+        self.assertEqual(app_response.choices_snapshot["B"], "Choice B")
+
+        app_response.question = self.create_question("essay", "T")
+        app_response.text_response = "Essay"
+        app_response.save(update_fields=["question", "text_response"])
+        app_response.refresh_from_db()
+        self.assertEqual(app_response.question_text_snapshot, "essay?")
+        self.assertEqual(app_response.text_response_snapshot, "Essay")
+
+    def test_application_response_snapshots_bulk(self):
+        questions = [
+            self.create_question("interest", "S", choices=("Y", "N")),
+            self.create_question("skills", "M", choices=("A", "B", "C")),
+            self.create_question("essay", "L"),
+        ]
+        application = models.Application.objects.for_event(self.active_event).get(
+            id=self.mock_application["id"]
+        )
+        app_responses = [
+            models.ApplicationResponse(
+                application=application, question_id=question.id,
+                text_response="Essay" if question.question_type == "L" else ""
+            )
+            for question in questions
+        ]
+        with self.assertNumQueries(2):
+            models.ApplicationResponse.populate_snapshots_bulk(app_responses)
+        self.assertEqual(
+            [app_response.choices_snapshot for app_response in app_responses], [
+                {"Y": "Choice Y", "N": "Choice N"},
+                {"A": "Choice A", "B": "Choice B", "C": "Choice C"},
+                {},
+            ]
+        )
+        self.assertEqual(app_responses[2].text_response_snapshot, "Essay")
+
+    def test_create_application_with_question_responses(self):
+        self.create_question("interest", "M", choices=("A", "B"))
+        self.create_question("essay", "T")
+        mock_application = copy.deepcopy(self.mock_application)
+        mock_application["email"] = f"{self.mock_application['email']}updated"
+        mock_application["resume"] = factories.UploadedFileFactory().id
+        mock_application["interest"] = ["A", "B"]
+        mock_application["essay"] = "Essay"
+        response = self.client.post('/applications/', mock_application)
+        self.assertEqual(response.status_code, 201)
+        app_responses = {
+            app_response.question.question_key: app_response
+            for app_response in models.ApplicationResponse.objects.filter(
+                application_id=response.json()["id"]
+            )
+        }
+        self.assertEqual(app_responses["interest"].selected_keys_snapshot, ["A", "B"])
+        self.assertEqual(app_responses["interest"].selected_choices.count(), 2)
+        self.assertEqual(
+            app_responses["interest"].choices_snapshot,
+            {"A": "Choice A", "B": "Choice B"}
+        )
+        self.assertEqual(app_responses["essay"].text_response_snapshot, "Essay")
+
 
 @keycloak_test
 class UploadedFileTests(EventTestCase):
@@ -1026,6 +1421,120 @@ class UploadedFileTests(EventTestCase):
         self.assertNotIn(uploaded_file["id"], os.listdir(settings.MEDIA_ROOT))
 
 
+@keycloak_test
+class RemoveUnclaimedUploadedFilesTests(EventTestCase):
+    def tearDown(self):
+        setup_test_data.delete_all()
+
+    def age(self, uploaded_file, days=2):
+        models.UploadedFile.objects.filter(id=uploaded_file.id).update(
+            created_at=uploaded_file.created_at - timedelta(days=days))
+
+    def test_remove_unclaimed_uploaded_files(self):
+        orphans = [factories.UploadedFileFactory() for _ in range(3)]
+        for orphan in orphans:
+            self.age(orphan)
+        recent = factories.UploadedFileFactory()
+        claimed = factories.UploadedFileFactory(claimed=True)
+        self.age(claimed)
+        referenced = factories.UploadedFileFactory()
+        self.age(referenced)
+        factories.HardwareFactory(image=referenced)
+
+        summary = uploaded_files.remove_unclaimed_uploaded_files(
+            grace_period=timedelta(days=1), batch_size=2, max_workers=2)
+
+        self.assertEqual(summary.scanned, 3)
+        self.assertEqual(summary.deleted_files, 3)
+        self.assertEqual(summary.deleted_rows, 3)
+        self.assertEqual(summary.failed, [])
+        self.assertEqual(
+            set(models.UploadedFile.objects.values_list("id", flat=True)),
+            {recent.id, claimed.id, referenced.id}
+        )
+        for orphan in orphans:
+            self.assertFalse(default_storage.exists(orphan.file.name))
+        self.assertTrue(default_storage.exists(referenced.file.name))
+
+    def test_remove_unclaimed_uploaded_files_keeps_rows_on_storage_failure(self):
+        orphan = factories.UploadedFileFactory()
+        self.age(orphan)
+
+        class FailingStorage(FileSystemStorage):
+            def delete(self, name):
+                raise OSError(name)
+
+        summary = uploaded_files.remove_unclaimed_uploaded_files(
+            grace_period=timedelta(days=1), storage=FailingStorage())
+
+        self.assertEqual(summary.failed, [orphan.file.name])
+        self.assertEqual(summary.deleted_rows, 0)
+        self.assertTrue(models.UploadedFile.objects.filter(id=orphan.id).exists())
+
+    def test_remove_unclaimed_uploaded_files_keeps_rows_claimed_meanwhile(self):
+        orphans = [factories.UploadedFileFactory() for _ in range(3)]
+        for orphan in orphans:
+            self.age(orphan)
+        delete_from_storage = uploaded_files.delete_from_storage
+
+        def claim_while_deleting(*args):
+            # Claimed and referenced while the storage deletes run
+            failed = delete_from_storage(*args)
+            models.UploadedFile.objects.filter(id=orphans[0].id).update(claimed=True)
+            factories.HardwareFactory(image=orphans[1])
+            return failed
+
+        with mock.patch.object(
+            uploaded_files, 'delete_from_storage', side_effect=claim_while_deleting
+        ):
+            summary = uploaded_files.remove_unclaimed_uploaded_files(
+                grace_period=timedelta(days=1))
+
+        self.assertEqual(summary.scanned, 3)
+        self.assertEqual(summary.deleted_rows, 1)
+        self.assertEqual(
+            set(models.UploadedFile.objects.values_list("id", flat=True)),
+            {orphans[0].id, orphans[1].id}
+        )
+
+    def test_delete_from_s3_storage(self):
+        calls = []
+        lock = threading.Lock()
+
+        def delete_objects(Bucket, Delete):
+            keys = [entry["Key"] for entry in Delete["Objects"]]
+            with lock:
+                calls.append((Bucket, keys))
+            if "media/uploads/file-1500.pdf" in keys:
+                raise ConnectionError("batch lost")
+            return {"Errors": [
+                {"Key": key, "Code": "AccessDenied"} for key in keys
+                if key == "media/uploads/file-42.pdf"
+            ]}
+
+        class StubS3Storage(S3Storage):
+            bucket = SimpleNamespace(
+                name="uploads",
+                meta=SimpleNamespace(
+                    client=SimpleNamespace(delete_objects=delete_objects)),
+            )
+
+        names = [f"uploads/file-{i}.pdf" for i in range(2500)]
+        failed = uploaded_files.delete_from_storage(
+            names, StubS3Storage(bucket_name="uploads", location="media"))
+
+        self.assertEqual(
+            sorted(len(keys) for _, keys in calls), [500, 1000, 1000])
+        self.assertEqual({bucket for bucket, _ in calls}, {"uploads"})
+        self.assertEqual(
+            sorted(key for _, keys in calls for key in keys),
+            sorted(f"media/{name}" for name in names),
+        )
+        # The per-key error, and the whole batch whose request failed
+        self.assertEqual(
+            set(failed), {"uploads/file-42.pdf"} | set(names[1000:2000]))
+
+
 @keycloak_test
 class WorkshopTests(EventTestCase):
     def setUp(self):
@@ -1080,6 +1589,24 @@ class WorkshopTests(EventTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.json()), 1)
 
+    def test_get_workshops_query_count(self):
+        skills = models.Skill.objects.for_event(event_context.get_current_event())
+        for _ in range(3):
+            factories.WorkshopFactory(skills=skills[:2], hardware=[])
+        # Active event, workshops, prefetched skills, prefetched hardware
+        with self.assertNumQueries(4):
+            response = self.client.get('/workshops/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 4)
+        workshop = next(
+            workshop for workshop in response.json()
+            if workshop["id"] == self.mock_workshop["id"]
+        )
+        self.assertEqual(
+            set(workshop["skills"]), set(map(str, self.mock_workshop["skills"])))
+        self.assertEqual(
+            set(workshop["hardware"]), set(map(str, self.mock_workshop["hardware"])))
+
     def get_workshops_with_filter(self, filter, search_term) -> str:
         return f"/workshops/?{filter}={search_term}"
 
@@ -1523,6 +2050,106 @@ class AttendeeRSVPTests(EventTestCase):
         )
 
 
+@keycloak_test
+class EventRsvpTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def tearDown(self):
+        setup_test_data.delete_all()
+        super().tearDown()
+
+    def create_rsvp(self, **kwargs):
+        attendee = factories.AttendeeFactory(
+            application=factories.ApplicationFactory(
+                resume=factories.UploadedFileFactory()
+            )
+        )
+        return models.EventRsvp.objects.create(
+            event=self.active_event, attendee=attendee,
+            us_visa_support_is_required=False, **kwargs
+        )
+
+    def test_choice_mask(self):
+        tracks = choice_masks.TRACKS
+        mask = tracks.encode([models.Track.SOCIAL_XR, models.Track.HEALTHCARE, "?"])
+        self.assertEqual(
+            tracks.decode(mask), [models.Track.SOCIAL_XR, models.Track.HEALTHCARE]
+        )
+        self.assertEqual(tracks.encode_stored("S, H"), mask)
+        self.assertEqual(tracks.encode_stored(None), 0)
+        self.assertEqual(tracks.overlap(mask, tracks.encode(["H", "A"])), 1)
+        counts = tracks.count([mask, tracks.encode(["S"]), 0])
+        self.assertEqual(counts["S"], 2)
+        self.assertEqual(counts["H"], 1)
+        self.assertEqual(counts["A"], 0)
+
+    def test_get_event_rsvps_summary(self):
+        self.create_rsvp(
+            dietary_restrictions=["1", "3"], dietary_allergies=["1"],
+            intended_tracks=["S"], prefers_destiny_hardware=["M", "T"]
+        )
+        self.create_rsvp(dietary_restrictions=["1"], intended_tracks=["S", "H"])
+        self.create_rsvp(
+            dietary_restrictions=["2"], status=models.EventRsvp.Status.CANCELED
+        )
+        with self.assertNumQueries(3):
+            response = self.client.get("/eventrsvps/summary/")
+        self.assertEqual(response.status_code, 200)
+        summary = response.json()
+        self.assertEqual(summary["total"], 2)
+        self.assertEqual(summary["dietary_restrictions"]["1"], 2)
+        self.assertEqual(summary["dietary_restrictions"]["2"], 0)
+        self.assertEqual(summary["dietary_restrictions"]["3"], 1)
+        self.assertEqual(summary["dietary_allergies"]["1"], 1)
+        self.assertEqual(summary["intended_tracks"]["S"], 2)
+        self.assertEqual(summary["intended_tracks"]["H"], 1)
+        self.assertEqual(summary["prefers_destiny_hardware"]["T"], 1)
+
+    def test_migrate_attendee_event_rsvp(self):
+        guardian = factories.AttendeeFactory(
+            application=None, shirt_size=models.ShirtSize.L,
+            communications_platform_username="guardian#1",
+        )
+        wards = [factories.AttendeeFactory(application=None) for _ in range(2)]
+        guardian.guardian_of.set(wards)
+        existing = factories.AttendeeFactory(application=None)
+        existing.guardian_of.set(wards[:1])
+        models.EventRsvp.objects.create(
+            event=self.active_event, attendee=existing,
+            us_visa_support_is_required=False,
+        )
+
+        # The second run finds the active event, as migration 0048 calls it
+        for options in ({'event_id': str(self.active_event.id)}, {}):
+            call_command(
+                'migrate_attendee_event_rsvp', exclude=['application'],
+                batch_size=2, stdout=StringIO(), **options,
+            )
+
+        rsvps = models.EventRsvp.objects.for_event(self.active_event)
+        attendee_ids = list(rsvps.values_list('attendee_id', flat=True))
+        self.assertEqual(len(attendee_ids), len(set(attendee_ids)))
+        self.assertEqual(
+            set(attendee_ids), set(models.Attendee.objects.values_list('id', flat=True))
+        )
+        rsvp = rsvps.get(attendee=guardian)
+        self.assertEqual(rsvp.communication_platform_username, "guardian#1")
+        self.assertEqual(rsvp.shirt_size, models.ShirtSize.L)
+        self.assertEqual(
+            rsvp.us_visa_support_is_required, guardian.us_visa_support_is_required
+        )
+        # Through-rows only for the RSVPs the command created, once each
+        through = models.EventRsvp.guardian_of.through.objects.filter(
+            eventrsvp__event=self.active_event
+        )
+        self.assertEqual(
+            sorted(through.values_list('eventrsvp_id', 'attendee_id')),
+            sorted((rsvp.id, ward.id) for ward in wards),
+        )
+
+
 class LightHouseTests(EventTestCase):
     pass
 
@@ -1626,3 +2253,542 @@ class EventIsolationTests(EventTestCase):
         event2_requests = models.HardwareRequest.objects.for_event(self.event2).all()
         self.assertEqual(event2_requests.count(), 1)
         self.assertEqual(event2_requests.first(), hr2)
+
+
+class StartupTests(EventTestCase):
+    def test_keycloak_client_fetches_token_lazily(self):
+        with mock.patch("infrastructure.keycloak.requests.post") as post:
+            post.return_value.json.return_value = {
+                "access_token": "token", "expires_in": 300
+            }
+            client = KeycloakClient()
+            post.assert_not_called()
+            headers = client.authentication_headers
+        post.assert_called_once()
+        self.assertEqual(headers["Authorization"], "Bearer token")
+
+    def test_keycloak_roles_follow_event_year(self):
+        with mock.patch.dict(os.environ, {"EVENT_YEAR": "2031"}):
+            self.assertEqual(KeycloakRoles.ORGANIZER, "organizer:2031")
+
+    def test_views_import_without_event_year(self):
+        environ = {k: v for k, v in os.environ.items() if k != "EVENT_YEAR"}
+        spec = importlib.util.spec_from_file_location(
+            "infrastructure.views_without_event_year", views.__file__)
+        with mock.patch.dict(os.environ, environ, clear=True):
+            spec.loader.exec_module(importlib.util.module_from_spec(spec))
+            roles = views.AttendeeViewSet.keycloak_roles['GET']
+            with self.assertRaises(ImproperlyConfigured):
+                KeycloakRoles.ADMIN in roles
+
+    def test_import_side_effects_are_attributed_to_module(self):
+        recorder = startup.SideEffectRecorder()
+        with recorder.installed():
+            exec(
+                "from infrastructure.event_context import get_active_event\n"
+                "class Command:\n"
+                "    event = get_active_event()\n",
+                {"__name__": "infrastructure.management.commands.example"},
+            )
+        self.assertEqual(len(recorder.calls), 1)
+        self.assertEqual(recorder.calls[0]["kind"], "db")
+        self.assertEqual(
+            recorder.calls[0]["module"], "infrastructure.management.commands.example"
+        )
+
+
+class BenchmarkTests(EventTestCase):
+    def test_summarize_interpolates_percentiles(self):
+        summary = benchmarks.summarize(
+            [0.001, 0.002, 0.003, 0.004, 0.005], [3, 4, 3, 3, 3], 1
+        )
+        self.assertEqual(summary["p50"], 3.0)
+        self.assertEqual(summary["p90"], 4.6)
+        self.assertEqual(summary["max"], 5.0)
+        self.assertEqual(summary["queries"], 4)
+        self.assertEqual(summary["queries_min"], 3)
+        self.assertEqual(summary["requests"], 5)
+        self.assertEqual(summary["errors"], 1)
+
+    def test_compare_runs_flags_regressions(self):
+        def run(p50, p95, queries, errors=0):
+            return {"endpoints": {"teams": {
+                "p50": p50, "p95": p95, "queries": queries, "errors": errors
+            }}}
+
+        baseline = run(10.0, 20.0, 6)
+        self.assertEqual(benchmarks.compare_runs(baseline, run(12.0, 24.0, 6)), [])
+        # Below min_latency_ms a relative slowdown is noise
+        self.assertEqual(
+            benchmarks.compare_runs(run(0.2, 0.4, 6), run(0.9, 1.2, 6)), []
+        )
+        regressions = benchmarks.compare_runs(baseline, run(10.0, 30.0, 7, errors=1))
+        self.assertEqual(
+            [regression.metric for regression in regressions],
+            ["p95", "queries", "errors"]
+        )
+        self.assertEqual(
+            benchmarks.compare_runs(baseline, run(10.0, 20.0, 7), query_threshold=1),
+            []
+        )
+
+
+@keycloak_test
+class BudgetTests(EventTestCase):
+    def test_action_over_query_budget_fails(self):
+        factories.TableFactory.create_batch(2)
+        with mock.patch.object(
+            views.TableViewSet, 'budgets', {'list': budgets.Budget(queries=0)}
+        ):
+            with self.assertRaises(budgets.BudgetExceeded):
+                self.client.get('/tables/')
+
+    @override_settings(ENFORCE_ENDPOINT_BUDGETS=False)
+    def test_action_over_budget_warns_when_not_enforced(self):
+        with mock.patch.object(
+            views.TableViewSet, 'budgets', {'list': budgets.Budget(queries=0)}
+        ):
+            with self.assertLogs('infrastructure.utils.budgets', 'WARNING') as logs:
+                response = self.client.get('/tables/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("TableViewSet.list", logs.output[0])
+        profile = response.wsgi_request.action_profile
+        self.assertEqual(profile.queries, 1)
+        self.assertGreater(profile.total_time, 0)
+        self.assertGreater(profile.serializer_time, 0)
+
+
+@keycloak_test
+class RequestLoggingTests(EventTestCase):
+    def test_summarize_redacts_and_bounds(self):
+        summary = request_logging.summarize({
+            "personal_phone_number": "+19048800020",
+            "us_visa_support_full_name": "Jane Doe",
+            "emergency_contact_email": "contact@example.com",
+            "bio": "x" * 1000,
+            "attendees": [{"id": i} for i in range(10)],
+        })
+        self.assertEqual(summary["personal_phone_number"], request_logging.REDACTED)
+        self.assertEqual(summary["us_visa_support_full_name"], request_logging.REDACTED)
+        self.assertEqual(summary["emergency_contact_email"], request_logging.REDACTED)
+        self.assertLess(len(summary["bio"]), 300)
+        self.assertEqual(len(summary["attendees"]), request_logging.MAX_ITEMS + 1)
+
+    def test_request_logged_redacted(self):
+        with self.assertLogs('django.request', 'DEBUG') as logs:
+            self.client.post('/attendees/', {
+                "first_name": "Jane", "personal_phone_number": "+19048800020"
+            }, format='json')
+        self.assertIn("Jane", logs.output[0])
+        self.assertNotIn("+19048800020", "".join(logs.output))
+
+    def test_nothing_built_below_debug(self):
+        with mock.patch('infrastructure.mixins.summarize') as summarize:
+            response = self.client.get('/attendees/')
+        self.assertEqual(response.status_code, 200)
+        summarize.assert_not_called()
+
+
+@keycloak_test
+class ReplicaRouterTests(EventTestCase):
+    def test_router_sends_replica_reads(self):
+        router = db_router.ReplicaRouter()
+        with mock.patch.object(db_router, 'replica_configured', return_value=True):
+            self.assertIsNone(router.db_for_read(models.Application))
+            with db_router.replica_reads():
+                # Test cases run inside a transaction
+                self.assertEqual(router.db_for_read(models.Application), 'default')
+                with mock.patch.object(connection, 'in_atomic_block', False):
+                    self.assertEqual(
+                        router.db_for_read(models.Application), 'replica'
+                    )
+                self.assertEqual(router.db_for_write(models.Application), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'infrastructure'))
+
+    def test_reads_from_primary_after_write(self):
+        with mock.patch.object(db_router, 'replica_configured', return_value=True), \
+                mock.patch.object(db_router, 'replica_reads',
+                                  wraps=db_router.replica_reads) as replica_reads:
+            self.assertEqual(self.client.get('/applications/').status_code, 200)
+            self.assertEqual(replica_reads.call_count, 1)
+            response = self.client.post('/skills/', {"name": "replicated"})
+            self.assertEqual(response.status_code, 201)
+            self.assertIn(db_router.PRIMARY_COOKIE, response.cookies)
+            self.assertEqual(self.client.get('/applications/').status_code, 200)
+            self.assertEqual(replica_reads.call_count, 1)
+            self.client.cookies.clear()
+            self.client.get('/applications/', HTTP_X_READ_PRIMARY='1')
+            self.assertEqual(replica_reads.call_count, 1)
+
+
+@keycloak_test
+class HistoryTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        factories.HardwareFactory()
+        self.device = factories.HardwareDeviceFactory(checked_out_to=None)
+
+    def test_compact_history_drops_no_op_rows(self):
+        self.device.save()
+        self.device.save()
+        self.device.serial = "changed"
+        self.device.save()
+        history = models.HardwareDevice.history.filter(id=self.device.id)
+        redundant = list(compact_history.redundant_history_ids(
+            history, compact_history.tracked_fields(history.model)
+        ))
+        self.assertEqual(len(redundant), 2)
+        self.assertEqual(history.count(), 4)
+
+    def test_skip_history(self):
+        with skip_history(models.HardwareDevice):
+            self.device.save()
+        self.device.save()
+        self.assertEqual(
+            models.HardwareDevice.history.filter(id=self.device.id).count(), 2
+        )
+
+    def test_get_history_pages(self):
+        for _ in range(2):
+            self.device.save()
+        response = self.client.get(
+            f'/hardwaredevicehistory/?id={self.device.id}&page_size=2'
+        )
+        self.assertEqual(response.status_code, 200)
+        page = response.json()
+        self.assertEqual(len(page["results"]), 2)
+        response = self.client.get(page["next"])
+        self.assertEqual(len(response.json()["results"]), 1)
+        self.assertIsNone(response.json()["next"])
+
+
+class AsyncPollViewTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        factories.LocationFactory()
+        attendees = [factories.AttendeeFactory(application=None) for _ in range(2)]
+        team = factories.TeamFactory(
+            attendees=attendees, table=factories.TableFactory()
+        )
+        factories.LightHouseFactory(table=team.table)
+        factories.MentorHelpRequestFactory(
+            reporter=attendees[0], mentor=attendees[1], team=team,
+            status=models.MentorRequestStatus.REQUESTED,
+        )
+        factories.MentorHelpRequestFactory(
+            reporter=attendees[1], mentor=attendees[0], team=team,
+            status=models.MentorRequestStatus.RESOLVED,
+        )
+        factories.HardwareRequestFactory(
+            hardware=factories.HardwareFactory(), requester=attendees[0], team=team
+        )
+
+    def test_same_output_as_viewsets(self):
+        for path in (
+            'mentorhelprequests/', 'lighthouses/', 'hardwarerequests/',
+            f'mentorhelprequests/?status={models.MentorRequestStatus.RESOLVED}',
+        ):
+            response = self.client.get(f'/async/{path}')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.json())
+            self.assertEqual(response.json(), self.client.get(f'/{path}').json())
+
+    def test_invalid_filter(self):
+        response = self.client.get(f'/async/hardwarerequests/?team={uuid.uuid4()}')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            self.client.get(f'/hardwarerequests/?team={uuid.uuid4()}').json()
+        )
+
+    def create_other_event_request(self):
+        other_event = factories.EventFactory()
+        event_context.set_current_event(other_event)
+        attendee = factories.AttendeeFactory(application=None)
+        team = factories.TeamFactory(attendees=[attendee], table=None)
+        factories.HardwareRequestFactory(
+            hardware=factories.HardwareFactory(), requester=attendee, team=team
+        )
+        # Left to the middleware from here on
+        event_context.clear_current_event()
+        return other_event, team
+
+    async def test_team_filter_through_middleware(self):
+        other_event, team = await sync_to_async(self.create_other_event_request)()
+        headers = {'X-Event-ID': str(other_event.id)}
+        path = f'hardwarerequests/?team={team.id}'
+        # The team is validated against the event EventDetectionMiddleware
+        # detected, not the active one
+        response = await self.async_client.get(f'/async/{path}', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+        expected = await sync_to_async(self.client.get)(f'/{path}', headers=headers)
+        self.assertEqual(response.json(), expected.json())
+
+        response = await self.async_client.get(f'/async/{path}')
+        self.assertEqual(response.status_code, 400)
+
+    def test_saving_replaces_cached_response(self):
+        before = self.client.get('/async/lighthouses/').json()
+        lighthouse = models.LightHouse.objects.for_event(self.active_event).first()
+        lighthouse.ip_address = "10.0.0.99"
+        lighthouse.save()
+        after = self.client.get('/async/lighthouses/').json()
+        self.assertNotEqual(before, after)
+        self.assertIn("10.0.0.99", [entry["ip_address"] for entry in after])
+
+
+class ChangeFeedTests(EventTestCase):
+    feed = '/async/mentorhelprequests/changes/'
+
+    def setUp(self):
+        super().setUp()
+        attendees = [factories.AttendeeFactory(application=None) for _ in range(2)]
+        team = factories.TeamFactory(attendees=attendees, table=None)
+        self.chat, self.vision = (
+            factories.MentorHelpRequestFactory(
+                reporter=attendees[0], mentor=attendees[1], team=team,
+                status=models.MentorRequestStatus.REQUESTED, topic=[topic],
+            )
+            for topic in ('AI_CHAT', 'AI_VISION_SENSING')
+        )
+
+    def resolve(self, request):
+        with self.captureOnCommitCallbacks(execute=True):
+            request.status = models.MentorRequestStatus.RESOLVED
+            request.save()
+
+    def test_changes_since_cursor(self):
+        cursor = self.client.get(self.feed).json()['cursor']
+        self.resolve(self.chat)
+        vision_id = self.vision.id
+        self.vision.delete()
+        response = self.client.get(f'{self.feed}?cursor={cursor}&wait=0').json()
+        self.assertGreater(response['cursor'], cursor)
+        listed = self.client.get('/mentorhelprequests/').json()
+        self.assertEqual(response['results'], [
+            next(entry for entry in listed if entry['id'] == str(self.chat.id)),
+            {'id': str(vision_id), 'deleted': True},
+        ])
+        self.assertEqual(
+            response['results'][0]['status'], models.MentorRequestStatus.RESOLVED
+        )
+        again = self.client.get(f"{self.feed}?cursor={response['cursor']}&wait=0")
+        self.assertEqual(again.json(), {'cursor': response['cursor'], 'results': []})
+
+        vision = self.client.get(
+            f'{self.feed}?cursor={cursor}&wait=0&topic__any=AI_VISION_SENSING,AI_GENAI'
+        ).json()
+        self.assertEqual(vision['cursor'], response['cursor'])
+        self.assertEqual(vision['results'], response['results'][1:])
+
+    def test_request_leaving_topic_filter(self):
+        cursor = self.client.get(self.feed).json()['cursor']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vision.topic = ['AI_CHAT']
+            self.vision.save()
+        self.resolve(self.chat)
+        query = f'{self.feed}?cursor={cursor}&wait=0&topic=AI_VISION_SENSING'
+        response = self.client.get(query).json()
+        # Listed under the filter at the cursor, so dropped; the chat request
+        # never was, so not mentioned
+        self.assertEqual(
+            response['results'], [{'id': str(self.vision.id), 'removed': True}]
+        )
+        query = f"{self.feed}?cursor={response['cursor']}&wait=0&topic=AI_CHAT"
+        self.resolve(self.vision)
+        results = self.client.get(query).json()['results']
+        self.assertEqual([result['id'] for result in results], [str(self.vision.id)])
+        self.assertNotIn('removed', results[0])
+
+    def test_invalid_parameters(self):
+        for query in ('cursor=x', 'topic=NOPE', 'wait=soon'):
+            response = self.client.get(f'{self.feed}?{query}')
+            self.assertEqual(response.status_code, 400)
+
+    async def test_long_poll_woken_by_change(self):
+        cursor = (await self.async_client.get(self.feed)).json()['cursor']
+
+        async def change():
+            await asyncio.sleep(0.2)
+            await sync_to_async(self.resolve)(self.vision)
+
+        start = time.monotonic()
+        response, _ = await asyncio.gather(
+            self.async_client.get(f'{self.feed}?cursor={cursor}&wait=10'), change()
+        )
+        self.assertLess(time.monotonic() - start, 5)
+        results = response.json()['results']
+        self.assertEqual([result['id'] for result in results], [str(self.vision.id)])
+
+    @override_settings(CHANGE_FEED_STREAM_SECONDS=0)
+    async def test_event_stream(self):
+        response = await self.async_client.get(
+            f'{self.feed}?cursor=0', headers={'Accept': 'text/event-stream'}
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        lines = content.decode().split('\n')
+        self.assertEqual(lines[1], 'event: changes')
+        data = json.loads(lines[2].removeprefix('data: '))
+        self.assertEqual(
+            {result['id'] for result in data},
+            {str(self.chat.id), str(self.vision.id)},
+        )
+
+
+class IndexAuditTests(EventTestCase):
+    def test_read_sqlite_plan(self):
+        plan = (
+            "2 0 0 SEARCH infrastructure_table USING INDEX "
+            "infrastructure_table_event_id_bc648e82 (event_id=?)"
+        )
+        self.assertEqual(
+            index_audit.read_sqlite_plan(
+                plan, 'infrastructure_table', ['event_id', 'number']),
+            (index_audit.PARTIAL, 'infrastructure_table_event_id_bc648e82'),
+        )
+        plan = (
+            "2 0 0 SEARCH infrastructure_table USING INDEX "
+            "unique_table_event_number (event_id=? AND number=?)"
+        )
+        self.assertEqual(
+            index_audit.read_sqlite_plan(
+                plan, 'infrastructure_table', ['event_id', 'number'])[0],
+            index_audit.INDEX,
+        )
+        self.assertEqual(
+            index_audit.read_sqlite_plan(
+                "2 0 0 SCAN infrastructure_table", 'infrastructure_table', []),
+            (index_audit.SCAN, 'infrastructure_table'),
+        )
+
+    def test_read_postgres_plan(self):
+        plan = (
+            "Bitmap Heap Scan on infrastructure_table  (cost=4.18..12.66)\n"
+            "  Recheck Cond: (event_id = 'x'::uuid)\n"
+            "  Filter: (number = 1)\n"
+            "  ->  Bitmap Index Scan on infrastructure_table_event_id_bc648e82\n"
+            "        Index Cond: (event_id = 'x'::uuid)"
+        )
+        self.assertEqual(
+            index_audit.read_postgres_plan(
+                plan, 'infrastructure_table', ['event_id', 'number']),
+            (index_audit.PARTIAL, 'infrastructure_table_event_id_bc648e82'),
+        )
+        self.assertEqual(
+            index_audit.read_postgres_plan(
+                "Seq Scan on infrastructure_table  (cost=0.00..1.01)",
+                'infrastructure_table', ['event_id', 'number']),
+            (index_audit.SCAN, 'infrastructure_table'),
+        )
+
+    def test_audit_table_number(self):
+        factories.TableFactory()
+        shape = index_audit.Shape(models.Table, 'number', 'test', unique=True)
+        finding, = index_audit.audit([shape], self.active_event)
+        self.assertEqual(finding.verdict, index_audit.INDEX)
+        self.assertTrue(finding.constrained)
+        self.assertEqual(finding.duplicates, 0)
+        self.assertTrue(finding.ok)
+
+    def test_audit_viewset_filters(self):
+        shapes = index_audit.viewset_shapes([
+            ('destinyteams', views.DestinyTeamViewSet, 'destinyteams'),
+        ])
+        findings = {
+            finding.shape.lookup: finding
+            for finding in index_audit.audit(shapes, self.active_event)
+        }
+        self.assertTrue(findings['round'].placeholder)
+        self.assertTrue(findings['round'].ok)
+        # A handful of track choices needs no index of its own
+        self.assertTrue(findings['track'].ok)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.info = mock.Mock(transaction_status=0)
+
+    def rollback(self):
+        self.info.transaction_status = 0
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(EventTestCase):
+    def test_connections_reused(self):
+        pool = ConnectionPool('test', max_size=2, timeout=0)
+        first = pool.acquire(FakeConnection)
+        # Released inside a transaction: rolled back before reuse
+        first.info.transaction_status = 2
+        pool.release(first)
+        self.assertIs(pool.acquire(FakeConnection), first)
+        second = pool.acquire(FakeConnection)
+        self.assertIsNot(second, first)
+        with self.assertRaises(OperationalError):
+            pool.acquire(FakeConnection)
+        pool.release(second)
+        self.assertIs(pool.acquire(FakeConnection), second)
+
+    def test_unusable_and_expired_connections_replaced(self):
+        pool = ConnectionPool('test', max_size=1, timeout=0)
+        first = pool.acquire(FakeConnection)
+        pool.release(first)
+        second = pool.acquire(FakeConnection, is_usable=lambda connection: False)
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        pool.max_lifetime = 0
+        pool.release(second)
+        self.assertTrue(second.closed)
+        self.assertIsNot(pool.acquire(FakeConnection), second)
+
+
+@keycloak_test
+class MetricsTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.registry.reset()
+
+    def test_server_timing_header(self):
+        response = self.client.get('/tables/')
+        self.assertEqual(response.status_code, 200)
+        entries = [
+            entry.split(";")[0] for entry in response["Server-Timing"].split(", ")
+        ]
+        self.assertEqual(entries, ["db", "cache", "serialize", "total"])
+        self.assertIn('db;desc="2 queries"', response["Server-Timing"])
+
+    def test_get_metrics(self):
+        self.client.get('/tables/')
+        self.client.get('/tables/')
+        metrics.registry.websocket_opened("LightHousesConsumer")
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        lines = response.content.decode().splitlines()
+        self.assertIn(
+            'http_requests_total{route="table-list",method="GET",status="200"} 2',
+            lines)
+        self.assertIn(
+            'http_request_db_queries_total{route="table-list",method="GET"} 4', lines)
+        self.assertIn(
+            'http_request_duration_seconds_count{route="table-list",method="GET"} 2',
+            lines)
+        self.assertIn(
+            'http_request_duration_seconds_bucket'
+            '{route="table-list",method="GET",le="+Inf"} 2', lines)
+        self.assertIn('websocket_connections{consumer="LightHousesConsumer"} 1', lines)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_get_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 401)
+        response = self.client.get('/metrics/', HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get('/metrics/', HTTP_AUTHORIZATION="Bearer secre")
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(METRICS_TOKEN=None, METRICS_TOKEN_REQUIRED=True)
+    def test_get_metrics_deployed_without_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
@@ -0,0 +1,194 @@
+"""
+Read model behind ``me/`` and ``attendees/<id>/``: the attendee plus their
+event-scoped skill proficiencies, team, hardware devices and workshops.
+
+``prepare_attendee_for_detail`` loads everything AttendeeDetailSerializer
+reads in a fixed number of queries, independent of how many proficiencies,
+teammates, devices or workshops the attendee has. ``attendee_detail_data``
+caches the serialized payload per (attendee, event); the signal handlers in
+``connect_signals`` drop the entry whenever a model it was built from changes.
+Queryset ``update()``/``bulk_*`` calls bypass signals and are only picked up
+once the entry expires.
+"""
+from typing import Iterable, Optional
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+
+from infrastructure.event_context import get_active_event
+from infrastructure.models import (Attendee, Event, Hardware, HardwareDevice,
+                                   HardwareRequest, Skill, SkillProficiency, Team,
+                                   UploadedFile, Workshop, WorkshopAttendee)
+from infrastructure.serializers import AttendeeDetailSerializer, workshop_prefetches
+
+ATTENDEE_DETAIL_TIMEOUT = 60 * 3
+
+
+def attendee_detail_cache_key(attendee_id, event_id) -> str:
+    return f"attendee-detail:{event_id}:{attendee_id}"
+
+
+def prepare_attendee_for_detail(attendee, event=None):
+    if event is None:
+        event = get_active_event()
+    attendee.skill_proficiencies = SkillProficiency.objects.for_event(event).filter(
+        attendee=attendee
+    ).select_related('skill')
+    attendee.team = Team.objects.for_event(event).filter(
+        attendees=attendee
+    ).prefetch_related(
+        Prefetch('attendees', queryset=Attendee.objects.only('id'))
+    ).first()
+    attendee.hardware_devices = HardwareDevice.objects.for_event(event).filter(
+        checked_out_to__requester=attendee
+    ).select_related('hardware', 'checked_out_to')
+    attendee.workshops = WorkshopAttendee.objects.for_event(event).filter(
+        attendee=attendee.id
+    ).select_related('workshop').prefetch_related(
+        *workshop_prefetches(event, 'workshop__')
+    )
+    return attendee
+
+
+def attendee_detail_data(attendee, event) -> dict:
+    """Serialized AttendeeDetailSerializer payload, cached per attendee and event."""
+    key = attendee_detail_cache_key(attendee.pk, event.pk)
+    data = cache.get(key)
+    if data is None:
+        attendee = prepare_attendee_for_detail(attendee, event)
+        data = AttendeeDetailSerializer(attendee).data
+        cache.set(key, data, ATTENDEE_DETAIL_TIMEOUT)
+    return data
+
+
+def invalidate_attendee_detail(attendee_ids: Iterable,
+                               event_ids: Optional[Iterable] = None):
+    """Drop cached payloads; without ``event_ids``, for every event."""
+    attendee_ids = [attendee_id for attendee_id in attendee_ids if attendee_id]
+    if not attendee_ids:
+        return
+    if event_ids is None:
+        event_ids = Event.objects.values_list('id', flat=True)
+    cache.delete_many([
+        attendee_detail_cache_key(attendee_id, event_id)
+        for event_id in event_ids
+        for attendee_id in attendee_ids
+    ])
+
+
+# Model -> function returning the (attendee ids, event ids) whose payloads
+# include an instance of it
+def _team_attendees(team):
+    return team.attendees.values_list('id', flat=True), [team.event_id]
+
+
+def _workshop_attendees(workshop):
+    attendees = WorkshopAttendee.objects.for_event(workshop.event_id).filter(
+        workshop=workshop
+    ).values_list('attendee_id', flat=True)
+    return attendees, [workshop.event_id]
+
+
+def _skill_attendees(skill):
+    attendees = SkillProficiency.objects.for_event(skill.event_id).filter(
+        skill=skill
+    ).values_list('attendee_id', flat=True)
+    return attendees, [skill.event_id]
+
+
+def _hardware_attendees(hardware):
+    attendees = HardwareDevice.objects.for_event(hardware.event_id).filter(
+        hardware=hardware
+    ).values_list('checked_out_to__requester_id', flat=True)
+    return attendees, [hardware.event_id]
+
+
+def _hardware_device_attendees(device):
+    attendees = []
+    if device.checked_out_to_id:
+        attendees = HardwareRequest.objects.for_event(device.event_id).filter(
+            pk=device.checked_out_to_id
+        ).values_list('requester_id', flat=True)
+    return attendees, [device.event_id]
+
+
+AFFECTED_ATTENDEES = {
+    Attendee: lambda attendee: ([attendee.pk], None),
+    UploadedFile: lambda uploaded_file: (
+        Attendee.objects.filter(
+            profile_image=uploaded_file
+        ).values_list('id', flat=True),
+        None,
+    ),
+    SkillProficiency: lambda proficiency: (
+        [proficiency.attendee_id], [proficiency.event_id]
+    ),
+    WorkshopAttendee: lambda workshop_attendee: (
+        [workshop_attendee.attendee_id], [workshop_attendee.event_id]
+    ),
+    HardwareRequest: lambda hardware_request: (
+        [hardware_request.requester_id], [hardware_request.event_id]
+    ),
+    HardwareDevice: _hardware_device_attendees,
+    Team: _team_attendees,
+    Workshop: _workshop_attendees,
+    Skill: _skill_attendees,
+    Hardware: _hardware_attendees,
+}
+
+
+# Only reach attendees through relations, which a new instance does not have yet
+RELATION_ONLY = (Team, Workshop, Skill, Hardware)
+
+
+def _invalidate_instance(sender, instance, created=False, **kwargs):
+    if created and sender in RELATION_ONLY:
+        return
+    invalidate_attendee_detail(*AFFECTED_ATTENDEES[sender](instance))
+
+
+def _invalidate_previous_device_holder(sender, instance, **kwargs):
+    # A returned device drops off its previous holder's payload
+    if not instance._state.adding:
+        previous = HardwareDevice.objects.for_event(instance.event_id).filter(
+            pk=instance.pk
+        ).first()
+        if previous is not None:
+            _invalidate_instance(sender, previous)
+
+
+def _invalidate_m2m(sender, instance, action, model, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    _invalidate_instance(type(instance), instance)
+    # Attendees removed from a team, or workshops given a skill from the
+    # skill's side, are only known through pk_set
+    if not pk_set:
+        return
+    if model is Attendee:
+        invalidate_attendee_detail(pk_set)
+    elif model in AFFECTED_ATTENDEES:
+        for related in model._base_manager.filter(pk__in=pk_set):
+            _invalidate_instance(model, related)
+
+
+def connect_signals():
+    for model in AFFECTED_ATTENDEES:
+        uid = f"attendee_detail_{model.__name__.lower()}"
+        post_save.connect(
+            _invalidate_instance, sender=model, dispatch_uid=f"{uid}_saved")
+        # Deleted teams, workshops, skills and hardware lose the relations
+        # that lead to their attendees, so look those up beforehand
+        delete_signal = pre_delete if model in RELATION_ONLY else post_delete
+        delete_signal.connect(
+            _invalidate_instance, sender=model, dispatch_uid=f"{uid}_deleted")
+    pre_save.connect(
+        _invalidate_previous_device_holder, sender=HardwareDevice,
+        dispatch_uid="attendee_detail_hardwaredevice_returned")
+    for through in (Team.attendees.through, Attendee.guardian_of.through,
+                    Workshop.skills.through, Workshop.hardware.through):
+        m2m_changed.connect(
+            _invalidate_m2m, sender=through,
+            dispatch_uid=f"attendee_detail_{through.__name__.lower()}_changed")
@@ -0,0 +1,175 @@
+"""
+Measurement, reporting and comparison for the benchmark_api command.
+
+Requests go through the full Django stack in process (URLconf, middleware,
+views, serializers, database), so a run needs no server and no network:
+``BenchmarkAuthMiddleware`` stands in for Keycloak and grants every role,
+taking the ``Authorization`` header as the token subject like the tests do.
+
+A run is a JSON document ``{"meta": {...}, "endpoints": {name: summary}}``
+where each summary holds latency percentiles in milliseconds and query
+counts; ``compare_runs`` diffs two of them.
+"""
+import json
+import platform
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from infrastructure.keycloak import KeycloakRoles
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Latency compared between runs; max is too noisy to gate on
+COMPARED_LATENCIES = ('p50', 'p95')
+
+
+class BenchmarkAuthMiddleware:
+    """Replaces KeycloakMiddleware while benchmarking: every role, no tokens."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.roles = [
+            KeycloakRoles.ATTENDEE, KeycloakRoles.ORGANIZER, KeycloakRoles.ADMIN,
+            KeycloakRoles.MENTOR, KeycloakRoles.JUDGE, KeycloakRoles.VOLUNTEER,
+            KeycloakRoles.SPONSOR,
+        ]
+        request.userinfo = {"sub": request.headers.get("Authorization")}
+
+
+@dataclass
+class Endpoint:
+    name: str
+    method: str
+    # Called before every request with the run number; returns (path, kwargs)
+    # for django.test.Client
+    request: Callable[[int], tuple]
+    expected_status: int = 200
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linear interpolation between closest ranks, like numpy's default."""
+    ordered = sorted(values)
+    if not ordered:
+        raise ValueError("percentile of no values")
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize(timings: List[float], queries: List[int], errors: int) -> dict:
+    """Summary of one endpoint: latencies in ms, queries per request."""
+    milliseconds = [timing * 1000 for timing in timings]
+    summary = {
+        f"p{pct}": round(percentile(milliseconds, pct), 3) for pct in PERCENTILES
+    }
+    summary.update({
+        'mean': round(statistics.mean(milliseconds), 3),
+        'max': round(max(milliseconds), 3),
+        'queries': max(queries),
+        'queries_min': min(queries),
+        'requests': len(timings),
+        'errors': errors,
+    })
+    return summary
+
+
+def measure(client, endpoint: Endpoint, runs: int, warmup: int = 0) -> dict:
+    """Issue ``warmup + runs`` requests; summarize the last ``runs``."""
+    timings, queries = [], []
+    errors = 0
+    for run in range(warmup + runs):
+        path, kwargs = endpoint.request(run)
+        send = getattr(client, endpoint.method.lower())
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = send(path, **kwargs)
+            elapsed = time.perf_counter() - start
+        if run < warmup:
+            continue
+        timings.append(elapsed)
+        queries.append(len(captured))
+        if response.status_code != endpoint.expected_status:
+            errors += 1
+    return summarize(timings, queries, errors)
+
+
+def run_metadata(**extra) -> dict:
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'database': connection.vendor,
+        **extra,
+    }
+
+
+def write_run(path: str, meta: dict, results: Dict[str, dict]):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'endpoints': results}, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def read_run(path: str) -> dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+@dataclass
+class Regression:
+    endpoint: str
+    metric: str
+    baseline: float
+    current: float
+
+    def __str__(self):
+        return (
+            f"{self.endpoint}: {self.metric} {self.baseline:g} -> {self.current:g}"
+        )
+
+
+def compare_runs(baseline: dict, current: dict, latency_threshold: float = 0.25,
+                 query_threshold: int = 0,
+                 min_latency_ms: float = 1.0) -> List[Regression]:
+    """
+    Regressions of ``current`` against ``baseline``: a compared latency more
+    than ``latency_threshold`` (a fraction) slower, more queries than the
+    baseline plus ``query_threshold``, or new errors. Latency differences below
+    ``min_latency_ms`` are treated as noise. Endpoints missing from either run
+    are skipped.
+    """
+    regressions = []
+    for name, now in current['endpoints'].items():
+        before = baseline['endpoints'].get(name)
+        if before is None:
+            continue
+        for metric in COMPARED_LATENCIES:
+            slower = now[metric] - before[metric]
+            if slower > max(before[metric] * latency_threshold, min_latency_ms):
+                regressions.append(
+                    Regression(name, metric, before[metric], now[metric])
+                )
+        if now['queries'] > before['queries'] + query_threshold:
+            regressions.append(
+                Regression(name, 'queries', before['queries'], now['queries'])
+            )
+        if now['errors'] > before['errors']:
+            regressions.append(
+                Regression(name, 'errors', before['errors'], now['errors'])
+            )
+    return regressions
@@ -0,0 +1,120 @@
+"""
+Query and latency budgets for viewset actions.
+
+Every action of a viewset built on EventScopedModelViewSet or LoggingMixin
+runs under an ``ActionProfile``, which records the database queries, the time
+spent in the database and in serializers, and the total time of the action.
+The profile is kept on the request as ``request.action_profile``.
+
+A viewset declares what its actions may cost, by action name:
+
+    budgets = {
+        'list': Budget(queries=3),
+        'retrieve': Budget(queries=4, milliseconds=250),
+    }
+
+An action over its query budget raises ``BudgetExceeded`` when
+``settings.ENFORCE_ENDPOINT_BUDGETS`` is set, as it is for the test suite, so
+any test exercising it fails. Otherwise, and for latency budgets always (they
+depend on the machine and the data), a warning is logged and the response is
+sent as usual.
+
+Serializer time covers serializers obtained from ``get_serializer`` or passed
+through ``ActionProfile.timed_serializer``; database queries they make count
+towards both serializer and database time.
+"""
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class BudgetExceeded(Exception):
+    """Raised for an action over its query budget while budgets are enforced"""
+    pass
+
+
+@dataclass(frozen=True)
+class Budget:
+    queries: Optional[int] = None
+    milliseconds: Optional[float] = None
+
+
+class ActionProfile:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.total_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook, counts queries without DEBUG
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+    @contextmanager
+    def recording(self):
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(self))
+            try:
+                yield self
+            finally:
+                self.total_time = time.perf_counter() - start
+
+    def timed_serializer(self, serializer):
+        """Count the time ``serializer`` spends building its data."""
+        to_representation = serializer.to_representation
+
+        def timed(instance):
+            start = time.perf_counter()
+            try:
+                return to_representation(instance)
+            finally:
+                self.serializer_time += time.perf_counter() - start
+
+        serializer.to_representation = timed
+        return serializer
+
+    def as_dict(self) -> dict:
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 3),
+            'serializer_ms': round(self.serializer_time * 1000, 3),
+            'total_ms': round(self.total_time * 1000, 3),
+        }
+
+    def overruns(self, budget: Budget) -> List[str]:
+        overruns = []
+        if budget.queries is not None and self.queries > budget.queries:
+            overruns.append(f"{self.queries} queries, budget {budget.queries}")
+        milliseconds = self.total_time * 1000
+        if budget.milliseconds is not None and milliseconds > budget.milliseconds:
+            overruns.append(
+                f"{milliseconds:.1f} ms, budget {budget.milliseconds:g} ms"
+            )
+        return overruns
+
+
+def check_budget(endpoint: str, profile: ActionProfile, budget: Optional[Budget]):
+    if budget is None:
+        return
+    overruns = profile.overruns(budget)
+    if not overruns:
+        return
+    message = f"{endpoint} over budget: {'; '.join(overruns)}"
+    over_queries = budget.queries is not None and profile.queries > budget.queries
+    if over_queries and getattr(settings, 'ENFORCE_ENDPOINT_BUDGETS', False):
+        raise BudgetExceeded(message)
+    logger.warning({"message": message, "endpoint": endpoint, **profile.as_dict()})
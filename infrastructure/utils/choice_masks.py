@@ -0,0 +1,108 @@
+"""
+Bitmask codec for multi-choice attributes (tracks, destiny hardware, dietary
+restrictions and allergies, hardware tags).
+
+A ChoiceMask gives every key of a choices enum a bit, so a comma-joined
+MultiSelectField value becomes a single int. Whole-event questions then work
+on ints instead of split strings: ``count`` tallies each distinct mask once
+(an event has a few dozen distinct combinations across thousands of rows),
+``count_stored`` does the same straight from column values, and ``overlap``
+compares two attendees or teams with one ``&``.
+
+Masks are computed on read and never stored, so adding or reordering choices
+needs no migration. Python ints have no fixed width, so larger enums such as
+the mentor help request topics fit as well.
+"""
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from django.db import models
+from django.db.models.functions import Cast
+
+from infrastructure.models import (DestinyHardware, DietaryAllergies,
+                                   DietaryRestrictions, HardwareTags, Track)
+
+
+class ChoiceMask:
+    """Maps the keys of ``choices`` to bit positions, in declaration order."""
+
+    def __init__(self, choices):
+        self.keys = [key for key, _ in choices]
+        self.bits = {key: 1 << position for position, key in enumerate(self.keys)}
+        self._stored = {}
+
+    def encode(self, keys: Optional[Iterable[str]]) -> int:
+        """Mask of ``keys``; keys that are not choices (any more) are ignored."""
+        mask = 0
+        for key in keys or ():
+            mask |= self.bits.get(key, 0)
+        return mask
+
+    def decode(self, mask: int) -> List[str]:
+        return [key for key in self.keys if mask & self.bits[key]]
+
+    def encode_stored(self, value: Optional[str]) -> int:
+        """Mask of a comma-joined column value, parsed once per distinct value."""
+        if not value:
+            return 0
+        if value not in self._stored:
+            self._stored[value] = self.encode(key.strip() for key in value.split(','))
+        return self._stored[value]
+
+    def masks(self, queryset, field_name: str) -> List[int]:
+        """One mask per row of ``queryset``, read from the raw column."""
+        values = queryset.values_list(
+            Cast(field_name, models.TextField()), flat=True
+        )
+        return [self.encode_stored(value) for value in values]
+
+    def count(self, masks: Iterable[int]) -> Dict[str, int]:
+        """How many masks have each key set."""
+        return self._spread(Counter(masks))
+
+    def count_stored(self, values: Iterable[Optional[str]]) -> Dict[str, int]:
+        """``count`` over raw column values, encoding each distinct value once."""
+        tally = Counter()
+        for value, rows in Counter(values).items():
+            tally[self.encode_stored(value)] += rows
+        return self._spread(tally)
+
+    def _spread(self, tally: Counter) -> Dict[str, int]:
+        counts = dict.fromkeys(self.keys, 0)
+        for mask, rows in tally.items():
+            for key in self.decode(mask):
+                counts[key] += rows
+        return counts
+
+    @staticmethod
+    def overlap(mask: int, other: int) -> int:
+        """Number of keys two masks share."""
+        return (mask & other).bit_count()
+
+
+TRACKS = ChoiceMask(Track.choices)
+DESTINY_HARDWARE = ChoiceMask(DestinyHardware.choices)
+DIETARY_RESTRICTIONS = ChoiceMask(DietaryRestrictions.choices)
+DIETARY_ALLERGIES = ChoiceMask(DietaryAllergies.choices)
+HARDWARE_TAGS = ChoiceMask(HardwareTags.choices)
+
+# Attendee and EventRsvp fields, by the codec of their choices
+PROFILE_MASKS = {
+    'intended_tracks': TRACKS,
+    'prefers_destiny_hardware': DESTINY_HARDWARE,
+    'dietary_restrictions': DIETARY_RESTRICTIONS,
+    'dietary_allergies': DIETARY_ALLERGIES,
+}
+
+
+def profile_counts(queryset) -> Dict[str, Dict[str, int]]:
+    """Per-key counts of every PROFILE_MASKS field over ``queryset``."""
+    fields = list(PROFILE_MASKS)
+    rows = queryset.values_list(
+        *(Cast(field_name, models.TextField()) for field_name in fields)
+    )
+    columns = list(zip(*rows)) or [()] * len(fields)
+    return {
+        field_name: PROFILE_MASKS[field_name].count_stored(column)
+        for field_name, column in zip(fields, columns)
+    }
@@ -0,0 +1,106 @@
+import csv
+from typing import Iterable, Iterator, List
+
+from infrastructure.models import DestinyHardware, Location, Project, Track
+
+# Gavel format: UUID (optional), name, zone, location,
+# tags (space-delimited), link, description
+GAVEL_COLUMNS = ["uuid", "name", "zone", "location", "tags", "link", "description"]
+
+map_destiny_hardware_tag = {
+    DestinyHardware.META: "Meta",
+    DestinyHardware.HORIZON: "Horizon",
+    DestinyHardware.SNAP: "Snap",
+    DestinyHardware.STYLY: "STYLY",
+    DestinyHardware.SHAPESXR: "ShapesXR",
+    DestinyHardware.HAPTICS: "INVALID:Haptics",  # !!!
+    DestinyHardware.LAMBDA: "INVALID:Lambda",  # !!!
+    DestinyHardware.APPLE_VISION: "VisionPro",  # TODO!
+    DestinyHardware.NEUROADAPTIVE: "OpenBCI",
+    DestinyHardware.QUALCOMM: "Qualcomm",  # TODO!
+}
+
+map_track_tag = {
+    Track.COMMUNITY_HACKS: "EXCLUDE:Topic:Community",
+    Track.SOCIAL_XR: "Topic:Social_XR",
+    Track.AUGMENTED_ENGINEERING: "Topic:AugmentedEng",
+    Track.SUSTAINABILITY: "Topic:Sustainability",
+    Track.AEROSPATIAL_EXPLORATION: "Topic:Aerospace",
+    Track.AUGMENTED_INTELLIGENCE: "Topic:AI",
+    Track.HEALTHCARE: "INVALID:Healthcare",  # !!!
+}
+
+
+class Echo:
+    """File-like object that hands back what is written, for streaming csv."""
+
+    def write(self, value):
+        return value
+
+
+def gavel_projects(event):
+    """All projects of ``event`` with their team, table and location in one query."""
+    return (
+        Project.objects.for_event(event)
+        .select_related("team__table__location")
+        .order_by("created_at", "id")
+    )
+
+
+def is_community_hack(project) -> bool:
+    team = project.team
+    return team is not None and Track.COMMUNITY_HACKS in (team.tracks or [])
+
+
+def get_tags(project) -> List[str]:
+    team = project.team
+    if team is None:
+        return []
+    tags = [
+        map_destiny_hardware_tag.get(destiny_hardware, f"INVALID:{destiny_hardware}")
+        for destiny_hardware in team.destiny_hardware or []
+    ]
+    tags += [
+        map_track_tag.get(track, f"INVALID:{track}") for track in team.tracks or []
+    ]
+    if team.hardware_hack:
+        tags.append("HardwareHack")
+    return tags
+
+
+def to_gavel_row(project) -> List[str]:
+    team = project.team
+    table = team.table if team is not None else None
+    zone = ""
+    location = ""
+    if table is not None:
+        location = f"Table {table.number}"
+        if table.location is not None:
+            zone = table.location.building
+            if zone != Location.Building.WALKER:
+                location = f"{table.location.room}, {location}"
+    return [
+        "",
+        project.name,
+        zone,
+        location,
+        " ".join(get_tags(project)),
+        (team.devpost_url or "") if team is not None else "",
+        # Not including user-submitted project description here
+        f"By {team.name}" if team is not None else "",
+    ]
+
+
+def iter_gavel_csv(projects: Iterable[Project]) -> Iterator[str]:
+    """Yield one encoded csv line per project, quoting every field."""
+    writer = csv.writer(Echo(), quoting=csv.QUOTE_ALL, lineterminator="\n")
+    for project in projects:
+        yield writer.writerow(to_gavel_row(project))
+
+
+def split_projects(projects: Iterable[Project]):
+    """Split projects into (judged, excluded) where community hacks are excluded."""
+    judged, excluded = [], []
+    for project in projects:
+        (excluded if is_community_hack(project) else judged).append(project)
+    return judged, excluded
@@ -0,0 +1,312 @@
+"""
+Index audit of the event-scoped lookups the API makes, for audit_indexes.
+
+A Shape is one such lookup: the event plus one filter, taken from the
+``filterset_fields`` of the registered viewsets or from CODE_SHAPES, the
+lookups views and helpers make in code. ``audit`` runs EXPLAIN for each
+shape against a real value of the event and reads the plan:
+
+- index: an index covers the event and the filter column together
+- partial: an index is used, but for only one of them (typically the
+  single-column foreign key index), the rest is filtered row by row
+- scan: a full table scan
+
+An event without rows for a lookup is explained with a placeholder value
+of the right type instead; the plan's shape does not depend on the value.
+Filters on fields with a handful of values (choices, booleans, small
+ranges like a 1 to 5 rating) are allowed a partial plan: they split an
+event's rows too coarsely to be worth an index of their own.
+
+Shapes marked ``unique`` are fetched with ``get()`` and so need one row per
+event; for them the audit also checks for a unique constraint and counts the
+values that are already duplicated.
+
+PostgreSQL prefers a sequential scan on small tables whatever the indexes,
+so the plans are taken with ``enable_seqscan`` off: what is left of a
+sequential scan then means no index fits. SQLite plans come from EXPLAIN
+QUERY PLAN, which names the columns each index search constrains.
+"""
+import re
+import uuid
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import connection, models, transaction
+from django.db.models import Count
+
+from infrastructure.models import (LightHouse, SkillProficiency, Table, Team,
+                                   WorkshopAttendee)
+
+INDEX, PARTIAL, SCAN = 'index', 'partial', 'scan'
+
+
+@dataclass(frozen=True)
+class Shape:
+    model: type
+    lookup: str
+    source: str
+    unique: bool = False
+
+    @property
+    def label(self) -> str:
+        return f"{self.model.__name__}.{self.lookup}"
+
+    def columns(self) -> List[str]:
+        """
+        Columns one index should cover. Empty for joined lookups, which only
+        need to avoid scans: the join table's own indexes serve them.
+        """
+        field = local_field(self.model, self.lookup)
+        if field is None:
+            return []
+        if field.unique:
+            return [field.column]
+        return ['event_id', field.column]
+
+    @property
+    def selective(self) -> bool:
+        """Whether the filter narrows an event down enough to index it"""
+        field = local_field(self.model, self.lookup)
+        return field is None or not few_values(field)
+
+    def suggestion(self) -> Optional[str]:
+        if local_field(self.model, self.lookup) is None:
+            return None
+        if self.unique:
+            name = f"unique_{self.model._meta.model_name}_event_{self.lookup}"
+            return (
+                f"models.UniqueConstraint(fields=['event', '{self.lookup}'], "
+                f"name='{name}')"
+            )
+        return f"models.Index(fields=['event', '{self.lookup}'])"
+
+
+@dataclass
+class Finding:
+    shape: Shape
+    verdict: str
+    detail: str = ''
+    # Only for unique shapes: whether a constraint enforces it, and how many
+    # values of the event are held by more than one row
+    constrained: Optional[bool] = None
+    duplicates: int = 0
+    # Explained with a placeholder value, the event having no rows for it
+    placeholder: bool = False
+
+    @property
+    def ok(self) -> bool:
+        indexed = self.verdict == INDEX or (
+            self.verdict == PARTIAL and not self.shape.selective
+        )
+        return indexed and (not self.shape.unique or bool(self.constrained))
+
+
+# Lookups made in code rather than through a filterset. LightHouseViewSet
+# keeps one lighthouse per table, but older events and seeded data hold
+# duplicates, so the lookup is audited as a plain one.
+CODE_SHAPES = [
+    Shape(Table, 'number', 'LightHouseViewSet.create', unique=True),
+    Shape(LightHouse, 'table', 'TableViewSet.retrieve'),
+    Shape(Team, 'table', 'TableViewSet.retrieve', unique=True),
+    Shape(Team, 'attendees', 'prepare_attendee_for_detail'),
+    Shape(SkillProficiency, 'attendee', 'prepare_attendee_for_detail'),
+    Shape(WorkshopAttendee, 'attendee', 'prepare_attendee_for_detail'),
+]
+
+
+def local_field(model, lookup):
+    """The concrete field of ``model`` named ``lookup``, if it is one"""
+    if '__' in lookup:
+        return None
+    try:
+        field = model._meta.get_field(lookup)
+    except Exception:
+        return None
+    return field if field.concrete and not field.many_to_many else None
+
+
+def few_values(field) -> bool:
+    if field.choices or isinstance(field, models.BooleanField):
+        return True
+    bounds = {
+        type(validator): validator.limit_value for validator in field.validators
+        if isinstance(validator, (MinValueValidator, MaxValueValidator))
+    }
+    if len(bounds) < 2:
+        return False
+    return bounds[MaxValueValidator] - bounds[MinValueValidator] < 10
+
+
+def viewset_shapes(registry) -> List[Shape]:
+    """Shapes of the list filters of the viewsets in a router's registry"""
+    shapes = []
+    for _, viewset, _ in registry:
+        queryset = getattr(viewset, 'queryset', None)
+        fields = getattr(viewset, 'filterset_fields', None)
+        if queryset is None or not isinstance(fields, (list, tuple)):
+            continue
+        model = queryset.model
+        if not hasattr(model.objects, 'for_event'):
+            continue
+        shapes.extend(
+            Shape(model, field, f"{viewset.__name__} ?{field}=")
+            for field in fields
+        )
+    return shapes
+
+
+def unique_shapes(shapes: Iterable[Shape]) -> List[Shape]:
+    """``shapes`` without repeats of a model and lookup, unique ones kept"""
+    seen = {}
+    for shape in shapes:
+        key = (shape.model, shape.lookup)
+        if key not in seen or (shape.unique and not seen[key].unique):
+            seen[key] = shape
+    return list(seen.values())
+
+
+def has_unique_constraint(model, fields) -> bool:
+    """Whether a constraint makes ``fields`` (or fewer of them) unique"""
+    if any(model._meta.get_field(field).unique for field in fields):
+        return True
+    fields = set(fields)
+    groups = [set(group) for group in model._meta.unique_together]
+    groups += [
+        set(constraint.fields) for constraint in model._meta.constraints
+        if isinstance(constraint, models.UniqueConstraint)
+        and constraint.fields and constraint.condition is None
+    ]
+    return any(group <= fields for group in groups)
+
+
+def sample_value(shape: Shape, event):
+    return (
+        shape.model.objects.for_event(event)
+        .filter(**{f"{shape.lookup}__isnull": False})
+        .values_list(shape.lookup, flat=True)
+        .first()
+    )
+
+
+def placeholder_value(shape: Shape):
+    """A value of the type ``shape.lookup`` compares against"""
+    model, field = shape.model, None
+    for name in shape.lookup.split('__'):
+        field = model._meta.get_field(name)
+        if field.is_relation:
+            model = field.related_model
+            field = model._meta.pk
+    if field.choices:
+        return field.choices[0][0]
+    if isinstance(field, models.UUIDField):
+        return uuid.uuid4()
+    if isinstance(field, models.BooleanField):
+        return True
+    if isinstance(field, models.IntegerField):
+        return 1
+    return 'x'
+
+
+def explain(queryset) -> str:
+    if connection.vendor != 'postgresql':
+        return queryset.explain()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+
+SQLITE_STEP = re.compile(
+    r'(SCAN|SEARCH) (\w+)(?: AS \w+)?'
+    r'(?: USING (?:COVERING |INTEGER PRIMARY KEY)?(?:INDEX (\w+))?)?'
+    r'(?: \((.*)\))?'
+)
+
+
+def read_sqlite_plan(plan: str, table: str, columns) -> Tuple[str, str]:
+    searched = None
+    for line in plan.splitlines():
+        step = SQLITE_STEP.search(line)
+        if step is None:
+            continue
+        operation, step_table, index, condition = step.groups()
+        if step_table == 'CONSTANT':
+            continue
+        if operation == 'SCAN':
+            return SCAN, step_table
+        if step_table == table and searched is None:
+            constrained = set(re.findall(r'(\w+)\s*[=<>]', condition or ''))
+            searched = (index or 'primary key', constrained)
+    if searched is None:
+        return SCAN, table
+    index, constrained = searched
+    verdict = INDEX if set(columns) <= constrained else PARTIAL
+    return verdict, index
+
+
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+POSTGRES_INDEX = re.compile(
+    r'(?:Index (?:Only )?Scan using (\w+) on|Bitmap Index Scan on (\w+))'
+)
+
+
+def read_postgres_plan(plan: str, table: str, columns) -> Tuple[str, str]:
+    scan = POSTGRES_SCAN.search(plan)
+    if scan:
+        return SCAN, scan.group(1)
+    best = None
+    lines = plan.splitlines()
+    for number, line in enumerate(lines):
+        node = POSTGRES_INDEX.search(line)
+        if node is None:
+            continue
+        index = node.group(1) or node.group(2)
+        condition = next(
+            (
+                following for following in lines[number + 1:number + 3]
+                if 'Index Cond' in following
+            ),
+            '',
+        )
+        if all(re.search(rf'\b{column}\b', condition) for column in columns):
+            return INDEX, index
+        best = best or index
+    return (PARTIAL, best) if best else (SCAN, table)
+
+
+def read_plan(plan: str, table: str, columns) -> Tuple[str, str]:
+    if connection.vendor == 'postgresql':
+        return read_postgres_plan(plan, table, columns)
+    return read_sqlite_plan(plan, table, columns)
+
+
+def audit_shape(shape: Shape, event) -> Finding:
+    value = sample_value(shape, event)
+    placeholder = value is None
+    if placeholder:
+        value = placeholder_value(shape)
+    queryset = shape.model.objects.for_event(event).filter(
+        **{shape.lookup: value}
+    )
+    verdict, detail = read_plan(
+        explain(queryset), shape.model._meta.db_table, shape.columns()
+    )
+    finding = Finding(shape, verdict, detail, placeholder=placeholder)
+    if shape.unique:
+        finding.constrained = has_unique_constraint(
+            shape.model, ['event', shape.lookup]
+        )
+        finding.duplicates = (
+            shape.model.objects.for_event(event)
+            .filter(**{f"{shape.lookup}__isnull": False})
+            .values(shape.lookup)
+            .annotate(rows=Count('pk'))
+            .filter(rows__gt=1)
+            .count()
+        )
+    return finding
+
+
+def audit(shapes: Iterable[Shape], event) -> List[Finding]:
+    return [audit_shape(shape, event) for shape in unique_shapes(shapes)]
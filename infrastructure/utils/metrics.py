@@ -0,0 +1,298 @@
+"""
+Request timings and Prometheus-style metrics.
+
+``ServerTimingMiddleware`` (infrastructure.middleware) times every request
+into a ``RequestTimings``: database queries and time, cache time (for the
+``Timed*Cache`` backends) and serializer time (from the viewset's
+ActionProfile). It answers with a ``Server-Timing`` header and records the
+request in ``registry``:
+
+- ``http_requests_total{route,method,status}``
+- ``http_request_duration_seconds{route,method}`` histogram
+- ``http_request_db_queries_total{route,method}``
+- ``websocket_connections{consumer}`` (MetricsConsumerMixin)
+- ``channel_layer_send_duration_seconds{consumer}`` histogram
+- ``db_connections_total{alias}``: connections Django set up (connected, or
+  checked out of the pool with infrastructure.db_pool)
+- ``db_pool_connections_opened_total{alias}``: connections the pool opened
+
+Routes are URL names ("team-list", "me"), which keeps label values bounded.
+
+The registry lives in process. With ``settings.METRICS_REDIS_URL`` set, each
+worker adds what it recorded to a Redis hash at most every
+``METRICS_FLUSH_INTERVAL`` seconds, and ``render`` reports the sum over all
+workers. Without it (development, tests) ``render`` reports this process.
+"""
+import bisect
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.db.backends.signals import connection_created
+
+from infrastructure.utils.budgets import ActionProfile
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Upper bounds in seconds, as in the Prometheus client defaults
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKET_LABELS = tuple(f"{bound:g}" for bound in BUCKETS) + ('+Inf',)
+
+TYPES = {
+    'http_requests_total': 'counter',
+    'http_request_duration_seconds': 'histogram',
+    'http_request_db_queries_total': 'counter',
+    'websocket_connections': 'gauge',
+    'channel_layer_send_duration_seconds': 'histogram',
+    'db_connections_total': 'counter',
+    'db_pool_connections_opened_total': 'counter',
+}
+
+REDIS_KEY = 'metrics'
+
+Labels = Tuple[Tuple[str, str], ...]
+
+current_timings: ContextVar[Optional['RequestTimings']] = ContextVar(
+    'current_timings', default=None
+)
+
+
+class RequestTimings(ActionProfile):
+    """ActionProfile of a whole request, plus time spent in the cache"""
+
+    def __init__(self):
+        super().__init__()
+        self.cache_time = 0.0
+        self.cache_depth = 0
+
+    def server_timing(self) -> str:
+        return (
+            f'db;desc="{self.queries} queries";dur={self.db_time * 1000:.2f}, '
+            f'cache;dur={self.cache_time * 1000:.2f}, '
+            f'serialize;dur={self.serializer_time * 1000:.2f}, '
+            f'total;dur={self.total_time * 1000:.2f}'
+        )
+
+
+def _timed(name):
+    def method(self, *args, **kwargs):
+        timings = current_timings.get()
+        call = getattr(super(TimedCacheMixin, self), name)
+        # get_many and friends fall back to get etc.; count the outer call
+        if timings is None or timings.cache_depth:
+            return call(*args, **kwargs)
+        timings.cache_depth += 1
+        start = time.perf_counter()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            timings.cache_time += time.perf_counter() - start
+            timings.cache_depth -= 1
+    method.__name__ = name
+    return method
+
+
+class TimedCacheMixin:
+    get = _timed('get')
+    set = _timed('set')
+    add = _timed('add')
+    delete = _timed('delete')
+    get_many = _timed('get_many')
+    set_many = _timed('set_many')
+    delete_many = _timed('delete_many')
+    clear = _timed('clear')
+
+
+class TimedLocMemCache(TimedCacheMixin, LocMemCache):
+    """
+    The async methods call the sync ones in place: local memory never blocks,
+    so async views read and write it without a hop to a worker thread.
+    """
+
+    async def aget(self, key, default=None, version=None):
+        return self.get(key, default, version)
+
+    async def aset(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set(key, value, timeout, version)
+
+    async def aadd(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.add(key, value, timeout, version)
+
+    async def adelete(self, key, version=None):
+        return self.delete(key, version)
+
+
+class TimedRedisCache(TimedCacheMixin, RedisCache):
+    pass
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (name, labels) -> value; histograms as per-bucket (not cumulative)
+        # "_bucket" counts plus "_sum" and "_count"
+        self._values: Dict[Tuple[str, Labels], float] = defaultdict(float)
+        self._last_flush = time.monotonic()
+        self._redis = None
+
+    def inc(self, name: str, labels: Labels, amount: float = 1):
+        with self._lock:
+            self._values[(name, labels)] += amount
+
+    def observe(self, name: str, labels: Labels, seconds: float):
+        bucket = BUCKET_LABELS[bisect.bisect_left(BUCKETS, seconds)]
+        with self._lock:
+            self._values[(f"{name}_bucket", labels + (('le', bucket),))] += 1
+            self._values[(f"{name}_sum", labels)] += seconds
+            self._values[(f"{name}_count", labels)] += 1
+
+    def record_request(self, route: str, method: str, status: int,
+                       timings: RequestTimings):
+        labels = (('route', route), ('method', method))
+        self.inc('http_requests_total', labels + (('status', str(status)),))
+        self.inc('http_request_db_queries_total', labels, timings.queries)
+        self.observe('http_request_duration_seconds', labels, timings.total_time)
+
+    def websocket_opened(self, consumer: str):
+        self.inc('websocket_connections', (('consumer', consumer),))
+
+    def websocket_closed(self, consumer: str):
+        self.inc('websocket_connections', (('consumer', consumer),), -1)
+
+    def snapshot(self) -> Dict[Tuple[str, Labels], float]:
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    # Sharing across workers
+
+    def _client(self):
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(settings.METRICS_REDIS_URL)
+        return self._redis
+
+    def maybe_flush(self):
+        if not settings.METRICS_REDIS_URL:
+            return
+        if time.monotonic() - self._last_flush > settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Move what this worker recorded since the last flush to Redis."""
+        with self._lock:
+            values, self._values = self._values, defaultdict(float)
+            self._last_flush = time.monotonic()
+        if not values:
+            return
+        try:
+            pipeline = self._client().pipeline(transaction=False)
+            for (name, labels), value in values.items():
+                pipeline.hincrbyfloat(REDIS_KEY, json.dumps([name, labels]), value)
+            pipeline.execute()
+        except Exception:
+            logger.exception("Could not flush metrics to Redis")
+            with self._lock:
+                for key, value in values.items():
+                    self._values[key] += value
+
+    def collect(self) -> Dict[Tuple[str, Labels], float]:
+        if not settings.METRICS_REDIS_URL:
+            return self.snapshot()
+        self.flush()
+        values = {}
+        for field, value in self._client().hgetall(REDIS_KEY).items():
+            name, labels = json.loads(field)
+            values[(name, tuple(tuple(label) for label in labels))] = float(value)
+        return values
+
+    def render(self) -> str:
+        """Prometheus text exposition of ``collect()``."""
+        samples = defaultdict(list)
+        buckets = defaultdict(lambda: [0.0] * len(BUCKET_LABELS))
+        for (name, labels), value in sorted(self.collect().items()):
+            if name.endswith('_bucket'):
+                le = dict(labels)['le']
+                base = tuple(label for label in labels if label[0] != 'le')
+                buckets[(name, base)][BUCKET_LABELS.index(le)] = value
+            else:
+                samples[name].append((labels, value))
+        for (name, base), counts in buckets.items():
+            cumulative = 0
+            for le, count in zip(BUCKET_LABELS, counts):
+                cumulative += count
+                samples[name].append((base + (('le', le),), cumulative))
+
+        lines = []
+        for metric, kind in TYPES.items():
+            names = [metric]
+            if kind == 'histogram':
+                names = [f"{metric}_bucket", f"{metric}_sum", f"{metric}_count"]
+            if not any(samples.get(name) for name in names):
+                continue
+            lines.append(f"# TYPE {metric} {kind}")
+            for name in names:
+                for labels, value in samples.get(name, ()):
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        f'{key}="{_escape(value)}"' for key, value in labels
+    )
+    return f"{{{pairs}}}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+
+def _connection_created(sender, connection, **kwargs):
+    registry.inc('db_connections_total', (('alias', connection.alias),))
+
+
+def connect_signals():
+    connection_created.connect(
+        _connection_created, dispatch_uid="metrics_connection_created")
+
+
+class MetricsConsumerMixin:
+    """Counts open websockets per consumer and times channel layer sends"""
+
+    async def websocket_connect(self, message):
+        registry.websocket_opened(self.__class__.__name__)
+        await super().websocket_connect(message)
+
+    async def websocket_disconnect(self, message):
+        registry.websocket_closed(self.__class__.__name__)
+        await super().websocket_disconnect(message)
+
+    async def send_to_group(self, group, message):
+        start = time.perf_counter()
+        try:
+            await self.channel_layer.group_send(group, message)
+        finally:
+            registry.observe(
+                'channel_layer_send_duration_seconds',
+                (('consumer', self.__class__.__name__),),
+                time.perf_counter() - start,
+            )
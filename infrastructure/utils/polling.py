@@ -0,0 +1,73 @@
+"""
+Invalidation behind the async polling endpoints and the help request change
+feed (infrastructure.async_views).
+
+Kept apart from the views so ``InfrastructureConfig.ready`` can connect the
+signal handlers without importing the view modules, whose class attributes
+need the event configuration.
+"""
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from infrastructure.models import HardwareRequest, LightHouse, MentorHelpRequest
+
+# Model -> name of the async view polling it
+POLLED_MODELS = {
+    MentorHelpRequest: 'mentorhelprequests',
+    LightHouse: 'lighthouses',
+    HardwareRequest: 'hardwarerequests',
+}
+
+
+def poll_version_key(name, event_id) -> str:
+    return f"poll-version:{name}:{event_id}"
+
+
+def poll_cache_key(name, event_id, version, query_string) -> str:
+    return f"poll:{name}:{event_id}:{version}:{query_string}"
+
+
+def invalidate_poll(name, event_id):
+    cache.set(poll_version_key(name, event_id), uuid.uuid4().hex, None)
+
+
+def change_feed_group(event_id) -> str:
+    return f"mentorhelprequest-changes.{event_id}"
+
+
+def notify_change(event_id):
+    """Wake the change feeds of an event"""
+    layer = get_channel_layer()
+    if layer is not None:
+        async_to_sync(layer.group_send)(
+            change_feed_group(event_id), {'type': 'mentorhelprequest.changed'}
+        )
+
+
+def _invalidate_instance(sender, instance, **kwargs):
+    invalidate_poll(POLLED_MODELS[sender], instance.event_id)
+
+
+def _notify_change_feed(sender, instance, **kwargs):
+    event_id = instance.event_id
+    # Once committed, so the woken feeds read the change
+    transaction.on_commit(lambda: notify_change(event_id), robust=True)
+
+
+def connect_signals():
+    for model, name in POLLED_MODELS.items():
+        post_save.connect(
+            _invalidate_instance, sender=model, dispatch_uid=f"poll_{name}_saved")
+        post_delete.connect(
+            _invalidate_instance, sender=model, dispatch_uid=f"poll_{name}_deleted")
+    post_save.connect(
+        _notify_change_feed, sender=MentorHelpRequest,
+        dispatch_uid="change_feed_saved")
+    post_delete.connect(
+        _notify_change_feed, sender=MentorHelpRequest,
+        dispatch_uid="change_feed_deleted")
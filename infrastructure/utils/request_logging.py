@@ -0,0 +1,115 @@
+"""
+Request and response logging that stays off the request path.
+
+``LoggingMixin`` only builds a log record when ``django.request`` is enabled
+for DEBUG, and then logs a ``summarize``d copy of the data: bounded in depth,
+keys, items and string length, with personal fields (visa support, phone
+numbers, emergency contacts, secrets) redacted. Full payloads of list
+endpoints or RSVPs never reach the log.
+
+The handlers in ``settings.LOGGING`` are built with ``queued``: a
+QueueHandler formats the record on the request thread and a QueueListener
+thread does the writing, so a slow disk or console never blocks a request.
+"""
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+from django.core.files.uploadedfile import UploadedFile
+from django.utils.module_loading import import_string
+
+REDACTED = '[redacted]'
+
+# Substrings of field names whose values are never logged
+REDACTED_FIELDS = (
+    'visa', 'phone', 'emergency_contact', 'password', 'secret', 'token',
+    'authorization',
+)
+
+MAX_DEPTH = 3
+MAX_KEYS = 30
+MAX_ITEMS = 3
+MAX_STRING = 200
+
+
+def is_redacted(key: Any) -> bool:
+    key = str(key).lower()
+    return any(field in key for field in REDACTED_FIELDS)
+
+
+def summarize(data: Any, depth: int = 0) -> Any:
+    """
+    Size-bounded, redacted copy of request or response ``data``: lists keep
+    their first MAX_ITEMS items and their length, dicts their first MAX_KEYS
+    keys, strings MAX_STRING characters; anything nested deeper than MAX_DEPTH
+    is replaced by its type.
+    """
+    if data is None or isinstance(data, (bool, int, float)):
+        return data
+    if isinstance(data, str):
+        if len(data) > MAX_STRING:
+            return f"{data[:MAX_STRING]}... ({len(data)} chars)"
+        return data
+    if isinstance(data, UploadedFile):
+        return f"<file {data.name} ({data.size} bytes)>"
+    if depth >= MAX_DEPTH:
+        return f"<{type(data).__name__}>"
+    if isinstance(data, dict) or hasattr(data, 'items'):
+        return _summarize_mapping(data, depth)
+    if isinstance(data, (list, tuple)):
+        summary = [summarize(item, depth + 1) for item in data[:MAX_ITEMS]]
+        if len(data) > MAX_ITEMS:
+            summary.append(f"... {len(data) - MAX_ITEMS} more items")
+        return summary
+    return summarize(str(data), depth)
+
+
+def _summarize_mapping(data, depth: int) -> dict:
+    summary = {}
+    for index, (key, value) in enumerate(data.items()):
+        if index == MAX_KEYS:
+            summary['...'] = f"{len(data) - MAX_KEYS} more keys"
+            break
+        summary[key] = REDACTED if is_redacted(key) else summarize(value, depth + 1)
+    return summary
+
+
+class QueuedHandler(QueueHandler):
+    """Hands records to a QueueListener thread that emits them to ``handler``"""
+
+    def __init__(self, handler: logging.Handler):
+        super().__init__(queue.SimpleQueue())
+        self.handler = handler
+        self.listener = QueueListener(self.queue, handler)
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        # Writes out what is still queued; safe to call more than once
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def close(self):
+        self.stop()
+        self.handler.close()
+        super().close()
+
+
+def queued(handler_class: str, **kwargs) -> QueuedHandler:
+    """
+    dictConfig factory for a QueuedHandler around a ``handler_class`` built
+    with ``kwargs``, e.g.
+
+        'file': {
+            '()': 'infrastructure.utils.request_logging.queued',
+            'handler_class': 'logging.handlers.RotatingFileHandler',
+            'filename': 'logs/request.log',
+            'formatter': 'verbose',
+        }
+
+    The formatter applies on the request thread; the wrapped handler writes
+    the formatted message as is.
+    """
+    return QueuedHandler(import_string(handler_class)(**kwargs))
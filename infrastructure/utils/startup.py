@@ -0,0 +1,151 @@
+"""
+Startup instrumentation shared by the profile_startup and benchmark_imports
+commands.
+
+``run_probe`` executes inside a fresh interpreter started with
+``python -X importtime``: it records every database query and outbound socket
+call made while Django sets up and the given modules are imported, attributing
+each to the module whose top-level code (or class body) triggered it. Nothing
+here imports Django at module level, so the probe is in place before the app
+is loaded.
+"""
+import json
+import socket
+import sys
+import time
+from contextlib import contextmanager
+
+# Printed in front of the JSON report so it can be told apart from whatever
+# the imported modules write to stdout
+REPORT_MARKER = "STARTUP-REPORT "
+
+PROBE_SCRIPT = """
+from infrastructure.utils.startup import run_probe
+run_probe({modules!r}, {commands!r}, offline={offline!r})
+"""
+
+
+def parse_importtime(stderr):
+    """(cumulative us, module) for each line of -X importtime output."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        entries.append((int(cumulative), module.rstrip()))
+    return entries
+
+
+def read_report(stdout):
+    for line in reversed(stdout.splitlines()):
+        if line.startswith(REPORT_MARKER):
+            return json.loads(line[len(REPORT_MARKER):])
+    raise ValueError("No startup report in probe output")
+
+
+def import_origin(phase):
+    """
+    (module, "file:line") of the innermost top-level code on the stack.
+
+    Falls back to the current probe phase when the call did not come from
+    module or class-body code, e.g. from an AppConfig.ready() hook.
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        if frame.f_code.co_name == "<module>":
+            module = frame.f_globals.get("__name__")
+            if module in (None, "__main__"):
+                break
+            return module, f"{frame.f_code.co_filename}:{frame.f_lineno}"
+        frame = frame.f_back
+    return phase, ""
+
+
+class SideEffectRecorder:
+    """Patches the DB cursor and socket entry points to log calls."""
+
+    def __init__(self, offline=False):
+        self.offline = offline
+        self.phase = "django.setup()"
+        self.calls = []
+
+    def record(self, kind, detail):
+        module, location = import_origin(self.phase)
+        self.calls.append({
+            "kind": kind,
+            "module": module,
+            "location": location,
+            "detail": detail[:200],
+        })
+
+    @contextmanager
+    def installed(self):
+        from django.db.backends.utils import CursorWrapper
+
+        recorder = self
+        execute = CursorWrapper._execute_with_wrappers
+        connect = socket.socket.connect
+        getaddrinfo = socket.getaddrinfo
+
+        def _execute_with_wrappers(self, sql, params, many, executor):
+            recorder.record("db", str(sql))
+            return execute(self, sql, params, many, executor)
+
+        def _connect(self, address):
+            recorder.record("network", f"connect {address}")
+            if recorder.offline:
+                raise OSError("Network access blocked by profile_startup")
+            return connect(self, address)
+
+        def _getaddrinfo(host, *args, **kwargs):
+            recorder.record("network", f"getaddrinfo {host}")
+            if recorder.offline:
+                raise socket.gaierror("Network access blocked by profile_startup")
+            return getaddrinfo(host, *args, **kwargs)
+
+        CursorWrapper._execute_with_wrappers = _execute_with_wrappers
+        socket.socket.connect = _connect
+        socket.getaddrinfo = _getaddrinfo
+        try:
+            yield self
+        finally:
+            CursorWrapper._execute_with_wrappers = execute
+            socket.socket.connect = connect
+            socket.getaddrinfo = getaddrinfo
+
+
+def run_probe(modules, commands=(), offline=False):
+    """Set Django up, import ``modules``, load ``commands``; print a report."""
+    import importlib
+
+    recorder = SideEffectRecorder(offline=offline)
+    timings = {}
+    errors = {}
+    with recorder.installed():
+        start = time.perf_counter()
+        import django
+        django.setup()
+        timings["django.setup()"] = time.perf_counter() - start
+
+        from django.core.management import get_commands, load_command_class
+
+        targets = [(module, importlib.import_module, (module,)) for module in modules]
+        available = get_commands()
+        for name in commands:
+            app_name = available.get(name)
+            if app_name is None:
+                errors[f"command {name}"] = "Unknown command"
+                continue
+            targets.append((f"command {name}", load_command_class, (app_name, name)))
+
+        for label, load, args in targets:
+            recorder.phase = label
+            start = time.perf_counter()
+            try:
+                load(*args)
+            except Exception as e:
+                errors[label] = f"{type(e).__name__}: {e}"
+            timings[label] = time.perf_counter() - start
+
+    report = {"timings": timings, "calls": recorder.calls, "errors": errors}
+    print(REPORT_MARKER + json.dumps(report))
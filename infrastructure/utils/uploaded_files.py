@@ -0,0 +1,152 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Iterable, Iterator, List
+import logging
+
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from infrastructure.models import UploadedFile
+
+try:
+    from storages.backends.s3 import S3Storage
+    from storages.utils import clean_name, safe_join
+except ImportError:  # pragma: nocover
+    S3Storage = None
+
+logger = logging.getLogger(__name__)
+
+# S3 (and R2) DeleteObjects accepts at most 1000 keys per request
+S3_DELETE_OBJECTS_LIMIT = 1000
+
+
+@dataclass
+class CleanupSummary:
+    scanned: int = 0
+    deleted_files: int = 0
+    deleted_rows: int = 0
+    failed: List[str] = field(default_factory=list)
+
+
+def _chunks(items: List, size: int) -> Iterator[List]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def unclaimed_uploaded_files(grace_period: timedelta):
+    """Unclaimed files older than ``grace_period`` that nothing points at.
+
+    Files still referenced (e.g. a hardware image) are never orphans, even
+    if they were not flagged as claimed.
+    """
+    queryset = UploadedFile.objects.filter(
+        claimed=False, created_at__lt=timezone.now() - grace_period
+    )
+    for relation in UploadedFile._meta.related_objects:
+        queryset = queryset.filter(**{f"{relation.name}__isnull": True})
+    return queryset
+
+
+def _s3_key(storage, name: str) -> str:
+    """The object key S3Storage stores ``name`` under"""
+    return safe_join(storage.location, clean_name(name))
+
+
+def _delete_s3_keys(storage, names: List[str]) -> List[str]:
+    keys = {_s3_key(storage, name): name for name in names}
+    response = storage.bucket.meta.client.delete_objects(
+        Bucket=storage.bucket.name,
+        Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+    )
+    return [keys[error["Key"]] for error in response.get("Errors", [])]
+
+
+def _delete_names(storage, names: List[str]) -> List[str]:
+    failed = []
+    for name in names:
+        try:
+            storage.delete(name)
+        except Exception:
+            logger.exception(f"Failed to delete {name} from storage")
+            failed.append(name)
+    return failed
+
+
+def delete_from_storage(
+    names: Iterable[str], storage=None, max_workers: int = 8
+) -> List[str]:
+    """Delete ``names`` from storage in parallel and return the ones that failed.
+
+    S3-compatible backends are sent batched ``DeleteObjects`` requests of up to
+    1000 keys; any other backend falls back to ``storage.delete`` per name.
+    """
+    storage = storage or default_storage
+    names = list(names)
+    if not names:
+        return []
+    if S3Storage is not None and isinstance(storage, S3Storage):
+        delete_batch = _delete_s3_keys
+        chunk_size = S3_DELETE_OBJECTS_LIMIT
+    else:
+        delete_batch = _delete_names
+        chunk_size = max(1, -(-len(names) // max_workers))
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            (chunk, executor.submit(delete_batch, storage, chunk))
+            for chunk in _chunks(names, chunk_size)
+        ]
+        for chunk, future in futures:
+            try:
+                failed.extend(future.result())
+            except Exception:
+                logger.exception("Failed to delete a batch from storage")
+                failed.extend(chunk)
+    return failed
+
+
+def remove_unclaimed_uploaded_files(
+    grace_period: timedelta = timedelta(days=1),
+    batch_size: int = S3_DELETE_OBJECTS_LIMIT,
+    max_workers: int = 8,
+    dry_run: bool = False,
+    storage=None,
+) -> CleanupSummary:
+    """Remove orphaned uploads from storage, then their rows, one batch at a time.
+
+    Rows are only deleted once their file is gone from storage so a failed
+    storage delete is retried on the next run instead of leaking the object.
+    Rows are removed with a single DELETE per batch, bypassing the per-row
+    ``post_delete`` storage call.
+    """
+    summary = CleanupSummary()
+    queryset = unclaimed_uploaded_files(grace_period).order_by("pk")
+    last_pk = None
+    while True:
+        batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(batch.values_list("pk", "file")[:batch_size])
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        summary.scanned += len(rows)
+        if dry_run:
+            continue
+
+        names = [name for _, name in rows if name]
+        failed = set(delete_from_storage(names, storage, max_workers))
+        summary.failed.extend(failed)
+        summary.deleted_files += len(names) - len(failed)
+
+        pks = [pk for pk, name in rows if name not in failed]
+        # A plain DELETE without the delete signals: UploadedFile.post_delete
+        # would delete each file from storage again, one request per row.
+        # The storage deletes take a while, so the DELETE checks the unclaimed
+        # and unreferenced conditions again. A row claimed or referenced in
+        # the meantime is kept, so there is never anything to cascade and no
+        # attendee whose me/ cache needs invalidating.
+        summary.deleted_rows += unclaimed_uploaded_files(grace_period).filter(
+            pk__in=pks
+        )._raw_delete(UploadedFile.objects.db)
+    return summary
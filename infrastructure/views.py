@@ -1,19 +1,27 @@
+import hmac
+
+from django.conf import settings
 from django.contrib.auth.models import Group
 from django.core.cache import cache
 from django.core.exceptions import PermissionDenied, ValidationError
-from django.http import Http404
+from django.db.models import (Count, Exists, F, OuterRef, Prefetch, Subquery,
+                              Value)
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page, never_cache
-from django.views.decorators.vary import vary_on_headers
+from django.views.decorators.cache import never_cache
 from django_keycloak_auth.decorators import keycloak_roles
 from rest_framework import permissions, status, viewsets
-from rest_framework.decorators import api_view
+from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 from infrastructure.keycloak import KeycloakRoles
-from infrastructure.mixins import LoggingMixin, EventScopedLoggingViewSet
-from infrastructure.event_context import get_active_event
+from infrastructure.mixins import (LoggingMixin, EventScopedLoggingViewSet,
+                                   ReplicaReadMixin)
+from infrastructure.pagination import HistoryCursorPagination
+from infrastructure.utils.budgets import Budget
+from infrastructure.event_context import get_active_event, get_current_event
 from infrastructure.models import (Application,
                                    Attendee, AttendeePreference,
                                    DestinyTeam, DestinyTeamAttendeeVibe,
@@ -60,15 +68,23 @@ from infrastructure.serializers import (ApplicationSerializer,
                                         SkillProficiencyDetailSerializer,
                                         SkillProficiencySerializer,
                                         SkillSerializer, TableCreateSerializer,
-                                        TableDetailSerializer, TableSerializer,
+                                        TableDetailSerializer, TableListSerializer,
+                                        TableSerializer, TABLE_INCLUDES,
                                         TeamCreateSerializer, TeamUpdateSerializer,
                                         TeamDetailSerializer, TeamSerializer,
                                         WorkshopAttendeeSerializer,
-                                        WorkshopSerializer, EventSerializer)
+                                        WorkshopSerializer, EventSerializer,
+                                        workshop_prefetches)
+from infrastructure.utils.attendee_detail import (attendee_detail_data,
+                                                  prepare_attendee_for_detail)
+from infrastructure.utils.choice_masks import profile_counts
+from infrastructure.utils.metrics import PROMETHEUS_CONTENT_TYPE, registry
 from infrastructure.filters import (
+    AttendeeFilter,
     TeamFilter,
     MentorHelpRequestFilter,
     ProjectFilter,
+    HardwareFilter,
     HardwareDeviceFilter,
     HardwareRequestFilter,
     WorkshopFilter,
@@ -82,6 +98,7 @@ from infrastructure.utils.rsvp_helpers import (
     get_or_create_attendee_from_request,
     handle_keycloak_account_creation,
 )
+from infrastructure.utils.gavel import gavel_projects, is_community_hack, iter_gavel_csv
 
 
 def attendee_from_userinfo(request):  # pragma: nocover
@@ -91,7 +108,9 @@ def attendee_from_userinfo(request):  # pragma: nocover
         raise Http404(f"No attendee matches the authentication_id: \"{request.userinfo.get('sub')}\"")
 
 
-def check_user(request, pk, special_roles={KeycloakRoles.ADMIN, KeycloakRoles.ORGANIZER}):
+def check_user(request, pk, special_roles=None):
+    if special_roles is None:
+        special_roles = {KeycloakRoles.ADMIN, KeycloakRoles.ORGANIZER}
     if any(special_role in request.roles for special_role in special_roles):
         return "admin"
     if str(attendee_from_userinfo(request).id) != str(pk):
@@ -99,18 +118,6 @@ def check_user(request, pk, special_roles={KeycloakRoles.ADMIN, KeycloakRoles.OR
     return "user"
 
 
-def prepare_attendee_for_detail(attendee, event=None):
-    if event is None:
-        event = get_active_event()
-    attendee.skill_proficiencies = SkillProficiency.objects.for_event(event).filter(attendee=attendee)
-    attendee.team = Team.objects.for_event(event).filter(attendees=attendee).first()
-    attendee.hardware_devices = HardwareDevice.objects.for_event(event).filter(checked_out_to=attendee.id)
-    attendee.workshops = WorkshopAttendee.objects.for_event(event).filter(attendee=attendee.id)
-    return attendee
-
-
-@cache_page(60 * 3)
-@vary_on_headers("Authorization")
 @keycloak_roles([
     KeycloakRoles.ORGANIZER,
     KeycloakRoles.ADMIN,
@@ -136,13 +143,9 @@ def me(request):
     API endpoint for getting detailed information about an authenticated user.
     """
     if request.method == "GET":
-        event = get_active_event()
+        event = get_current_event() or get_active_event()
         attendee = attendee_from_userinfo(request)
-        attendee.skill_proficiencies = SkillProficiency.objects.for_event(event).filter(
-            attendee=attendee)
-        attendee = prepare_attendee_for_detail(attendee, event)
-        serializer = AttendeeDetailSerializer(attendee)
-        return Response(serializer.data)
+        return Response(attendee_detail_data(attendee, event))
     else:  # PATCH
         attendee = attendee_from_userinfo(request)
         serializer = AttendeePatchSerializer(data=request.data, partial=True)
@@ -164,21 +167,29 @@ def me(request):
                             status=status.HTTP_400_BAD_REQUEST)
 
 
-class AttendeeViewSet(LoggingMixin, viewsets.ModelViewSet):
+class AttendeeViewSet(ReplicaReadMixin, LoggingMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows users to be viewed or edited.
     """
     queryset = Attendee.objects.all().order_by('-date_joined')
     permission_classes = [permissions.AllowAny]
-    filterset_fields = [
-        'first_name', 'last_name', 'communications_platform_username', 'email',
-        'participation_class', 'participation_role', 'checked_in_at'
-    ]
+    filterset_class = AttendeeFilter
     keycloak_roles = {
         'GET': [KeycloakRoles.ORGANIZER, KeycloakRoles.ADMIN, KeycloakRoles.ATTENDEE],
         'DELETE': [KeycloakRoles.ORGANIZER, KeycloakRoles.ADMIN],
         'PATCH': [KeycloakRoles.ORGANIZER, KeycloakRoles.ADMIN, KeycloakRoles.ATTENDEE]
     }
+    budgets = {
+        'list': Budget(queries=2),
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.prefetch_related(
+                Prefetch('guardian_of', queryset=Attendee.objects.only('id'))
+            )
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'partial_update':
@@ -308,10 +319,14 @@ class TableViewSet(EventScopedLoggingViewSet):
     """
     queryset = Table.objects.all()
     permission_classes = [permissions.AllowAny]
+    budgets = {
+        'list': Budget(queries=2),
+        'retrieve': Budget(queries=5),
+    }
 
     def get_serializer_class(self):
         if self.action == 'list':
-            return TableSerializer
+            return TableListSerializer
         if self.action == 'create':
             return TableCreateSerializer
         return TableSerializer
@@ -327,12 +342,46 @@ class TableViewSet(EventScopedLoggingViewSet):
             table.lighthouse = LightHouse.objects.for_event(event).get(table=table)
         except LightHouse.DoesNotExist:
             table.lighthouse = None
-        serializer = TableDetailSerializer(table)
+        serializer = self.profile.timed_serializer(TableDetailSerializer(table))
         return Response(serializer.data)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='include', type=OpenApiTypes.STR, required=False,
+                description="Comma-separated expansions: "
+                            f"{', '.join(TABLE_INCLUDES)}"
+            ),
+        ],
+        responses=TableListSerializer(many=True),
+    )
     def list(self, request):
-        queryset = self.get_queryset()
-        serializer = TableSerializer(queryset, many=True)
+        event = self.get_event()
+        include = {
+            name.strip() for name in request.query_params.get('include', '').split(',')
+        } & set(TABLE_INCLUDES)
+        teams = Team.objects.for_event(event).filter(table=OuterRef('pk'))
+        lighthouses = LightHouse.objects.for_event(event).filter(
+            table=OuterRef('pk')
+        ).order_by('-updated_at')
+        queryset = self.get_queryset().annotate(
+            is_claimed=Exists(teams),
+            team_id=Subquery(teams.values('id')[:1]),
+            team_name=Subquery(teams.values('name')[:1]),
+            lighthouse_announcement_pending=Subquery(
+                lighthouses.values('announcement_pending')[:1]),
+            lighthouse_mentor_requested=Subquery(
+                lighthouses.values('mentor_requested')[:1]),
+        ).order_by('number')
+        if 'team' in include:
+            queryset = queryset.select_related('team')
+        if 'lighthouse' in include:
+            queryset = queryset.annotate(
+                lighthouse_id=Subquery(lighthouses.values('id')[:1]),
+                lighthouse_ip_address=Subquery(lighthouses.values('ip_address')[:1]),
+            )
+        serializer = self.profile.timed_serializer(TableListSerializer(
+            queryset, many=True, context={'include': include}))
         return Response(serializer.data)
 
 
@@ -343,6 +392,18 @@ class TeamViewSet(EventScopedLoggingViewSet):
     queryset = Team.objects.all()
     permission_classes = [permissions.AllowAny]
     filterset_class = TeamFilter
+    budgets = {
+        'list': Budget(queries=3),
+        'retrieve': Budget(queries=5),
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.prefetch_related(
+                Prefetch('attendees', queryset=Attendee.objects.only('id'))
+            )
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -357,7 +418,17 @@ class TeamViewSet(EventScopedLoggingViewSet):
 
     def retrieve(self, request, pk=None):
         event = self.get_event()
-        team = get_object_or_404(Team.objects.for_event(event), pk=pk)
+        team = get_object_or_404(
+            Team.objects.for_event(event).select_related(
+                'table__location'
+            ).prefetch_related(
+                Prefetch(
+                    'attendees',
+                    queryset=Attendee.objects.select_related('profile_image')
+                )
+            ),
+            pk=pk
+        )
         try:
             team.project = Project.objects.for_event(event).get(team=team)
         except Project.DoesNotExist:
@@ -366,7 +437,7 @@ class TeamViewSet(EventScopedLoggingViewSet):
             team.lighthouse = LightHouse.objects.for_event(event).get(table=team.table)
         except (Table.DoesNotExist, LightHouse.DoesNotExist):
             team.lighthouse = None
-        serializer = TeamDetailSerializer(team)
+        serializer = self.profile.timed_serializer(TeamDetailSerializer(team))
         return Response(serializer.data)
 
     def partial_update(self, request, *args, **kwargs):
@@ -420,6 +491,9 @@ class LightHouseViewSet(LoggingMixin, viewsets.ViewSet):
         'PUT': [KeycloakRoles.ORGANIZER, KeycloakRoles.ADMIN],
         'PATCH': [KeycloakRoles.ORGANIZER, KeycloakRoles.ADMIN]
     }
+    budgets = {
+        'list': Budget(queries=2),
+    }
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -428,7 +502,7 @@ class LightHouseViewSet(LoggingMixin, viewsets.ViewSet):
 
     def list(self, request):
         event = get_active_event()
-        queryset = LightHouse.objects.for_event(event).all()
+        queryset = LightHouse.objects.for_event(event).select_related('table')
         lighthouses = []
         for lighthouse in queryset:
             lighthouses.append(
@@ -440,7 +514,8 @@ class LightHouseViewSet(LoggingMixin, viewsets.ViewSet):
                     "announcement_pending": lighthouse.announcement_pending
                 }
             )
-        serializer = LightHouseSerializer(lighthouses, many=True)
+        serializer = self.profile.timed_serializer(
+            LightHouseSerializer(lighthouses, many=True))
         return Response(serializer.data)
 
     def create(self, request):
@@ -479,6 +554,15 @@ class MentorHelpRequestViewSet(EventScopedLoggingViewSet):
         'DELETE': [KeycloakRoles.ORGANIZER, KeycloakRoles.ADMIN, KeycloakRoles.ATTENDEE],
         'PATCH': [KeycloakRoles.ORGANIZER, KeycloakRoles.ADMIN, KeycloakRoles.MENTOR, KeycloakRoles.ATTENDEE]
     }
+    budgets = {
+        'list': Budget(queries=2),
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.select_related('team__table__location', 'reporter')
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -486,13 +570,15 @@ class MentorHelpRequestViewSet(EventScopedLoggingViewSet):
         return self.serializer_class
 
 
-class MentorHelpRequestViewSetHistoryViewSet(LoggingMixin, viewsets.ModelViewSet):
+class MentorHelpRequestViewSetHistoryViewSet(ReplicaReadMixin, LoggingMixin,
+                                             viewsets.ModelViewSet):
     """
     API endpoint that allows mentor help requests historical records to be viewed.
     """
     queryset = MentorHelpRequest.history.model.objects.all()
     permission_classes = [permissions.AllowAny]
     serializer_class = MentorHelpRequestHistorySerializer
+    pagination_class = HistoryCursorPagination
     filterset_fields = [
         'id', 'reporter', 'mentor', 'team', 'status'
     ]
@@ -502,6 +588,9 @@ class MentorHelpRequestViewSetHistoryViewSet(LoggingMixin, viewsets.ModelViewSet
         'DELETE': [KeycloakRoles.ADMIN],
         'PATCH': [KeycloakRoles.ADMIN]
     }
+    budgets = {
+        'list': Budget(queries=2),
+    }
 
     def get_queryset(self):
         event = get_active_event()
@@ -583,6 +672,39 @@ class ProjectViewSet(EventScopedLoggingViewSet):
     filterset_class = ProjectFilter
 
 
+class GavelExportViewSet(viewsets.ViewSet):
+    """
+    API endpoint that exports the event's projects as a Gavel import csv.
+    """
+    permission_classes = [permissions.AllowAny]
+    keycloak_roles = {
+        'GET': [KeycloakRoles.ORGANIZER, KeycloakRoles.ADMIN],
+    }
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='excluded', type=OpenApiTypes.BOOL, required=False,
+                description="Export the projects excluded from judging instead"
+            ),
+        ],
+        responses={(200, 'text/csv'): OpenApiTypes.STR},
+    )
+    def list(self, request):
+        event = get_current_event() or get_active_event()
+        excluded = request.query_params.get('excluded', '').lower() in ('1', 'true')
+        projects = (
+            project for project in gavel_projects(event).iterator()
+            if is_community_hack(project) == excluded
+        )
+        filename = "projects_excluded.csv" if excluded else "projects.csv"
+        response = StreamingHttpResponse(
+            iter_gavel_csv(projects), content_type="text/csv"
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
 class GroupViewSet(LoggingMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows groups to be viewed or edited.
@@ -609,6 +731,26 @@ def hardware_count(hardware_type, event):
     return hardware_devices_available, requests_checked_out, hardware_devices_total
 
 
+def with_hardware_counts(queryset, event):
+    """hardware_count for every hardware type of ``queryset``, in the same query"""
+    def count(rows):
+        return Coalesce(
+            Subquery(
+                rows.order_by().values('hardware').annotate(
+                    count=Count('pk')).values('count')
+            ),
+            Value(0),
+        )
+
+    devices = HardwareDevice.objects.for_event(event).filter(hardware=OuterRef('pk'))
+    requests = HardwareRequest.objects.for_event(event).filter(hardware=OuterRef('pk'))
+    return queryset.annotate(
+        total=count(devices),
+        checked_out=count(requests.filter(status="C")),
+        taken=count(requests.filter(status__in=["A", "C"])),
+    ).annotate(available=F('total') - F('taken'))
+
+
 class HardwareViewSet(EventScopedLoggingViewSet):
     """
     API endpoint that allows hardware types to be viewed or edited.
@@ -616,7 +758,7 @@ class HardwareViewSet(EventScopedLoggingViewSet):
     queryset = Hardware.objects.all()
     serializer_class = HardwareSerializer
     permission_classes = [permissions.AllowAny]
-    filterset_fields = ['relates_to_destiny_hardware', 'tags']
+    filterset_class = HardwareFilter
     keycloak_roles = {
         'OPTIONS': [KeycloakRoles.ATTENDEE, KeycloakRoles.ADMIN, KeycloakRoles.ORGANIZER, KeycloakRoles.SPONSOR, KeycloakRoles.VOLUNTEER, KeycloakRoles.MENTOR, KeycloakRoles.JUDGE],
         # organizers need GET to view hardware in requests
@@ -625,26 +767,10 @@ class HardwareViewSet(EventScopedLoggingViewSet):
         'DELETE': [KeycloakRoles.ADMIN, KeycloakRoles.SPONSOR],
         'PATCH': [KeycloakRoles.ADMIN, KeycloakRoles.ORGANIZER, KeycloakRoles.VOLUNTEER, KeycloakRoles.SPONSOR]
     }
-
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        filters = {}
-        for filterset_field in self.filterset_fields:
-            if self.request.query_params.get(filterset_field):
-                filterset_value = self.request.query_params.get(filterset_field)
-                if filterset_field == "tags":
-                    if not isinstance(filterset_value, list):
-                        filterset_value = filterset_value.split(",")
-                    filterset_field = "tags__contains"
-                filters[filterset_field] = filterset_value
-        if filters:
-            if "tags__contains" in filters:
-                for tag in list(filters["tags__contains"]):
-                    filters["tags__contains"] = tag
-                    queryset = queryset.filter(**filters)
-            else:
-                queryset = queryset.filter(**filters)
-        return queryset
+    budgets = {
+        'list': Budget(queries=3),
+        'retrieve': Budget(queries=7),
+    }
 
     def _iterate_hardware_count(self, hardware_type, event):
         hardware_devices_available, hardware_devices_checked_out, hardware_devices_total = hardware_count(hardware_type, event)
@@ -658,15 +784,17 @@ class HardwareViewSet(EventScopedLoggingViewSet):
         self._iterate_hardware_count(hardware_type, event)
         hardware_type.hardware_devices = HardwareDevice.objects.for_event(event).filter(
             hardware=hardware_type)
-        serializer = HardwareCountDetailSerializer(hardware_type)
+        serializer = self.profile.timed_serializer(
+            HardwareCountDetailSerializer(hardware_type))
         return Response(serializer.data)
 
     def list(self, request):
         event = self.get_event()
-        hardware_types = self.get_queryset()
-        for hardware_type in hardware_types:
-            self._iterate_hardware_count(hardware_type, event)
-        serializer = HardwareCountSerializer(hardware_types, many=True)
+        hardware_types = with_hardware_counts(
+            self.filter_queryset(self.get_queryset()), event
+        ).select_related('image')
+        serializer = self.profile.timed_serializer(
+            HardwareCountSerializer(hardware_types, many=True))
         return Response(status=200, data=serializer.data)
 
     def get_serializer_class(self):
@@ -714,6 +842,17 @@ class HardwareRequestsViewSet(EventScopedLoggingViewSet):
         "PATCH": [KeycloakRoles.ORGANIZER, KeycloakRoles.ADMIN, KeycloakRoles.ATTENDEE],
         "DELETE": [KeycloakRoles.ATTENDEE, KeycloakRoles.MENTOR, KeycloakRoles.JUDGE, KeycloakRoles.ADMIN, KeycloakRoles.ORGANIZER, KeycloakRoles.VOLUNTEER]
     }
+    budgets = {
+        'list': Budget(queries=3),
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.select_related('requester', 'team').prefetch_related(
+                Prefetch('team__attendees', queryset=Attendee.objects.only('id'))
+            )
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -754,14 +893,19 @@ class HardwareRequestsViewSet(EventScopedLoggingViewSet):
         return super().delete(request, pk=pk, **kwargs)
 
 
-class HardwareDeviceHistoryViewSet(LoggingMixin, viewsets.ModelViewSet):
+class HardwareDeviceHistoryViewSet(ReplicaReadMixin, LoggingMixin,
+                                   viewsets.ModelViewSet):
     """
     API endpoint that allows hardware device historical records to be viewed.
     """
     queryset = HardwareDevice.history.model.objects.all()
     permission_classes = [permissions.AllowAny]
     serializer_class = HardwareDeviceHistorySerializer
-    filterset_fields = ['hardware', 'checked_out_to', 'serial']
+    pagination_class = HistoryCursorPagination
+    filterset_fields = ['id', 'hardware', 'checked_out_to', 'serial']
+    budgets = {
+        'list': Budget(queries=2),
+    }
 
     def get_queryset(self):
         event = get_active_event()
@@ -795,7 +939,7 @@ class ApplicationQuestionViewSet(EventScopedLoggingViewSet):
         return Response(serializer.data)
 
 
-class ApplicationViewSet(EventScopedLoggingViewSet):
+class ApplicationViewSet(ReplicaReadMixin, EventScopedLoggingViewSet):
     """
     API endpoint that allows applications to be viewed or edited.
     """
@@ -810,6 +954,9 @@ class ApplicationViewSet(EventScopedLoggingViewSet):
         'DELETE': [KeycloakRoles.ORGANIZER, KeycloakRoles.ADMIN],
         'PATCH': [KeycloakRoles.ORGANIZER, KeycloakRoles.ADMIN],
     }
+    budgets = {
+        'list': Budget(queries=3),
+    }
 
     def get_queryset(self):
         """Optimize queryset with prefetch for actions that need question responses"""
@@ -864,10 +1011,13 @@ class ApplicationViewSet(EventScopedLoggingViewSet):
                 event
             ).get(id=response.data['id'])
 
-            questions = ApplicationQuestion.objects.for_event(event)
-            questions_list = list(questions)
+            questions = ApplicationQuestion.objects.for_event(
+                event
+            ).prefetch_related('choices')
 
-            for question in questions_list:
+            app_responses = []
+            selected_choices = []
+            for question in questions:
                 if question.question_key in dynamic_responses:
                     value = dynamic_responses[question.question_key]
 
@@ -875,32 +1025,34 @@ class ApplicationViewSet(EventScopedLoggingViewSet):
                             (isinstance(value, list) and len(value) == 0)):
                         continue
 
-                    app_response = ApplicationResponse.objects.create(
+                    app_response = ApplicationResponse(
                         application=application,
-                        question=question,
-                        question_text_snapshot=question.question_text
+                        question=question
                     )
 
                     if question.question_type in ['S', 'M']:
-                        choices_dict = {
-                            c.choice_key: c.choice_text
-                            for c in question.choices.all()
-                        }
-                        app_response.choices_snapshot = choices_dict
-
                         selected_keys = value if isinstance(value, list) else [value]
-                        selected_choices = question.choices.filter(
-                            choice_key__in=selected_keys
-                        )
-                        app_response.save()
-                        app_response.selected_choices.set(selected_choices)
                         app_response.selected_keys_snapshot = selected_keys
-                        app_response.save()
+                        selected_choices.extend(
+                            ApplicationResponse.selected_choices.through(
+                                applicationresponse_id=app_response.id,
+                                applicationquestionchoice_id=choice.id
+                            )
+                            for choice in question.choices.all()
+                            if choice.choice_key in selected_keys
+                        )
 
                     elif question.question_type in ['T', 'L']:
                         app_response.text_response = value
-                        app_response.text_response_snapshot = value
-                        app_response.save()
+
+                    app_responses.append(app_response)
+
+            ApplicationResponse.objects.bulk_create(
+                ApplicationResponse.populate_snapshots_bulk(app_responses)
+            )
+            ApplicationResponse.selected_choices.through.objects.bulk_create(
+                selected_choices
+            )
 
         return response
 
@@ -938,11 +1090,11 @@ def activate_event(request, event_id):
     return Response(serializer.data)
 
 
-class EventRsvpViewSet(EventScopedLoggingViewSet):
+class EventRsvpViewSet(ReplicaReadMixin, EventScopedLoggingViewSet):
     """
     API endpoint that allows event RSVPs to be viewed or edited.
     """
-    queryset = EventRsvp.objects.for_event(get_active_event())
+    queryset = EventRsvp.objects.all()
     permission_classes = [permissions.AllowAny]
     serializer_class = EventRsvpSerializer
     filterset_fields = ['event', 'attendee', 'participation_class']
@@ -982,6 +1134,34 @@ class EventRsvpViewSet(EventScopedLoggingViewSet):
         serializer = EventRsvpSerializer(event_rsvp)
         return Response(serializer.data)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'participation_class', OpenApiTypes.STR,
+                description="Only count RSVPs of this participation class"
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+        description=(
+            "Catering and track demand for the event: how many non-canceled "
+            "RSVPs picked each dietary restriction, allergy, track and destiny "
+            "hardware choice."
+        )
+    )
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        event_rsvps = EventRsvp.objects.for_event(self.get_event()).exclude(
+            status=EventRsvp.Status.CANCELED
+        )
+        if request.query_params.get('participation_class'):
+            event_rsvps = event_rsvps.filter(
+                participation_class=request.query_params['participation_class']
+            )
+        return Response({
+            'total': event_rsvps.count(),
+            **profile_counts(event_rsvps),
+        })
+
 
 class UploadedFileViewSet(LoggingMixin, viewsets.ModelViewSet):
     """
@@ -1024,6 +1204,14 @@ class WorkshopViewSet(EventScopedLoggingViewSet):
     permission_classes = [permissions.AllowAny]
     serializer_class = WorkshopSerializer
     filterset_class = WorkshopFilter
+    budgets = {
+        'list': Budget(queries=4),
+    }
+
+    def get_queryset(self):
+        return super().get_queryset().prefetch_related(
+            *workshop_prefetches(self.get_event())
+        )
 
 
 class WorkshopAttendeeViewSet(EventScopedLoggingViewSet):
@@ -1173,4 +1361,18 @@ def lighthouse(request):  # pragma: nocover
 
 
 def lighthouse_table(request, table_number):  # pragma: nocover
-    return render(request, "infrastructure/lighthouse_table.html", {"table_number": table_number})
\ No newline at end of file
+    return render(request, "infrastructure/lighthouse_table.html",
+                  {"table_number": table_number})
+
+
+def metrics(request):
+    """Request and websocket metrics in the Prometheus text format"""
+    token = settings.METRICS_TOKEN
+    if not token:
+        if settings.METRICS_TOKEN_REQUIRED:
+            return HttpResponse(status=403)
+    elif not hmac.compare_digest(
+            request.headers.get("Authorization", "").encode(),
+            f"Bearer {token}".encode()):
+        return HttpResponse(status=401)
+    return HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)